@@ -0,0 +1,79 @@
+"""
+Benchmark de throughput del consumidor de eventos de auditoría.
+
+Publica N eventos en audit_queue y mide cuánto tarda el servicio de auditoría
+en registrarlos todos en audit_logs. Reporta eventos por segundo.
+
+Uso (con RabbitMQ y la base de auditoría accesibles desde el host):
+    python benchmarks/benchmark_consumidor.py --eventos 20000 \
+        --rabbitmq localhost --mongo mongodb://localhost:27018/
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+
+import pika
+from pymongo import MongoClient
+
+QUEUE_NAME = "audit_queue"
+
+
+def evento(i: int) -> dict:
+    return {
+        "timestamp": datetime.now().isoformat(),
+        "user_id": "benchmark",
+        "audited_service_id": "BENCHMARK",
+        "action": "CREATE",
+        "description": f"Evento de benchmark {i}",
+        "entity": "BENCHMARK",
+        "entity_id": str(i),
+        "metadata": {},
+        "ip": "127.0.0.1"
+    }
+
+
+def ejecutar(eventos: int, rabbitmq: str, usuario: str, clave: str, mongo: str, timeout: float):
+    audit_logs = MongoClient(mongo)["audit"].audit_logs
+    filtro = {"audited_service_id": "BENCHMARK"}
+    audit_logs.delete_many(filtro)
+
+    connection = pika.BlockingConnection(pika.ConnectionParameters(
+        host=rabbitmq, credentials=pika.PlainCredentials(usuario, clave)
+    ))
+    channel = connection.channel()
+    channel.queue_declare(queue=QUEUE_NAME, durable=True)
+
+    inicio = time.perf_counter()
+    for i in range(eventos):
+        channel.basic_publish(
+            exchange="",
+            routing_key=QUEUE_NAME,
+            body=json.dumps(evento(i)),
+            properties=pika.BasicProperties(delivery_mode=2)
+        )
+    connection.close()
+    fin_publicacion = time.perf_counter()
+
+    registrados = 0
+    while registrados < eventos and time.perf_counter() - inicio < timeout:
+        time.sleep(0.2)
+        registrados = audit_logs.count_documents(filtro)
+    duracion = time.perf_counter() - inicio
+
+    print(f"Eventos publicados: {eventos} en {fin_publicacion - inicio:.2f} s")
+    print(f"Eventos registrados: {registrados} en {duracion:.2f} s")
+    print(f"Throughput del consumidor: {registrados / duracion:.1f} eventos/s")
+    audit_logs.delete_many(filtro)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del consumidor de auditoría")
+    parser.add_argument("--eventos", type=int, default=20000)
+    parser.add_argument("--rabbitmq", default="localhost")
+    parser.add_argument("--usuario", default="admin")
+    parser.add_argument("--clave", default="admin")
+    parser.add_argument("--mongo", default="mongodb://localhost:27018/")
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+    ejecutar(args.eventos, args.rabbitmq, args.usuario, args.clave, args.mongo, args.timeout)
@@ -1,34 +1,84 @@
-import os, json, pika, time, asyncio
+import os, json, pika, time
+from pydantic import ValidationError
 from database.database import db
 from models.audit_event import AuditEvent
-from logic.logic_audit_logs import crear_log_auditoria
+from logic.logic_audit_logs import registrar_lote_logs_auditoria
 
 RABBITMQ_HOST = os.environ.get("RABBITMQ_HOST", "localhost")
 QUEUE_NAME = "audit_queue"
 user = os.getenv("RABBITMQ_USER", "admin")
 password = os.getenv("RABBITMQ_PASS", "admin")
 
+# Máximo de eventos por lote y tiempo máximo (segundos) que se espera para completar un lote
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_BATCH_LINGER = float(os.getenv("AUDIT_BATCH_LINGER", "0.2"))
+
 credentials = pika.PlainCredentials(user, password)
 
-def callback(ch, method, properties, body):
-    data = json.loads(body)
-    audit_event = AuditEvent(**data)
-    asyncio.run(crear_log_auditoria(audit_event, db))
-    
-    ch.basic_ack(delivery_tag=method.delivery_tag)
-    
+def procesar_lote(channel, lote):
+    """
+    Registra un lote de mensajes en la base de datos y confirma todos con un solo ack.
+    Los mensajes que no son eventos válidos se descartan sin reencolar.
+    """
+    if not lote:
+        return
+    audit_events = []
+    ultimo_tag_valido = None
+    for method, body in lote:
+        try:
+            audit_events.append(AuditEvent(**json.loads(body)))
+            ultimo_tag_valido = method.delivery_tag
+        # TypeError: JSON válido que no es un objeto (p. ej. [] o "x")
+        except (ValueError, TypeError, ValidationError) as e:
+            print(f"Discarding invalid audit event: {e}")
+            channel.basic_nack(delivery_tag=method.delivery_tag, requeue=False)
+
+    if ultimo_tag_valido is None:
+        return
+    registrar_lote_logs_auditoria(audit_events, db)
+    channel.basic_ack(delivery_tag=ultimo_tag_valido, multiple=True)
+
+def consumir_por_lotes(channel):
+    lote = []
+    inicio_lote = None
+    for method, properties, body in channel.consume(QUEUE_NAME, inactivity_timeout=AUDIT_BATCH_LINGER):
+        if method is not None:
+            if not lote:
+                inicio_lote = time.monotonic()
+            lote.append((method, body))
+
+        lote_lleno = len(lote) >= AUDIT_BATCH_SIZE
+        lote_vencido = lote and time.monotonic() - inicio_lote >= AUDIT_BATCH_LINGER
+        if lote_lleno or lote_vencido:
+            procesar_lote(channel, lote)
+            lote = []
+
+def cerrar_conexion(connection, channel):
+    """
+    Cierra el canal y la conexión antes de reconectar. Al cerrar el canal RabbitMQ
+    reencola los mensajes del lote que no alcanzaron a confirmarse.
+    """
+    for recurso in (channel, connection):
+        if recurso is not None and recurso.is_open:
+            try:
+                recurso.close()
+            except Exception as e:
+                print(f"Error closing RabbitMQ {type(recurso).__name__}: {e}")
+
 def start_consumer():
     while True:
+        connection, channel = None, None
         try:
             connection = pika.BlockingConnection(pika.ConnectionParameters(host=RABBITMQ_HOST, credentials=credentials))
             channel = connection.channel()
             channel.queue_declare(queue=QUEUE_NAME, durable=True)
-            
-            channel.basic_qos(prefetch_count=1)
-            channel.basic_consume(queue=QUEUE_NAME, on_message_callback=callback)
-            
-            print(" [*] Waiting for audit logs. To exit press CTRL+C")
-            channel.start_consuming()
+
+            channel.basic_qos(prefetch_count=AUDIT_BATCH_SIZE)
+
+            print(f" [*] Waiting for audit logs in batches of {AUDIT_BATCH_SIZE}. To exit press CTRL+C")
+            consumir_por_lotes(channel)
         except (pika.exceptions.AMQPConnectionError, Exception) as e:
             print(f"Connection to RabbitMQ failed: {e}, retrying in 5 seconds...")
-            time.sleep(5)
\ No newline at end of file
+        finally:
+            cerrar_conexion(connection, channel)
+        time.sleep(5)
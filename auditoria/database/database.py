@@ -1,4 +1,5 @@
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, MongoClient
 
 client = MongoClient("mongodb://mongodb_audit:27018/")
 db = client["audit"]
@@ -16,4 +17,32 @@ def get_next_id(sequence_name: str) -> str:
         upsert=True,
         return_document=True
     )
-    return str(contador["valor_secuencia"])
\ No newline at end of file
+    return str(contador["valor_secuencia"])
+
+def generar_id_log() -> str:
+    """
+    Genera un ID de log de auditoría ordenado por tiempo sin coordinación entre workers.
+    Usa el hexadecimal de un ObjectId: los 4 primeros bytes son el timestamp, por lo que
+    el orden lexicográfico de los IDs sigue el orden de creación.
+    """
+    return str(ObjectId())
+
+
+# Índices para la paginación por (timestamp, _id) y los filtros del listado de logs
+INDICES = {
+    "audit_logs": [
+        [("timestamp", DESCENDING), ("_id", DESCENDING)],
+        [("audited_service_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        [("entity", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+        [("action", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+    ],
+}
+
+def crear_indices():
+    """
+    Crea los índices de las colecciones de auditoría si no existen.
+    """
+    for coleccion, indices in INDICES.items():
+        for campos in indices:
+            db[coleccion].create_index(campos)
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, status
+import base64
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pymongo import UpdateOne
 from models.audit_event import AuditEvent, AuditLog
-from database.database import get_db, get_next_id
+from database.database import get_db, generar_id_log
 from datetime import datetime
 from security.auth0 import validate_auth0_token
 
@@ -9,39 +12,116 @@ router = APIRouter(
     tags=["Audit-logs"],
 )
 
+def _construir_log_auditoria(audit_event: AuditEvent, audit_log_id: str) -> dict:
+    audit_log_dict = audit_event.model_dump(by_alias=True)
+    audit_log_dict["_id"] = audit_log_id
+    audit_log_dict["registered_at"] = datetime.now()
+    return audit_log_dict
+
+def _actualizar_logs_recientes(db, logs_por_servicio: dict) -> None:
+    """
+    Agrega los logs nuevos a la lista de logs recientes de cada servicio auditado,
+    con una sola operación por servicio.
+    """
+    operaciones = [
+        UpdateOne(
+            {"_id": audited_service_id},
+            {
+                "$push": {"recent_logs": {"$each": logs, "$slice": -10}},
+                "$setOnInsert": {"name": audited_service_id, "id": audited_service_id}
+            },
+            upsert=True
+        )
+        for audited_service_id, logs in logs_por_servicio.items()
+    ]
+    if operaciones:
+        db.audited_services.bulk_write(operaciones, ordered=False)
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def crear_log_auditoria(audit_event: AuditEvent, db=Depends(get_db)) -> dict:
     """
     Crea un nuevo log de auditoría.
     """
-    audit_log_id = get_next_id("audit_log_id")
-    audit_log_dict = audit_event.model_dump(by_alias=True)
-    
-    audit_log_registered_at = datetime.now()
-    audit_log_dict["_id"] = audit_log_id
-    audit_log_dict["registered_at"] = audit_log_registered_at
+    audit_log_dict = _construir_log_auditoria(audit_event, generar_id_log())
     
     res =  db.audit_logs.insert_one(audit_log_dict)
     
     # Actualizar la lista de logs recientes en el servicio auditado
-    db.audited_services.update_one(
-        {"_id": audit_event.audited_service_id},
-        {
-            "$push": {"recent_logs": {"$each": [audit_log_dict], "$slice": -10}},
-            "$setOnInsert": {"name": audit_event.audited_service_id, "id": audit_event.audited_service_id}
-        },
-        upsert=True
-    )
+    _actualizar_logs_recientes(db, {audit_event.audited_service_id: [audit_log_dict]})
     
     return {"event created": res.acknowledged, "codigo": "EXITO", "audit_log_id": res.inserted_id}
 
+def registrar_lote_logs_auditoria(audit_events: list[AuditEvent], db) -> int:
+    """
+    Registra un lote de eventos de auditoría con un solo insert_many y una
+    actualización de logs recientes por servicio. Retorna la cantidad insertada.
+    """
+    if not audit_events:
+        return 0
+    audit_logs = [
+        _construir_log_auditoria(audit_event, generar_id_log())
+        for audit_event in audit_events
+    ]
+    res = db.audit_logs.insert_many(audit_logs, ordered=False)
+
+    logs_por_servicio = {}
+    for audit_log in audit_logs:
+        logs_por_servicio.setdefault(audit_log["audited_service_id"], []).append(audit_log)
+    _actualizar_logs_recientes(db, logs_por_servicio)
+    return len(res.inserted_ids)
+
+
+def _codificar_cursor(audit_log: dict) -> str:
+    valor = f"{audit_log['timestamp'].isoformat()}|{audit_log['_id']}"
+    return base64.urlsafe_b64encode(valor.encode()).decode()
+
+def _decodificar_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        timestamp, audit_log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(timestamp), audit_log_id
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido") from exc
 
 @router.get("/", status_code=status.HTTP_200_OK)
-async def listar_logs_auditoria(db=Depends(get_db), dependencies=Depends(validate_auth0_token)) -> list[AuditLog]:
+async def listar_logs_auditoria(
+    response: Response,
+    audited_service_id: Optional[str] = None,
+    entity: Optional[str] = None,
+    action: Optional[str] = None,
+    user_id: Optional[str] = None,
+    desde: Optional[datetime] = None,
+    hasta: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limite: int = Query(default=100, ge=1, le=1000),
+    db=Depends(get_db),
+    dependencies=Depends(validate_auth0_token)
+) -> list[AuditLog]:
     """
-    Lista todos los logs de auditoría de los más recientes a los más antiguos.
+    Lista los logs de auditoría de los más recientes a los más antiguos, paginados por
+    (timestamp, _id). Si hay más resultados, el header X-Siguiente-Cursor trae el cursor
+    que se debe enviar para obtener la siguiente página.
     """
-    logs =  db.audit_logs.find().sort("timestamp", -1).to_list(length=100)
+    filtro = {}
+    for campo, valor in (("audited_service_id", audited_service_id), ("entity", entity), ("action", action), ("user_id", user_id)):
+        if valor is not None:
+            filtro[campo] = valor
+    if desde or hasta:
+        filtro["timestamp"] = {}
+        if desde:
+            filtro["timestamp"]["$gte"] = desde
+        if hasta:
+            filtro["timestamp"]["$lt"] = hasta
+    if cursor:
+        timestamp, audit_log_id = _decodificar_cursor(cursor)
+        filtro = {"$and": [filtro, {"$or": [
+            {"timestamp": {"$lt": timestamp}},
+            {"timestamp": timestamp, "_id": {"$lt": audit_log_id}}
+        ]}]}
+
+    logs = db.audit_logs.find(filtro).sort([("timestamp", -1), ("_id", -1)]).to_list(length=limite + 1)
+    if len(logs) > limite:
+        logs = logs[:limite]
+        response.headers["X-Siguiente-Cursor"] = _codificar_cursor(logs[-1])
     return logs
 
 @router.get("/recent-events", status_code=status.HTTP_200_OK)
@@ -49,5 +129,5 @@ async def listar_eventos_recientes(db=Depends(get_db),dependencies=Depends(valid
     """
     Lista los 10 logs de auditoría más recientes.
     """
-    logs =  db.audit_logs.find().sort("timestamp", -1).to_list(length=10)
+    logs =  db.audit_logs.find().sort([("timestamp", -1), ("_id", -1)]).to_list(length=10)
     return logs
\ No newline at end of file
@@ -1,5 +1,8 @@
+import json
 from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from models.audited_service import AuditedService, Service
 from database.database import get_db, get_next_id
 
@@ -82,13 +85,22 @@ async def obtener_logs_recientes_servicio(audited_service_id: str, db=Depends(ge
     return logs
 
 @router.get("/{audited_service_id}/all-events", status_code=status.HTTP_200_OK)
-async def obtener_todos_logs_servicio(audited_service_id: str, db=Depends(get_db)) -> list[Dict[str, Any]]:
+async def obtener_todos_logs_servicio(audited_service_id: str, db=Depends(get_db)) -> StreamingResponse:
     """
     Obtiene todos los logs de un servicio auditado.
+    La respuesta se transmite como un arreglo JSON a medida que se lee el cursor,
+    sin construir la lista completa en memoria.
     """
-    audited_service =  db.audited_services.find_one({"_id": audited_service_id})
+    audited_service =  db.audited_services.find_one({"_id": audited_service_id}, {"_id": 1})
     if not audited_service:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Audited service not found")
     
-    logs =  db.audit_logs.find({"audited_service_id": audited_service_id}).sort("timestamp", -1).to_list()
-    return logs
\ No newline at end of file
+    logs = db.audit_logs.find({"audited_service_id": audited_service_id}).sort([("timestamp", -1), ("_id", -1)]).batch_size(500)
+
+    def generar_logs():
+        yield "["
+        for i, log in enumerate(logs):
+            yield ("," if i else "") + json.dumps(jsonable_encoder(log))
+        yield "]"
+
+    return StreamingResponse(generar_logs(), media_type="application/json")
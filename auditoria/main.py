@@ -1,5 +1,6 @@
 import threading
 from consumer.event_consumer import start_consumer
+from database.database import crear_indices
 from fastapi import FastAPI
 from logic.logic_audit_logs import router as audit_log_router
 from logic.logic_audited_service import router as audited_service_router
@@ -11,8 +12,9 @@ app.include_router(audited_service_router)
 @app.on_event("startup")
 def startup_event():
     """
-    Arranca el consumidor de eventos de auditoría de RabbitMQ al iniciar la aplicación.
+    Crea los índices y arranca el consumidor de eventos de auditoría de RabbitMQ al iniciar la aplicación.
     """
+    crear_indices()
     thread = threading.Thread(target=start_consumer, daemon=True)
     thread.start()
 
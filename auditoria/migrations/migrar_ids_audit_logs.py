@@ -0,0 +1,80 @@
+"""
+Migra los IDs numéricos de audit_logs (generados con el contador "audit_log_id")
+al formato ObjectId en hexadecimal que usa generar_id_log.
+
+Cada ID antiguo se convierte en un ObjectId cuyo timestamp es el registered_at del
+log y cuyos 8 bytes restantes son el número de secuencia original. Así los logs
+migrados quedan ordenados entre sí y antes de los generados después de la migración.
+El ID original se conserva en el campo legacy_id.
+
+La migración es idempotente: solo procesa documentos cuyo _id es numérico, y cada log
+se escribe con un ReplaceOne con upsert sobre el ID nuevo antes de borrar el antiguo. Si
+una ejecución se interrumpe entre ambos pasos, al repetirla el log se vuelve a escribir
+sobre el mismo ID nuevo en lugar de fallar por clave duplicada.
+
+Uso:
+    python migrations/migrar_ids_audit_logs.py --mongo mongodb://localhost:27018/
+"""
+import argparse
+import re
+import struct
+from datetime import datetime
+
+from bson import ObjectId
+from pymongo import DeleteOne, MongoClient, ReplaceOne
+
+TAMANO_LOTE = 1000
+# Los IDs del contador tienen a lo sumo 20 dígitos; un ObjectId en hexadecimal tiene 24
+# caracteres y puede estar formado solo por dígitos, así que no se confunde con uno antiguo
+PATRON_LEGACY = "^[0-9]{1,20}$"
+
+
+def id_desde_legacy(legacy_id: str, registrado: datetime) -> str:
+    segundos = int(registrado.timestamp())
+    return str(ObjectId(struct.pack(">IQ", segundos, int(legacy_id))))
+
+
+def _nuevo_id(log: dict) -> str:
+    registrado = log.get("registered_at") or log.get("timestamp") or datetime.now()
+    return id_desde_legacy(log["_id"], registrado)
+
+
+def migrar(db):
+    filtro_legacy = {"$regex": PATRON_LEGACY}
+    migrados = 0
+    operaciones = []
+    for log in db.audit_logs.find({"_id": filtro_legacy}):
+        legacy_id = log["_id"]
+        log["_id"] = _nuevo_id(log)
+        log["legacy_id"] = legacy_id
+        operaciones.append(ReplaceOne({"_id": log["_id"]}, log, upsert=True))
+        operaciones.append(DeleteOne({"_id": legacy_id}))
+        migrados += 1
+        if len(operaciones) >= TAMANO_LOTE:
+            db.audit_logs.bulk_write(operaciones)
+            operaciones = []
+    if operaciones:
+        db.audit_logs.bulk_write(operaciones)
+
+    # Actualizar los IDs embebidos en los logs recientes de cada servicio
+    servicios = 0
+    for servicio in db.audited_services.find({"recent_logs._id": filtro_legacy}, {"recent_logs": 1}):
+        recientes = servicio.get("recent_logs", [])
+        for log in recientes:
+            if re.match(PATRON_LEGACY, str(log.get("_id", ""))):
+                log["legacy_id"] = log["_id"]
+                log["_id"] = _nuevo_id(log)
+        db.audited_services.update_one({"_id": servicio["_id"]}, {"$set": {"recent_logs": recientes}})
+        servicios += 1
+
+    # El contador ya no se usa para los logs de auditoría
+    db.contador.delete_one({"_id": "audit_log_id"})
+
+    print(f"Logs migrados: {migrados} | servicios actualizados: {servicios}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migración de IDs de audit_logs a ObjectId")
+    parser.add_argument("--mongo", default="mongodb://localhost:27018/")
+    args = parser.parse_args()
+    migrar(MongoClient(args.mongo)["audit"])
@@ -5,11 +5,21 @@ import {
 } from '../services/inventoryService';
 import type { Item, Producto, Bodega, Estanteria } from '../types';
 
+// Campos que muestra la tabla; el listado solo pide estos al servidor
+const CAMPOS_TABLA: (keyof Item)[] = ['_id', 'estado', 'producto_id', 'bodega_id', 'estanteria_id'];
+// Items por página; se pide uno de más para saber si existe una página siguiente
+const TAMANO_PAGINA = 50;
+
 const Items: React.FC = () => {
     const [items, setItems] = useState<Item[]>([]);
     const [productos, setProductos] = useState<Producto[]>([]);
     const [bodegas, setBodegas] = useState<Bodega[]>([]);
     const [loading, setLoading] = useState(true);
+
+    // Pagination State
+    const [pagina, setPagina] = useState(0);
+    const [hayPaginaSiguiente, setHayPaginaSiguiente] = useState(false);
+    const [filtrado, setFiltrado] = useState(false);
     
     // Form State
     const [newItem, setNewItem] = useState<Partial<Item>>({
@@ -34,6 +44,10 @@ const Items: React.FC = () => {
         loadData();
     }, []);
 
+    useEffect(() => {
+        loadPagina(pagina);
+    }, [pagina]);
+
     // Load shelves for filter when filterBodega changes
     useEffect(() => {
         if (filterBodega) {
@@ -46,16 +60,31 @@ const Items: React.FC = () => {
 
     const loadData = async () => {
         try {
-            const [itemsData, productsData, bodegasData] = await Promise.all([
-                getItems(),
+            const [productsData, bodegasData] = await Promise.all([
                 getProductos(),
                 getBodegas()
             ]);
-            setItems(itemsData);
             setProductos(productsData);
             setBodegas(bodegasData);
         } catch (error) {
             console.error("Error loading data", error);
+        }
+    };
+
+    const loadPagina = async (numero: number) => {
+        setLoading(true);
+        try {
+            const itemsData = await getItems({ saltar: numero * TAMANO_PAGINA, limite: TAMANO_PAGINA + 1 }, CAMPOS_TABLA);
+            if (itemsData.length === 0 && numero > 0) {
+                // La página quedó vacía (p. ej. al eliminar su último item): volver a la anterior
+                setPagina(numero - 1);
+                return;
+            }
+            setItems(itemsData.slice(0, TAMANO_PAGINA));
+            setHayPaginaSiguiente(itemsData.length > TAMANO_PAGINA);
+            setFiltrado(false);
+        } catch (error) {
+            console.error("Error loading items", error);
         } finally {
             setLoading(false);
         }
@@ -71,7 +100,7 @@ const Items: React.FC = () => {
                 data = await getItemsByEstanteria(filterBodega, filterEstanteria);
             } else {
                 // Fallback to client-side filtering if API doesn't support partial combos or just reload all
-                const allItems = await getItems();
+                const allItems = await getItems(undefined, CAMPOS_TABLA);
                 data = allItems.filter(item => {
                     let match = true;
                     if (filterBodega && item.bodega_id !== filterBodega) match = false;
@@ -81,6 +110,7 @@ const Items: React.FC = () => {
                 });
             }
             setItems(data);
+            setFiltrado(true);
         } catch (error) {
             console.error("Error filtering items", error);
         } finally {
@@ -92,7 +122,11 @@ const Items: React.FC = () => {
         setFilterBodega('');
         setFilterProducto('');
         setFilterEstanteria('');
-        loadData();
+        if (pagina === 0) {
+            loadPagina(0);
+        } else {
+            setPagina(0);
+        }
     };
 
     const handleBodegaChange = async (bodegaId: string) => {
@@ -126,7 +160,7 @@ const Items: React.FC = () => {
             await createItem(newItem as Item);
             setNewItem({ _id: '', estado: 'disponible', producto_id: '', bodega_id: '', estanteria_id: '' });
             setFormShelves([]);
-            loadData(); 
+            loadPagina(pagina);
             alert("Item creado exitosamente");
         } catch (error) {
             console.error("Error creating item", error);
@@ -138,7 +172,7 @@ const Items: React.FC = () => {
         if (globalThis.confirm("¿Estás seguro de eliminar este item?")) {
             try {
                 await deleteItem(id);
-                loadData();
+                loadPagina(pagina);
             } catch (error) {
                 console.error("Error deleting item", error);
             }
@@ -378,6 +412,27 @@ const Items: React.FC = () => {
                             </tbody>
                         </table>
                     </div>
+                    {!filtrado && (
+                        <div className="flex items-center justify-between px-6 py-3 border-t border-gray-200 bg-gray-50">
+                            <span className="text-sm text-gray-500">Página {pagina + 1}</span>
+                            <div className="flex gap-2">
+                                <button
+                                    onClick={() => setPagina(pagina - 1)}
+                                    disabled={pagina === 0}
+                                    className="inline-flex justify-center rounded-md border border-gray-300 bg-white py-1 px-3 text-sm font-medium text-gray-700 shadow-sm hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
+                                >
+                                    Anterior
+                                </button>
+                                <button
+                                    onClick={() => setPagina(pagina + 1)}
+                                    disabled={!hayPaginaSiguiente}
+                                    className="inline-flex justify-center rounded-md border border-gray-300 bg-white py-1 px-3 text-sm font-medium text-gray-700 shadow-sm hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed"
+                                >
+                                    Siguiente
+                                </button>
+                            </div>
+                        </div>
+                    )}
                 </div>
             )}
 
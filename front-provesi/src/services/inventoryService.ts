@@ -39,8 +39,10 @@ export const deleteBodega = async (id: string) => {
 };
 
 // Items
-export const getItems = async () => {
-    const response = await api.get<Item[]>('/items/');
+export const getItems = async (paginacion?: { saltar?: number; limite?: number }, campos?: (keyof Item)[]) => {
+    const response = await api.get<Item[]>('/items/', {
+        params: { ...paginacion, fields: campos?.join(',') }
+    });
     return response.data;
 };
 
@@ -0,0 +1,104 @@
+"""
+Compara el costo de convertir y serializar un listado de items leídos de MongoDB:
+
+- anterior:  model_validate por documento y codificación de FastAPI (jsonable_encoder)
+- construir: model_construct por documento (incluidos los movimientos embebidos) y un solo dump_json
+- validar:   model_validate por documento y un solo dump_json (VALIDAR_LECTURAS=true)
+- crudo:     documentos sin validar serializados con to_json (VALIDAR_LECTURAS=false)
+
+Los documentos se generan en memoria con la forma que tienen en la colección, así que
+no requiere MongoDB y mide solo el trabajo de CPU del servicio.
+
+Uso (desde el directorio inventario):
+    python benchmarks/benchmark_lecturas.py --documentos 50000 --repeticiones 5
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import models.lectura as lectura
+from models.item import Item
+from models.movimiento import MovimientoReciente
+
+
+def generar_documentos(cantidad: int, movimientos: int) -> list:
+    inicio = datetime(2024, 1, 1)
+    return [
+        {
+            "_id": f"SKU{i:08d}",
+            "ingreso_fecha": inicio + timedelta(minutes=i),
+            "estado": "disponible",
+            "producto_id": f"PROD{i % 500}",
+            "estanteria_id": f"EST{i % 200}",
+            "bodega_id": str(i % 10),
+            "movimientos_recientes": [
+                {"tipo": "ingreso", "fecha": inicio + timedelta(minutes=i, seconds=j),
+                 "descripcion": "Ingreso del item a la bodega", "usuario_id": "system"}
+                for j in range(movimientos)
+            ],
+        }
+        for i in range(cantidad)
+    ]
+
+
+def anterior(documentos: list) -> bytes:
+    modelos = [Item.model_validate(documento) for documento in documentos]
+    return json.dumps(jsonable_encoder(modelos)).encode()
+
+
+def construir(documentos: list) -> bytes:
+    modelos = [
+        Item.model_construct(**{
+            **documento,
+            "movimientos_recientes": [
+                MovimientoReciente.model_construct(**movimiento) for movimiento in documento["movimientos_recientes"]
+            ],
+        })
+        for documento in documentos
+    ]
+    return TypeAdapter(list[Item]).dump_json(modelos, by_alias=True)
+
+
+def con_lectura(validar: bool):
+    def ejecutar(documentos: list) -> bytes:
+        lectura.VALIDAR_LECTURAS = validar
+        return lectura.respuesta_listado(Item, documentos).body
+    return ejecutar
+
+
+def medir(documentos: list, repeticiones: int):
+    caminos = {
+        "anterior": anterior,
+        "construir": construir,
+        "validar": con_lectura(True),
+        "crudo": con_lectura(False),
+    }
+    referencia = None
+    for nombre, camino in caminos.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            cuerpo = camino(documentos)
+            tiempos.append(time.perf_counter() - inicio)
+        mediana = statistics.median(tiempos)
+        referencia = referencia or mediana
+        print(f"{nombre:<10} | p50: {mediana * 1000:8.1f} ms | {len(documentos) / mediana:10.0f} docs/s | "
+              f"x{referencia / mediana:4.1f} | {len(cuerpo) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Costo de validar y serializar listados de items")
+    parser.add_argument("--documentos", type=int, default=50000)
+    parser.add_argument("--movimientos", type=int, default=3, help="Movimientos recientes embebidos por item")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    args = parser.parse_args()
+    medir(generar_documentos(args.documentos, args.movimientos), args.repeticiones)
@@ -0,0 +1,133 @@
+"""
+Prueba de carga de la capacidad de una estantería con inserciones concurrentes.
+
+Crea un producto, una bodega y una estantería con poca capacidad y lanza N hilos que
+insertan items disponibles en ella al mismo tiempo (todos esperan en una barrera y
+salen juntos). Con --lote cada hilo envía sus items en un solo POST /items/bulk.
+Al final compara contra los items reales:
+
+- que capacidad_utilizada no supere capacidad_total
+- que capacidad_utilizada sea igual a los items disponibles en la estantería
+- que los items aceptados por el servicio sean exactamente los que caben
+
+Termina con código 1 si la estantería quedó sobrellenada o desalineada.
+
+Uso (con inventario y su MongoDB accesibles desde el host):
+    python benchmarks/carga_capacidad_estanteria.py --url http://localhost:8000 \
+        --mongo "mongodb://localhost:27017/?directConnection=true" --hilos 500 --capacidad 100 --token <jwt>
+"""
+import argparse
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+from pymongo import MongoClient
+
+PRODUCTO = "CARGA-PROD"
+ESTANTERIA = "CARGA-EST"
+
+
+def preparar(http: httpx.Client, capacidad: int) -> str:
+    http.post("/productos/", json={
+        "codigo_barras": PRODUCTO, "tipo": "Prueba", "nombre": "Producto de carga",
+        "descripcion": "Producto usado por carga_capacidad_estanteria.py", "precio": 1,
+    })
+    respuesta = http.post("/bodegas/", json={"ciudad": "Prueba", "direccion": "Bodega de carga"})
+    respuesta.raise_for_status()
+    bodega_id = respuesta.json()["id_bodega"]
+    respuesta = http.post(f"/estanterias/{bodega_id}", json={
+        "_id": ESTANTERIA, "area_bodega": "Pasillo de carga", "capacidad_total": capacidad,
+    })
+    respuesta.raise_for_status()
+    return bodega_id
+
+
+def item(bodega_id: str) -> dict:
+    return {
+        "_id": f"CARGA-{uuid.uuid4().hex[:12]}", "estado": "disponible", "producto_id": PRODUCTO,
+        "estanteria_id": ESTANTERIA, "bodega_id": bodega_id,
+    }
+
+
+def insertar(http: httpx.Client, barrera: threading.Barrier, bodega_id: str, por_hilo: int, lote: bool) -> dict:
+    """
+    Inserta los items de un hilo y retorna cuántos aceptó el servicio y los códigos de respuesta.
+    """
+    items = [item(bodega_id) for _ in range(por_hilo)]
+    barrera.wait()
+    resultado = {"aceptados": 0, "codigos": {}}
+    if lote:
+        respuesta = http.post("/items/bulk", json=items)
+        resultado["codigos"][respuesta.status_code] = 1
+        if respuesta.status_code == 201:
+            resultado["aceptados"] = respuesta.json()["items_creados"]
+        return resultado
+    for datos in items:
+        respuesta = http.post("/items/", json=datos)
+        resultado["codigos"][respuesta.status_code] = resultado["codigos"].get(respuesta.status_code, 0) + 1
+        if respuesta.status_code == 201:
+            resultado["aceptados"] += 1
+    return resultado
+
+
+def verificar(mongo: str, bodega_id: str, capacidad: int, intentados: int, aceptados: int) -> bool:
+    db = MongoClient(mongo)["inventario"]
+    reales = db.itemsDisponibles.count_documents({"bodega_id": bodega_id, "estanteria_id": ESTANTERIA})
+    bodega = db.bodegas.find_one({"_id": bodega_id}, {"estanterias": {"$elemMatch": {"_id": ESTANTERIA}}}) or {}
+    estanteria = (bodega.get("estanterias") or [{}])[0]
+    utilizada = estanteria.get("capacidad_utilizada")
+
+    comparaciones = [
+        ("capacidad_utilizada <= capacidad_total", utilizada is not None and utilizada <= capacidad),
+        ("capacidad_utilizada == items en la estantería", utilizada == reales),
+        ("items aceptados == items que caben", aceptados == min(capacidad, intentados) == reales),
+    ]
+    print(f"capacidad_total={capacidad} capacidad_utilizada={utilizada} items_reales={reales} "
+          f"aceptados={aceptados} intentados={intentados}")
+    for nombre, correcto in comparaciones:
+        print(f"{nombre:<50} {'OK' if correcto else 'FALLA'}")
+    return all(correcto for _, correcto in comparaciones)
+
+
+def ejecutar(args) -> bool:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limites = httpx.Limits(max_connections=args.hilos, max_keepalive_connections=args.hilos)
+    with httpx.Client(base_url=args.url, headers=headers, limits=limites, timeout=120) as http:
+        bodega_id = preparar(http, args.capacidad)
+        barrera = threading.Barrier(args.hilos)
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.hilos) as executor:
+            resultados = list(executor.map(
+                lambda _: insertar(http, barrera, bodega_id, args.por_hilo, args.lote), range(args.hilos)
+            ))
+        duracion = time.perf_counter() - inicio
+
+        codigos = {}
+        for resultado in resultados:
+            for codigo, cantidad in resultado["codigos"].items():
+                codigos[codigo] = codigos.get(codigo, 0) + cantidad
+        aceptados = sum(resultado["aceptados"] for resultado in resultados)
+        print(f"Bodega de prueba: {bodega_id} | {args.hilos} hilos en {duracion:.1f} s | respuestas: {codigos}")
+        correcto = verificar(args.mongo, bodega_id, args.capacidad, args.hilos * args.por_hilo, aceptados)
+
+        if not args.conservar:
+            http.delete(f"/bodegas/{bodega_id}")
+            http.delete(f"/productos/{PRODUCTO}")
+    return correcto
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inserciones concurrentes contra la capacidad de una estantería")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--mongo", default="mongodb://localhost:27017/?directConnection=true")
+    parser.add_argument("--hilos", type=int, default=500)
+    parser.add_argument("--por-hilo", type=int, default=1, help="Items que inserta cada hilo")
+    parser.add_argument("--capacidad", type=int, default=100)
+    parser.add_argument("--lote", action="store_true", help="Enviar los items de cada hilo con POST /items/bulk")
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--conservar", action="store_true", help="No eliminar la bodega y el producto de prueba")
+    args = parser.parse_args()
+    sys.exit(0 if ejecutar(args) else 1)
@@ -0,0 +1,118 @@
+"""
+Prueba de estrés de creación y eliminación concurrente de items.
+
+Crea un producto, una bodega y una estantería de prueba, lanza N clientes que crean
+y eliminan items disponibles al mismo tiempo (incluyendo eliminaciones repetidas del
+mismo SKU) y al final compara contra los items reales:
+
+- productos.cantidad_items_disponibles
+- el contador de disponibilidad de (producto, bodega)
+- capacidad_utilizada de la estantería
+
+Termina con código 1 si algún contador quedó desalineado.
+
+Uso (con inventario y su MongoDB accesibles desde el host):
+    python benchmarks/stress_items.py --url http://localhost:8000 \
+        --mongo "mongodb://localhost:27017/?directConnection=true" --clientes 50 --operaciones 40 --token <jwt>
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+
+import httpx
+from pymongo import MongoClient
+
+PRODUCTO = "STRESS-PROD"
+ESTANTERIA = "STRESS-EST"
+
+
+async def preparar(http: httpx.AsyncClient, capacidad: int) -> str:
+    await http.post("/productos/", json={
+        "codigo_barras": PRODUCTO, "tipo": "Prueba", "nombre": "Producto de estrés",
+        "descripcion": "Producto usado por stress_items.py", "precio": 1,
+    })
+    respuesta = await http.post("/bodegas/", json={"ciudad": "Prueba", "direccion": "Bodega de estrés"})
+    respuesta.raise_for_status()
+    bodega_id = respuesta.json()["id_bodega"]
+    respuesta = await http.post(f"/estanterias/{bodega_id}", json={
+        "_id": ESTANTERIA, "area_bodega": "Pasillo de estrés", "capacidad_total": capacidad,
+    })
+    respuesta.raise_for_status()
+    return bodega_id
+
+
+async def cliente(http: httpx.AsyncClient, bodega_id: str, operaciones: int, creados: list, resultados: dict):
+    for _ in range(operaciones):
+        if creados and random.random() < 0.4:
+            # Eliminar un SKU al azar; otro cliente puede estar eliminándolo a la vez
+            respuesta = await http.delete(f"/items/sku/{random.choice(creados)}")
+            clave = "eliminados" if respuesta.status_code == 204 else f"eliminar_{respuesta.status_code}"
+        else:
+            sku = f"STRESS-{uuid.uuid4().hex[:12]}"
+            respuesta = await http.post("/items/", json={
+                "_id": sku, "estado": "disponible", "producto_id": PRODUCTO,
+                "estanteria_id": ESTANTERIA, "bodega_id": bodega_id,
+            })
+            if respuesta.status_code == 201:
+                creados.append(sku)
+            clave = "creados" if respuesta.status_code == 201 else f"crear_{respuesta.status_code}"
+        resultados[clave] = resultados.get(clave, 0) + 1
+
+
+def verificar(mongo: str, bodega_id: str) -> bool:
+    db = MongoClient(mongo)["inventario"]
+    reales_producto = db.itemsDisponibles.count_documents({"producto_id": PRODUCTO})
+    reales_bodega = db.itemsDisponibles.count_documents({"producto_id": PRODUCTO, "bodega_id": bodega_id})
+    reales_estanteria = db.itemsDisponibles.count_documents({"bodega_id": bodega_id, "estanteria_id": ESTANTERIA})
+
+    producto = db.productos.find_one({"_id": PRODUCTO}) or {}
+    contador = db.disponibilidad.find_one({"producto_id": PRODUCTO, "bodega_id": bodega_id}) or {}
+    bodega = db.bodegas.find_one({"_id": bodega_id}) or {}
+    estanteria = next((e for e in bodega.get("estanterias", []) if e["_id"] == ESTANTERIA), {})
+
+    comparaciones = [
+        ("productos.cantidad_items_disponibles", producto.get("cantidad_items_disponibles"), reales_producto),
+        ("disponibilidad (producto, bodega)", contador.get("disponibles", 0), reales_bodega),
+        ("estantería capacidad_utilizada", estanteria.get("capacidad_utilizada"), reales_estanteria),
+    ]
+    correcto = True
+    for nombre, contador_valor, real in comparaciones:
+        estado = "OK" if contador_valor == real else "DESALINEADO"
+        correcto = correcto and contador_valor == real
+        print(f"{nombre:<40} contador={contador_valor} real={real} {estado}")
+    return correcto
+
+
+async def ejecutar(args) -> bool:
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+    limites = httpx.Limits(max_connections=args.clientes, max_keepalive_connections=args.clientes)
+    async with httpx.AsyncClient(base_url=args.url, headers=headers, limits=limites, timeout=60) as http:
+        bodega_id = await preparar(http, args.capacidad)
+        creados: list = []
+        resultados: dict = {}
+        await asyncio.gather(*(
+            cliente(http, bodega_id, args.operaciones, creados, resultados) for _ in range(args.clientes)
+        ))
+    print(f"Bodega de prueba: {bodega_id} | resultados: {resultados}")
+    correcto = verificar(args.mongo, bodega_id)
+
+    if not args.conservar:
+        async with httpx.AsyncClient(base_url=args.url, headers=headers, timeout=60) as http:
+            await http.delete(f"/bodegas/{bodega_id}")
+            await http.delete(f"/productos/{PRODUCTO}")
+    return correcto
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estrés de creación y eliminación concurrente de items")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--mongo", default="mongodb://localhost:27017/?directConnection=true")
+    parser.add_argument("--clientes", type=int, default=50)
+    parser.add_argument("--operaciones", type=int, default=40)
+    parser.add_argument("--capacidad", type=int, default=500)
+    parser.add_argument("--token", default=None)
+    parser.add_argument("--conservar", action="store_true", help="No eliminar la bodega y el producto de prueba")
+    args = parser.parse_args()
+    sys.exit(0 if asyncio.run(ejecutar(args)) else 1)
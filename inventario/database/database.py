@@ -1,19 +1,79 @@
-from pymongo import MongoClient
+import os
+from pymongo import ASCENDING, DESCENDING, AsyncMongoClient
 
-client = MongoClient("mongodb://mongodb_inventario:27017/")
+MONGO_URL = os.environ.get("MONGO_URL", "mongodb://mongodb_inventario:27017/")
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.environ.get("MONGO_MIN_POOL_SIZE", "0"))
+# Las transacciones requieren que MongoDB corra como replica set (ver docker-compose)
+MONGO_TRANSACCIONES = os.environ.get("MONGO_TRANSACCIONES", "true").lower() == "true"
+
+# Cliente asíncrono de PyMongo: las consultas no bloquean el event loop de FastAPI
+client = AsyncMongoClient(
+    MONGO_URL,
+    maxPoolSize=MONGO_MAX_POOL_SIZE,
+    minPoolSize=MONGO_MIN_POOL_SIZE,
+)
 db = client["inventario"]
 
 async def get_db():
     yield db
     
-def get_next_id(sequence_name: str) -> str:
+async def en_transaccion(operacion):
+    """
+    Ejecuta operacion(session) dentro de una transacción multi-documento.
+    with_transaction reintenta la operación completa ante conflictos de escritura
+    entre transacciones concurrentes y reintenta el commit ante errores transitorios.
+    Con MONGO_TRANSACCIONES=false la operación se ejecuta sin sesión.
+    """
+    if not MONGO_TRANSACCIONES:
+        return await operacion(None)
+    async with client.start_session() as session:
+        return await session.with_transaction(operacion)
+
+async def get_next_id(sequence_name: str) -> str:
     """
     Incrementa y devuelve el siguiente ID para una secuencia específica.
     """
-    contador = db.contador.find_one_and_update(
+    contador = await db.contador.find_one_and_update(
         {"_id": sequence_name},
         {"$inc": {"valor_secuencia": 1}},
         upsert=True,
         return_document=True
     )
-    return str(contador["valor_secuencia"])
\ No newline at end of file
+    return str(contador["valor_secuencia"])
+
+# Índices compuestos según las consultas de logic_item, logic_bodega y logic_estanteria
+INDICES = {
+    "items": [
+        [("producto_id", ASCENDING), ("bodega_id", ASCENDING)],
+        [("bodega_id", ASCENDING), ("estanteria_id", ASCENDING)],
+    ],
+    "itemsDisponibles": [
+        [("producto_id", ASCENDING), ("bodega_id", ASCENDING)],
+        [("bodega_id", ASCENDING), ("estanteria_id", ASCENDING)],
+    ],
+    "bodegas": [
+        [("estanterias._id", ASCENDING)],
+    ],
+    "itemsReservados": [
+        [("reserva_id", ASCENDING)],
+        [("producto_id", ASCENDING), ("bodega_id", ASCENDING)],
+        [("bodega_id", ASCENDING), ("estanteria_id", ASCENDING)],
+    ],
+    "reservas": [
+        [("estado", ASCENDING), ("expira", ASCENDING)],
+        [("bodega_id", ASCENDING), ("estado", ASCENDING)],
+    ],
+    "movimientos": [
+        [("sku", ASCENDING), ("fecha", DESCENDING), ("_id", DESCENDING)],
+    ],
+}
+
+async def crear_indices():
+    """
+    Crea los índices de las colecciones de inventario si no existen.
+    create_index es idempotente, por lo que es seguro llamarlo en cada arranque.
+    """
+    for coleccion, indices in INDICES.items():
+        for campos in indices:
+            await db[coleccion].create_index(campos)
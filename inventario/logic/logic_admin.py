@@ -0,0 +1,51 @@
+from typing import Dict, Any
+from fastapi import APIRouter, Depends, status
+from database.database import get_db, INDICES
+from logic.logic_disponibilidad import reconciliar_disponibilidad
+from logic.logic_movimiento import recortar_movimientos_recientes
+from security.auth0 import validate_auth0_token
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["Admin"],
+    dependencies=[Depends(validate_auth0_token)]
+)
+
+@router.get("/indices", status_code=status.HTTP_200_OK)
+async def obtener_uso_indices(db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Reporta el uso de los índices de cada colección usando $indexStats.
+    Permite confirmar en producción que las consultas usan los índices esperados.
+    """
+    colecciones = ["productos", "bodegas", *INDICES.keys()]
+    resultado = {}
+    for coleccion in colecciones:
+        estadisticas = await db[coleccion].aggregate([{"$indexStats": {}}])
+        resultado[coleccion] = [
+            {
+                "nombre": indice["name"],
+                "campos": indice["key"],
+                "usos": indice["accesses"]["ops"],
+                "desde": indice["accesses"]["since"],
+            }
+            async for indice in estadisticas
+        ]
+    return {"indices": resultado, "codigo": "EXITO"}
+
+
+@router.post("/disponibilidad/reconciliar", status_code=status.HTTP_200_OK)
+async def reconciliar_contadores_disponibilidad(db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Reconstruye los contadores de disponibilidad por producto y bodega desde itemsDisponibles.
+    """
+    resultado = await reconciliar_disponibilidad(db)
+    return {**resultado, "codigo": "EXITO"}
+
+
+@router.post("/movimientos/recortar", status_code=status.HTTP_200_OK)
+async def recortar_movimientos_embebidos(db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Recorta los movimientos recientes embebidos de los items antiguos al máximo configurado.
+    """
+    modificados = await recortar_movimientos_recientes(db)
+    return {"items_modificados": modificados, "codigo": "EXITO"}
@@ -1,41 +1,161 @@
 import os
 import json
+import logging
 import pika
+import queue
+import threading
+import time
 import datetime
 
 RABBITMQ_HOST = os.environ.get("RABBITMQ_HOST", "localhost")
 RABBITMQ_USER = os.environ.get("RABBITMQ_USER", "admin")
 RABBITMQ_PASS = os.environ.get("RABBITMQ_PASS", "admin")
 QUEUE_NAME = "audit_queue"
+# Exchange topic por el que se publican los eventos. audit_queue recibe todos; otros servicios
+# pueden enlazar sus propias colas (p. ej. pedidos escucha INVENTARIO.PRODUCTO.* para invalidar su cache)
+AUDIT_EXCHANGE = "auditoria"
 
-def enviar_evento_auditoria(user_id: str, action: str, description: str, entity: str, entity_id: str, metadata: dict = None, ip: str = None):
-    credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
-    try:
-        connection = pika.BlockingConnection(pika.ConnectionParameters(host=RABBITMQ_HOST, credentials=credentials))
+# Número de canales (uno por hilo publicador) y tamaño máximo de la cola en memoria
+AUDIT_PUBLISHER_CHANNELS = int(os.environ.get("AUDIT_PUBLISHER_CHANNELS", "2"))
+AUDIT_PUBLISHER_QUEUE_SIZE = int(os.environ.get("AUDIT_PUBLISHER_QUEUE_SIZE", "10000"))
+AUDIT_PUBLISHER_RETRY_SECONDS = float(os.environ.get("AUDIT_PUBLISHER_RETRY_SECONDS", "5"))
+
+logger = logging.getLogger(__name__)
+
+
+class PublicadorAuditoria:
+    """
+    Publicador persistente de eventos de auditoría hacia RabbitMQ.
+
+    Los handlers solo encolan el evento en memoria; un grupo de hilos, cada uno con
+    su propia conexión y canal (pika no es thread-safe), publica con confirmaciones
+    del broker y se reconecta automáticamente si la conexión se pierde.
+    """
+
+    def __init__(self, canales: int, tamano_cola: int):
+        self._canales = canales
+        self._pendientes = queue.Queue(maxsize=tamano_cola)
+        self._hilos = []
+        self._lock = threading.Lock()
+        self._detenido = threading.Event()
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilos:
+                return
+            self._detenido.clear()
+            for i in range(self._canales):
+                hilo = threading.Thread(target=self._publicar_pendientes, name=f"audit-publisher-{i}", daemon=True)
+                hilo.start()
+                self._hilos.append(hilo)
+
+    def detener(self, timeout: float = 5):
+        """
+        Espera a que se publiquen los eventos pendientes y detiene los hilos.
+        """
+        self._detenido.set()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def publicar(self, mensaje: dict):
+        self.iniciar()
+        routing_key = f"{mensaje.get('audited_service_id')}.{mensaje.get('entity')}.{mensaje.get('action')}"
+        try:
+            self._pendientes.put_nowait((routing_key, json.dumps(mensaje, default=str)))
+        except queue.Full:
+            logger.warning("Audit queue full, dropping event: %s on %s", mensaje.get("action"), mensaje.get("entity"))
+
+    def _conectar(self):
+        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+        connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            credentials=credentials,
+            heartbeat=30,
+            blocked_connection_timeout=300
+        ))
         channel = connection.channel()
+        channel.exchange_declare(exchange=AUDIT_EXCHANGE, exchange_type="topic", durable=True)
         channel.queue_declare(queue=QUEUE_NAME, durable=True)
+        channel.queue_bind(queue=QUEUE_NAME, exchange=AUDIT_EXCHANGE, routing_key="#")
+        channel.confirm_delivery()
+        return connection, channel
+
+    @staticmethod
+    def _cerrar(connection):
+        """
+        Cierra la conexión si sigue abierta. Se llama antes de reconectar, para no dejar
+        abierto el socket de la conexión que falló, y al detener el hilo.
+        """
+        if connection is None or connection.is_closed:
+            return
+        try:
+            connection.close()
+        except Exception as e:
+            logger.warning("Error closing audit publisher connection: %s", e)
+
+    def _publicar_pendientes(self):
+        connection, channel = None, None
+        while not (self._detenido.is_set() and self._pendientes.empty()):
+            try:
+                routing_key, body = self._pendientes.get(timeout=1)
+            except queue.Empty:
+                if connection is not None and connection.is_open:
+                    try:
+                        connection.process_data_events(time_limit=0)
+                    except Exception as e:
+                        logger.warning("Audit publisher connection lost while idle: %s", e)
+                        self._cerrar(connection)
+                        connection, channel = None, None
+                continue
+
+            publicado = False
+            while not publicado:
+                try:
+                    if connection is None or connection.is_closed:
+                        connection, channel = self._conectar()
+                    channel.basic_publish(
+                        exchange=AUDIT_EXCHANGE,
+                        routing_key=routing_key,
+                        body=body,
+                        properties=pika.BasicProperties(
+                            delivery_mode=2
+                        ),
+                        mandatory=True
+                    )
+                    publicado = True
+                except (pika.exceptions.UnroutableError, pika.exceptions.NackError) as e:
+                    logger.error("Audit event rejected by broker: %s", e)
+                    break
+                except Exception as e:
+                    logger.error("Failed to send audit event: %s, retrying in %s seconds...", e, AUDIT_PUBLISHER_RETRY_SECONDS)
+                    self._cerrar(connection)
+                    connection, channel = None, None
+                    if self._detenido.is_set():
+                        break
+                    time.sleep(AUDIT_PUBLISHER_RETRY_SECONDS)
+            self._pendientes.task_done()
+
+        self._cerrar(connection)
 
-        message = {
-            "timestamp": datetime.datetime.now().isoformat(),
-            "user_id": user_id,
-            "audited_service_id": "INVENTARIO",
-            "action": action,
-            "description": description,
-            "entity": entity,
-            "entity_id": entity_id,
-            "metadata": metadata or {},
-            "ip": ip
-        }
-
-        channel.basic_publish(
-            exchange='',
-            routing_key=QUEUE_NAME,
-            body=json.dumps(message),
-            properties=pika.BasicProperties(
-                delivery_mode=2
-            ))
-        
-        print(f" [x] Sent audit event: {action} on {entity}")
-        connection.close()
-    except Exception as e:
-        print(f"Failed to send audit event: {e}")
+
+publicador = PublicadorAuditoria(AUDIT_PUBLISHER_CHANNELS, AUDIT_PUBLISHER_QUEUE_SIZE)
+
+
+def enviar_evento_auditoria(user_id: str, action: str, description: str, entity: str, entity_id: str, metadata: dict = None, ip: str = None):
+    """
+    Encola un evento de auditoría para ser publicado en segundo plano.
+    No abre conexiones ni espera al broker dentro de la petición.
+    """
+    message = {
+        "timestamp": datetime.datetime.now().isoformat(),
+        "user_id": user_id,
+        "audited_service_id": "INVENTARIO",
+        "action": action,
+        "description": description,
+        "entity": entity,
+        "entity_id": entity_id,
+        "metadata": metadata or {},
+        "ip": ip
+    }
+    publicador.publicar(message)
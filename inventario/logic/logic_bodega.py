@@ -1,10 +1,14 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from database.database import get_db, get_next_id
+from database.database import en_transaccion, get_db, get_next_id
 from models.item import Item
 from models.estanteria import Estanteria
 from models.bodega import Bodega
+from models.lectura import respuesta_listado
+from models.proyeccion import modelo_parcial, proyeccion_mongo, resolver_campos
 from logic.logic_audit_producer import enviar_evento_auditoria
+from logic.logic_disponibilidad import ajustar_disponibilidad, contar_disponibles_por_filtro
+from logic.logic_item import obtener_items_disponibles_producto_bodega
 from security.auth0 import validate_auth0_token
 
 router = APIRouter(
@@ -16,8 +20,8 @@ router = APIRouter(
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def crear_bodega(bodega: Bodega, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
     bodega_dict = bodega.model_dump(by_alias=True)
-    bodega_dict["_id"] = get_next_id("bodegas")
-    resultado = db.bodegas.insert_one(bodega_dict)
+    bodega_dict["_id"] = await get_next_id("bodegas")
+    resultado = await db.bodegas.insert_one(bodega_dict)
     
     enviar_evento_auditoria(
         user_id="system",
@@ -31,28 +35,71 @@ async def crear_bodega(bodega: Bodega, request: Request, db=Depends(get_db)) ->
     
     return {"bodega_creada": resultado.acknowledged, "codigo": "EXITO", "id_bodega": resultado.inserted_id}
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def listar_bodegas(db=Depends(get_db)) -> list[Bodega]:
-    bodegas = db.bodegas.find({}, {"estanterias": 0}).to_list()
-    return [Bodega.model_validate(bodega) for bodega in bodegas]
+@router.get("/", status_code=status.HTTP_200_OK, response_model=list[Bodega])
+async def listar_bodegas(fields: Optional[str] = None, db=Depends(get_db)):
+    """
+    Lista las bodegas sin sus estanterías.
+    Con fields (por ejemplo fields=_id,ciudad o fields=_id,estanterias) solo se leen y
+    retornan esos campos; las estanterías se incluyen únicamente si se piden.
+    """
+    try:
+        campos = resolver_campos(Bodega, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if campos is None:
+        bodegas = await db.bodegas.find({}, {"estanterias": 0}).to_list()
+        return respuesta_listado(Bodega, bodegas)
+    bodegas = await db.bodegas.find({}, proyeccion_mongo(Bodega, campos)).to_list()
+    modelo = modelo_parcial(Bodega, campos)
+    return respuesta_listado(modelo, bodegas)
+
+# Las rutas fijas van antes de /{bodega_id}; de lo contrario esa ruta las captura
+@router.get("/items", status_code=status.HTTP_200_OK)
+async def obtener_items_producto_bodega(codigo_barras: str, bodega_id: str, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Obtiene todos los items asociados a un producto identificado por su código de barras y a una bodega.
+    """
+    # Verificar si el producto existe
+    producto = await db.productos.find_one({"_id": codigo_barras})
+    if not producto:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
+
+    items = await db.items.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items_disponibles = await db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items_reservados = await db.itemsReservados.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items = items + items_disponibles + items_reservados
+    return {"items": items, "codigo": "EXITO"}
+
+# Misma consulta que /items/itemsDisponibles (conteo leído del contador de disponibilidad)
+router.add_api_route("/itemsDisponibles", obtener_items_disponibles_producto_bodega, methods=["GET"], status_code=status.HTTP_200_OK)
 
 @router.get("/{bodega_id}", status_code=status.HTTP_200_OK)
 async def obtener_bodega(bodega_id: str, db=Depends(get_db)) -> Bodega:
-    bodega = db.bodegas.find_one({"_id": bodega_id})
+    bodega = await db.bodegas.find_one({"_id": bodega_id})
     if not bodega:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
     return Bodega.model_validate(bodega)
 
 @router.delete("/{bodega_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_bodega(bodega_id: str, request: Request, db=Depends(get_db)):
-    resultado = db.bodegas.delete_one({"_id": bodega_id})
-    
-    if resultado.deleted_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
-    
-    # Eliminar items asociados a la bodega para mantener consistencia
-    db.items.delete_many({"bodega_id": bodega_id})
-    db.itemsDisponibles.delete_many({"bodega_id": bodega_id})
+    async def eliminar(session):
+        # Con reservas pendientes o items reservados no se elimina: al liberarlos, sus items
+        # volverían a una bodega que ya no existe
+        if await db.reservas.find_one({"bodega_id": bodega_id, "estado": "pendiente"}, {"_id": 1}, session=session) \
+                or await db.itemsReservados.find_one({"bodega_id": bodega_id}, {"_id": 1}, session=session):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La bodega tiene reservas pendientes o items reservados")
+
+        resultado = await db.bodegas.delete_one({"_id": bodega_id}, session=session)
+        if resultado.deleted_count == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
+
+        # Eliminar items asociados a la bodega para mantener consistencia
+        await db.items.delete_many({"bodega_id": bodega_id}, session=session)
+        disponibles = await contar_disponibles_por_filtro(db, {"bodega_id": bodega_id}, session=session)
+        await db.itemsDisponibles.delete_many({"bodega_id": bodega_id}, session=session)
+        await ajustar_disponibilidad(db, {clave: -cantidad for clave, cantidad in disponibles.items()}, session=session)
+
+    await en_transaccion(eliminar)
     
     enviar_evento_auditoria(
         user_id="system",
@@ -66,7 +113,7 @@ async def eliminar_bodega(bodega_id: str, request: Request, db=Depends(get_db)):
 @router.put("/{bodega_id}", status_code=status.HTTP_200_OK)
 async def actualizar_bodega(bodega_id: str, bodega: Bodega, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
 
-    resultado = db.bodegas.update_one({"_id": bodega_id}, {"$set": bodega.model_dump(by_alias=True)})
+    resultado = await db.bodegas.update_one({"_id": bodega_id}, {"$set": bodega.model_dump(by_alias=True)})
     if resultado.matched_count == 0:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
     
@@ -81,32 +128,3 @@ async def actualizar_bodega(bodega_id: str, bodega: Bodega, request: Request, db
     )
     
     return {"bodega_actualizada": resultado.acknowledged, "codigo": "EXITO"}
-
-@router.get("/items", status_code=status.HTTP_200_OK)
-async def obtener_items_producto_bodega(codigo_barras: str, bodega_id: str, db=Depends(get_db)) -> Dict[str, Any]:
-    """
-    Obtiene todos los items asociados a un producto identificado por su código de barras y a una bodega.
-    """
-    # Verificar si el producto existe
-    producto = db.productos.find_one({"_id": codigo_barras})
-    if not producto:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
-
-    items = db.items.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    items_disponibles = db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    items = list(items) + list(items_disponibles)
-    return {"items": items, "codigo": "EXITO"}
-
-@router.get("/itemsDisponibles", status_code=status.HTTP_200_OK)
-async def obtener_items_disponibles_producto_bodega(codigo_barras: str, bodega_id: str, db=Depends(get_db)) -> Dict[str, Any]:
-    """
-    Obtiene todos los items disponibles para un pedido que están
-    asociados a un producto identificado por su código de barras.
-    """
-    # Verificar si el producto existe
-    producto = db.productos.find_one({"_id": codigo_barras})
-    if not producto:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
-
-    items_disponibles = db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    return {"items_disponibles": list(items_disponibles), "codigo": "EXITO"}
\ No newline at end of file
@@ -0,0 +1,165 @@
+"""
+Contadores de items disponibles por producto y bodega.
+
+La colección disponibilidad guarda un documento por (producto, bodega) con la cantidad de
+items en itemsDisponibles, de modo que consultar la disponibilidad es una lectura por _id
+en lugar de contar items. Cada operación que mueve items disponibles ajusta el contador
+justo después del movimiento y también el total global productos.cantidad_items_disponibles.
+reconciliar_disponibilidad corrige ambos a partir de itemsDisponibles.
+"""
+import asyncio
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+from pymongo import UpdateOne
+
+from database.database import db as base_datos, en_transaccion
+
+# Cada cuánto (segundos) se reconstruyen los contadores en segundo plano; 0 lo desactiva
+DISPONIBILIDAD_RECONCILIACION_SEGUNDOS = float(os.environ.get("DISPONIBILIDAD_RECONCILIACION_SEGUNDOS", "0"))
+
+
+def clave_disponibilidad(producto_id: str, bodega_id: str) -> str:
+    return f"{producto_id}:{bodega_id}"
+
+
+async def ajustar_disponibilidad(db, cambios: Dict[Tuple[str, str], int], session=None):
+    """
+    Aplica los cambios (producto_id, bodega_id) -> delta a los contadores por bodega
+    y al total de cada producto, con una escritura por colección.
+    Con session, las escrituras forman parte de la transacción del movimiento de items.
+    """
+    cambios = {clave: delta for clave, delta in cambios.items() if delta}
+    if not cambios:
+        return
+    await db.disponibilidad.bulk_write([
+        UpdateOne(
+            {"_id": clave_disponibilidad(producto_id, bodega_id)},
+            {"$inc": {"disponibles": delta}, "$setOnInsert": {"producto_id": producto_id, "bodega_id": bodega_id}},
+            upsert=True
+        )
+        for (producto_id, bodega_id), delta in cambios.items()
+    ], ordered=False, session=session)
+
+    por_producto = Counter()
+    for (producto_id, _), delta in cambios.items():
+        por_producto[producto_id] += delta
+    totales = [
+        UpdateOne({"_id": producto_id}, {"$inc": {"cantidad_items_disponibles": delta}})
+        for producto_id, delta in por_producto.items() if delta
+    ]
+    if totales:
+        await db.productos.bulk_write(totales, ordered=False, session=session)
+
+
+async def ajustar_disponibilidad_items(db, items: Iterable[dict], signo: int, session=None):
+    """
+    Suma (signo=1) o resta (signo=-1) a los contadores los items indicados.
+    """
+    cambios = Counter()
+    for item in items:
+        cambios[(item["producto_id"], item["bodega_id"])] += signo
+    await ajustar_disponibilidad(db, cambios, session=session)
+
+
+async def contar_disponibles_por_filtro(db, filtro: dict, session=None) -> Dict[Tuple[str, str], int]:
+    """
+    Cuenta los items disponibles que cumplen el filtro agrupados por (producto, bodega).
+    Se usa antes de borrar items en bloque para descontarlos de los contadores.
+    """
+    conteos = await db.itemsDisponibles.aggregate([
+        {"$match": filtro},
+        {"$group": {"_id": {"producto_id": "$producto_id", "bodega_id": "$bodega_id"}, "cantidad": {"$sum": 1}}}
+    ], session=session)
+    return {(conteo["_id"]["producto_id"], conteo["_id"]["bodega_id"]): conteo["cantidad"] async for conteo in conteos}
+
+
+def cantidades_por_producto(productos: Iterable) -> Dict[str, int]:
+    """
+    Suma las cantidades solicitadas de cada producto, de modo que varias líneas del mismo
+    código de barras se validan y reservan como una sola.
+    """
+    cantidades = Counter()
+    for producto in productos:
+        cantidades[producto.codigo_barras] += producto.cantidad
+    return dict(cantidades)
+
+
+async def obtener_disponibles(db, bodega_id: str, productos_ids: List[str]) -> Dict[str, int]:
+    """
+    Lee los contadores de varios productos en una bodega. Los productos sin contador tienen 0.
+    """
+    claves = [clave_disponibilidad(producto_id, bodega_id) for producto_id in productos_ids]
+    contadores = db.disponibilidad.find({"_id": {"$in": claves}}, {"producto_id": 1, "disponibles": 1})
+    disponibles = {contador["producto_id"]: contador["disponibles"] async for contador in contadores}
+    return {producto_id: disponibles.get(producto_id, 0) for producto_id in productos_ids}
+
+
+async def reconciliar_disponibilidad(db) -> Dict[str, int]:
+    """
+    Corrige los contadores para que coincidan con itemsDisponibles.
+
+    Se cuentan los items, se leen los contadores y cada diferencia se aplica con $inc, de
+    modo que un ajuste concurrente sobre el mismo contador no se pierde. Todo corre en una
+    transacción: si un movimiento de items ajusta un contador mientras tanto, el conflicto
+    de escritura hace que la reconciliación se reintente con datos frescos. Los contadores
+    que quedan en 0 se eliminan y el total de cada producto se corrige de la misma forma.
+    """
+    async def reconciliar(session):
+        reales = await contar_disponibles_por_filtro(db, {}, session=session)
+        contadores = {
+            (contador["producto_id"], contador["bodega_id"]): contador["disponibles"]
+            async for contador in db.disponibilidad.find(
+                {}, {"producto_id": 1, "bodega_id": 1, "disponibles": 1}, session=session
+            )
+        }
+        correcciones = {
+            clave: reales.get(clave, 0) - contadores.get(clave, 0)
+            for clave in reales.keys() | contadores.keys()
+            if reales.get(clave, 0) != contadores.get(clave, 0)
+        }
+        if correcciones:
+            await db.disponibilidad.bulk_write([
+                UpdateOne(
+                    {"_id": clave_disponibilidad(producto_id, bodega_id)},
+                    {"$inc": {"disponibles": delta},
+                     "$setOnInsert": {"producto_id": producto_id, "bodega_id": bodega_id}},
+                    upsert=True
+                )
+                for (producto_id, bodega_id), delta in correcciones.items()
+            ], ordered=False, session=session)
+        eliminados = await db.disponibilidad.delete_many({"disponibles": 0}, session=session)
+
+        por_producto = Counter()
+        for (producto_id, _), cantidad in reales.items():
+            por_producto[producto_id] += cantidad
+        totales = [
+            UpdateOne({"_id": producto["_id"]},
+                      {"$inc": {"cantidad_items_disponibles": por_producto[producto["_id"]] - actual}})
+            async for producto in db.productos.find({}, {"cantidad_items_disponibles": 1}, session=session)
+            if (actual := producto.get("cantidad_items_disponibles", 0)) != por_producto[producto["_id"]]
+        ]
+        if totales:
+            await db.productos.bulk_write(totales, ordered=False, session=session)
+
+        return {
+            "contadores": len(reales),
+            "contadores_corregidos": len(correcciones),
+            "contadores_eliminados": eliminados.deleted_count,
+            "productos_corregidos": len(totales),
+        }
+
+    return await en_transaccion(reconciliar)
+
+
+async def reconciliar_disponibilidad_periodicamente():
+    """
+    Tarea en segundo plano que reconstruye los contadores cada DISPONIBILIDAD_RECONCILIACION_SEGUNDOS.
+    """
+    while True:
+        await asyncio.sleep(DISPONIBILIDAD_RECONCILIACION_SEGUNDOS)
+        try:
+            await reconciliar_disponibilidad(base_datos)
+        except Exception as e:
+            print(f"Error reconciliando contadores de disponibilidad: {e}")
@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
-from database.database import get_db
+from pymongo import ReturnDocument
+from database.database import en_transaccion, get_db
 from models.estanteria import Estanteria
-from typing import Dict, Any
+from models.lectura import respuesta_listado
+from typing import Dict, Any, Optional, Tuple
 from logic.logic_audit_producer import enviar_evento_auditoria
+from logic.logic_disponibilidad import ajustar_disponibilidad, contar_disponibles_por_filtro
 from security.auth0 import validate_auth0_token
 
 router = APIRouter(
@@ -11,24 +14,103 @@ router = APIRouter(
     dependencies=[Depends(validate_auth0_token)]
 )
 
-@router.get("/", status_code=status.HTTP_200_OK)
-async def listar_estanterias(db=Depends(get_db)) -> list[Estanteria]:
+
+async def buscar_estanteria(db, bodega_id: str, numero_estanteria: str, session=None) -> Tuple[bool, Optional[dict]]:
+    """
+    Lee de la bodega solo la estantería indicada con una proyección $elemMatch, sin traer
+    el resto del arreglo estanterias. Retorna si la bodega existe y la estantería (o None).
+    """
+    bodega = await db.bodegas.find_one(
+        {"_id": bodega_id},
+        {"estanterias": {"$elemMatch": {"_id": numero_estanteria}}},
+        session=session
+    )
+    if bodega is None:
+        return False, None
+    estanterias = bodega.get("estanterias", [])
+    return True, estanterias[0] if estanterias else None
+
+
+def _filtro_capacidad(bodega_id: str, numero_estanteria: str, cantidad: int) -> dict:
+    """
+    Filtro que solo coincide si la estantería existe y le caben cantidad unidades más
+    (capacidad_utilizada + cantidad <= capacidad_total). "estanterias._id" es la condición
+    que usa el operador posicional $ del update.
+    """
+    return {
+        "_id": bodega_id,
+        "estanterias._id": numero_estanteria,
+        "$expr": {"$anyElementTrue": [{"$map": {
+            "input": {"$ifNull": ["$estanterias", []]},
+            "in": {"$and": [
+                {"$eq": ["$$this._id", numero_estanteria]},
+                {"$lte": [{"$add": ["$$this.capacidad_utilizada", cantidad]}, "$$this.capacidad_total"]}
+            ]}
+        }}]}
+    }
+
+
+async def ocupar_estanteria(db, bodega_id: str, numero_estanteria: str, cantidad: int = 1, session=None) -> Optional[dict]:
+    """
+    Ocupa cantidad unidades de la estantería solo si caben y retorna la estantería ya
+    actualizada (proyección posicional). La existencia y la capacidad se comprueban en el
+    filtro del mismo update, así que inserciones concurrentes no pueden llenarla de más.
+    Retorna None si la bodega o la estantería no existen o si no caben; buscar_estanteria
+    indica el motivo.
+    """
+    bodega = await db.bodegas.find_one_and_update(
+        _filtro_capacidad(bodega_id, numero_estanteria, cantidad),
+        {"$inc": {"estanterias.$.capacidad_utilizada": cantidad}},
+        projection={"estanterias.$": 1},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    return bodega["estanterias"][0] if bodega else None
+
+
+async def ocupar_estanteria_lote(db, bodega_id: str, numero_estanteria: str, cantidad: int, session=None) -> int:
+    """
+    Variante por lotes: ocupa hasta cantidad unidades y retorna cuántas se ocuparon.
+    Si no caben todas, se ocupa el espacio libre que quede; cuando otra petición ocupa
+    espacio entre la lectura y el update, se reintenta con el espacio que quede.
+    """
+    while cantidad > 0:
+        if await ocupar_estanteria(db, bodega_id, numero_estanteria, cantidad, session=session):
+            return cantidad
+        _, estanteria = await buscar_estanteria(db, bodega_id, numero_estanteria, session=session)
+        if estanteria is None:
+            return 0
+        cantidad = min(cantidad, estanteria["capacidad_total"] - estanteria["capacidad_utilizada"])
+    return 0
+
+
+async def liberar_estanteria(db, bodega_id: str, numero_estanteria: str, cantidad: int = 1, session=None):
+    """
+    Libera cantidad unidades ocupadas de la estantería.
+    """
+    await db.bodegas.update_one(
+        {"_id": bodega_id, "estanterias._id": numero_estanteria},
+        {"$inc": {"estanterias.$.capacidad_utilizada": -cantidad}},
+        session=session
+    )
+
+@router.get("/", status_code=status.HTTP_200_OK, response_model=list[Estanteria])
+async def listar_estanterias(db=Depends(get_db)):
     """
     Lista todas las estanterías en la base de datos.
     """
     estanterias = db.bodegas.find({}, {"estanterias": 1})
     resultado = []
-    for bodega in estanterias:
-        for estanteria in bodega.get("estanterias", []):
-            resultado.append(Estanteria.model_validate(estanteria))
-    return resultado
+    async for bodega in estanterias:
+        resultado.extend(bodega.get("estanterias", []))
+    return respuesta_listado(Estanteria, resultado)
 
 @router.get("/{bodega_id}", status_code=status.HTTP_200_OK)
 async def obtener_estanterias_bodega(bodega_id: str, db=Depends(get_db)) -> list[Estanteria]:
     """
     Obtiene las estanterías de una bodega específica.
     """
-    bodega = db.bodegas.find_one({"_id": bodega_id})
+    bodega = await db.bodegas.find_one({"_id": bodega_id})
     if not bodega:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
     estanterias = bodega.get("estanterias", [])
@@ -38,13 +120,16 @@ async def obtener_estanterias_bodega(bodega_id: str, db=Depends(get_db)) -> list
 async def agregar_estanteria_bodega(bodega_id: str, estanteria: Estanteria, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Agrega una estantería a una bodega específica.
+    El número de estantería debe ser único dentro de la bodega; se verifica en el mismo update.
     """
-    resultado = db.bodegas.update_one(
-        {"_id": bodega_id},
+    resultado = await db.bodegas.update_one(
+        {"_id": bodega_id, "estanterias._id": {"$ne": estanteria.numero_estanteria}},
         {"$push": {"estanterias": estanteria.model_dump(by_alias=True)}}
     )
     if resultado.matched_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
+        if await db.bodegas.find_one({"_id": bodega_id}, {"_id": 1}) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La estantería ya existe en la bodega")
     
     enviar_evento_auditoria(
         user_id="system",
@@ -60,21 +145,19 @@ async def agregar_estanteria_bodega(bodega_id: str, estanteria: Estanteria, requ
 
 @router.get("/{bodega_id}/{numero_estanteria}", status_code=status.HTTP_200_OK)
 async def obtener_estanteria_bodega(bodega_id: str, numero_estanteria: str, db=Depends(get_db)) -> Estanteria:
-    bodega = db.bodegas.find_one({"_id": bodega_id})
-    if not bodega:
+    bodega_existe, estanteria = await buscar_estanteria(db, bodega_id, numero_estanteria)
+    if not bodega_existe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
-    estanterias = bodega.get("estanterias", [])
-    for estanteria in estanterias:
-        if estanteria["numero_estanteria"] == numero_estanteria:
-            return Estanteria.model_validate(estanteria)
-    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
+    if estanteria is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
+    return Estanteria.model_validate(estanteria)
 
 @router.put("/{bodega_id}/{numero_estanteria}", status_code=status.HTTP_200_OK)
 async def actualizar_estanteria_bodega(bodega_id: str, numero_estanteria: str, estanteria: Estanteria, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
     if estanteria.numero_estanteria != numero_estanteria:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No es posible cambiar el número de estantería")
     
-    resultado = db.bodegas.update_one(
+    resultado = await db.bodegas.update_one(
         {"_id": bodega_id, "estanterias._id": numero_estanteria},
         {"$set": {"estanterias.$": estanteria.model_dump(by_alias=True)}}
     )
@@ -95,18 +178,30 @@ async def actualizar_estanteria_bodega(bodega_id: str, numero_estanteria: str, e
 
 @router.delete("/{bodega_id}/{numero_estanteria}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_estanteria_bodega(bodega_id: str, numero_estanteria: str, request: Request, db=Depends(get_db)):
-    resultado = db.bodegas.update_one(
-        {"_id": bodega_id},
-        {"$pull": {"estanterias": {"_id": numero_estanteria}}}
-    )
-    # Eliminar items asociados a la estantería para mantener consistencia
-    db.itemsDisponibles.delete_many({"bodega_id": bodega_id, "estanteria_id": numero_estanteria})
-    db.items.delete_many({"bodega_id": bodega_id, "estanteria_id": numero_estanteria})
-    
-    if resultado.matched_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
-    if resultado.modified_count == 0:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
+    async def eliminar(session):
+        # Con items reservados no se elimina: al liberarlos volverían a una estantería que ya no existe
+        if await db.itemsReservados.find_one({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"_id": 1}, session=session):
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La estantería tiene items reservados")
+
+        resultado = await db.bodegas.update_one(
+            {"_id": bodega_id},
+            {"$pull": {"estanterias": {"_id": numero_estanteria}}},
+            session=session
+        )
+        if resultado.matched_count == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
+        if resultado.modified_count == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
+
+        # Eliminar items asociados a la estantería para mantener consistencia
+        filtro_items = {"bodega_id": bodega_id, "estanteria_id": numero_estanteria}
+        disponibles = await contar_disponibles_por_filtro(db, filtro_items, session=session)
+        await db.itemsDisponibles.delete_many(filtro_items, session=session)
+        await ajustar_disponibilidad(db, {clave: -cantidad for clave, cantidad in disponibles.items()}, session=session)
+        await db.items.delete_many(filtro_items, session=session)
+        return resultado
+
+    resultado = await en_transaccion(eliminar)
     
     enviar_evento_auditoria(
         user_id="system",
@@ -1,10 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
-from database.database import get_db
+import base64
+import json
+import os
+from collections import Counter
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from database.database import en_transaccion, get_db
 from models.item import Item
-from typing import Dict, Any
+from models.movimiento import MovimientoHistorico
+from models.disponibilidad import ConsultaDisponibilidad
+from models.lectura import respuesta_listado
+from models.proyeccion import modelo_parcial, proyeccion_mongo, resolver_campos
+from typing import Dict, Any, List, Literal, Optional
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from logic.logic_audit_producer import enviar_evento_auditoria
+from logic.logic_disponibilidad import ajustar_disponibilidad_items, cantidades_por_producto, obtener_disponibles
+from logic.logic_estanteria import buscar_estanteria, liberar_estanteria, ocupar_estanteria, ocupar_estanteria_lote
+from logic.logic_movimiento import construir_movimiento, embeber_movimiento, registrar_movimiento, registrar_movimientos
 from security.auth0 import validate_auth0_token
 
+# Máximo de items aceptados por POST /items/bulk
+ITEMS_BULK_MAX = int(os.environ.get("ITEMS_BULK_MAX", "10000"))
+# Intentos de una carga masiva cuando otra petición crea alguno de sus SKUs al mismo tiempo
+ITEMS_BULK_REINTENTOS = int(os.environ.get("ITEMS_BULK_REINTENTOS", "3"))
+# Cuántos SKUs de una carga masiva se incluyen en el evento de auditoría (además de la cantidad)
+ITEMS_BULK_SKUS_AUDITORIA = int(os.environ.get("ITEMS_BULK_SKUS_AUDITORIA", "20"))
+
+# Los items solo pasan a estado reservado a través de una reserva (logic_reserva)
+ERROR_ESTADO_RESERVADO = "Un item solo puede quedar reservado a través de una reserva"
+
 router = APIRouter(
     prefix="/items",
     tags=["Item"],
@@ -16,55 +42,100 @@ async def obtener_item(item_sku: str, db=Depends(get_db)) -> Item:
     """
     Obtiene un item identificado por su SKU.
     """
-    item = db.itemsDisponibles.find_one({"_id": item_sku})
+    item = await db.itemsDisponibles.find_one({"_id": item_sku})
     if not item:
-        item = db.items.find_one({"_id": item_sku})
+        item = await db.items.find_one({"_id": item_sku}) or await db.itemsReservados.find_one({"_id": item_sku})
         if not item:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
     return Item.model_validate(item)
 
+@router.get("/sku/{item_sku}/movimientos", status_code=status.HTTP_200_OK)
+async def obtener_movimientos_item(
+    item_sku: str,
+    cursor: Optional[str] = None,
+    limite: int = Query(default=50, ge=1, le=500),
+    db=Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Historial de movimientos de un item, del más reciente al más antiguo.
+    Para la siguiente página se envía como cursor el valor siguiente_cursor de la respuesta.
+    """
+    filtro = {"sku": item_sku}
+    if cursor:
+        try:
+            fecha, movimiento_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+            fecha = datetime.fromisoformat(fecha)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+        filtro["$or"] = [{"fecha": {"$lt": fecha}}, {"fecha": fecha, "_id": {"$lt": movimiento_id}}]
+
+    # Se lee un movimiento de más para saber si hay otra página sin responder un cursor a una página vacía
+    movimientos = await db.movimientos.find(filtro).sort([("fecha", -1), ("_id", -1)]).limit(limite + 1).to_list()
+    siguiente_cursor = None
+    if len(movimientos) > limite:
+        movimientos = movimientos[:limite]
+        ultimo = movimientos[-1]
+        siguiente_cursor = base64.urlsafe_b64encode(f"{ultimo['fecha'].isoformat()}|{ultimo['_id']}".encode()).decode()
+
+    return {
+        "movimientos": [MovimientoHistorico.model_validate(movimiento) for movimiento in movimientos],
+        "siguiente_cursor": siguiente_cursor,
+        "codigo": "EXITO"
+    }
+
 @router.post("/", status_code=status.HTTP_201_CREATED)
 async def crear_item(item: Item, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Crea un item nuevo en la base de datos.
     Ver el modelo ejemplo abajo
     """
-    # Validar que el SKU no existe
-    if db.items.find_one({"_id": item.sku}) or db.itemsDisponibles.find_one({"_id": item.sku}):
+    if item.estado == "reservado":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_ESTADO_RESERVADO)
+
+    async def crear(session):
+        # Validar que el SKU no existe en ninguna de las colecciones de items
+        for coleccion in (db.items, db.itemsDisponibles, db.itemsReservados):
+            if await coleccion.find_one({"_id": item.sku}, {"_id": 1}, session=session):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El item con este SKU ya existe")
+
+        # Validar que el producto existe
+        if await db.productos.find_one({"_id": item.producto_id}, session=session) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El producto asociado no existe")
+
+        # Un item disponible ocupa su espacio con un update condicional que comprueba a la vez que
+        # la estantería existe y que no está llena. Solo si no se pudo ocupar (o el item no está
+        # disponible) se lee la estantería para validar que existe o saber el motivo
+        estanteria = None
+        if item.estado == "disponible":
+            estanteria = await ocupar_estanteria(db, item.bodega_id, item.estanteria_id, session=session)
+        if estanteria is None:
+            bodega_existe, estanteria = await buscar_estanteria(db, item.bodega_id, item.estanteria_id, session=session)
+            if not bodega_existe:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La bodega asociada no existe")
+            if estanteria is None:
+                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La estantería asociada no existe")
+            if item.estado == "disponible":
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La estantería está llena")
+
+        # Crear el item
+        if item.estado == "disponible":
+            item_dict = item.model_dump(by_alias=True)
+            movimientos = embeber_movimiento([item_dict], "ingreso", "Ingreso del item a la estantería")
+            resultado = await db.itemsDisponibles.insert_one(item_dict, session=session)
+            await ajustar_disponibilidad_items(db, [item_dict], 1, session=session)
+        else:
+            item_dict = item.model_dump(by_alias=True)
+            movimientos = embeber_movimiento([item_dict], "ingreso", f"Ingreso del item en estado {item.estado}")
+            resultado = await db.items.insert_one(item_dict, session=session)
+        await registrar_movimientos(db, movimientos, session=session)
+        return resultado
+
+    # Las validaciones, la capacidad de la estantería, el item y los contadores se escriben en una sola transacción
+    try:
+        resultado = await en_transaccion(crear)
+    except DuplicateKeyError:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El item con este SKU ya existe")
-    
-    # Validar que el producto existe
-    if db.productos.find_one({"_id": item.producto_id}) is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="El producto asociado no existe")
-    
-    # Validar que la bodega existe
-    bodega = db.bodegas.find_one({"_id": item.bodega_id})
-    if bodega is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La bodega asociada no existe")
-    
-    # Validar que la estantería existe dentro de la bodega
-    estanteria_encontrada = None
-    for estanteria in bodega.get("estanterias", []):
-        if estanteria["_id"] == item.estanteria_id:
-            estanteria_encontrada = estanteria
-    
-    if not estanteria_encontrada:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="La estantería asociada no existe")
-    
-    # Crear el item
-    if item.estado == "disponible":
-        # Incrementar el contador de items disponibles en el producto
-        db.productos.update_one({"_id": item.producto_id}, {"$inc": {"cantidad_items_disponibles": 1}})
-        if estanteria_encontrada["capacidad_utilizada"] >= estanteria_encontrada["capacidad_total"]:
-            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="La estantería está llena")
-        db.bodegas.update_one(
-            {"_id": item.bodega_id, "estanterias._id": item.estanteria_id},
-            {"$inc": {"estanterias.$.capacidad_utilizada": 1}}
-        )
-        resultado = db.itemsDisponibles.insert_one(item.model_dump(by_alias=True))
-    else:
-        resultado = db.items.insert_one(item.model_dump(by_alias=True))
-    
+
     enviar_evento_auditoria(
         user_id="system",
         action="CREATE",
@@ -77,14 +148,208 @@ async def crear_item(item: Item, request: Request, db=Depends(get_db)) -> Dict[s
     
     return {"item_creado": resultado.acknowledged, "codigo": "EXITO", "id_item": str(resultado.inserted_id)}
 
+@router.post("/bulk", status_code=status.HTTP_201_CREATED)
+async def crear_items_bulk(filas: List[Dict[str, Any]], request: Request, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Crea muchos items en una sola petición (recepción de mercancía en bodega).
+
+    Valida todas las filas contra los productos, bodegas, estanterías y SKUs existentes
+    cargados en una consulta por colección, ocupa el espacio de cada estantería con un update
+    condicional por estantería, inserta con un insert_many por colección y actualiza los
+    contadores de disponibilidad con incrementos agregados, todo en una sola transacción.
+    Las filas inválidas no se insertan y se reportan con su posición y el motivo.
+    """
+    if len(filas) > ITEMS_BULK_MAX:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Se permiten máximo {ITEMS_BULK_MAX} items por petición"
+        )
+
+    errores = []
+    items = []
+    for fila, datos in enumerate(filas):
+        try:
+            items.append((fila, Item.model_validate(datos)))
+        except ValidationError as e:
+            errores.append({"fila": fila, "sku": datos.get("_id", datos.get("sku")), "error": str(e)})
+
+    async def cargar(session):
+        # with_transaction puede reintentar esta función completa: el estado se arma desde cero
+        errores_carga = list(errores)
+        skus = [item.sku for _, item in items]
+        productos_ids = list({item.producto_id for _, item in items})
+        bodegas_ids = list({item.bodega_id for _, item in items})
+
+        skus_existentes = set()
+        for coleccion in (db.items, db.itemsDisponibles, db.itemsReservados):
+            skus_existentes.update([
+                doc["_id"] async for doc in coleccion.find({"_id": {"$in": skus}}, {"_id": 1}, session=session)
+            ])
+        productos_existentes = {
+            doc["_id"] async for doc in db.productos.find({"_id": {"$in": productos_ids}}, {"_id": 1}, session=session)
+        }
+        # Ocupación de cada estantería: (bodega, estanteria) -> [capacidad_utilizada, capacidad_total]
+        ocupacion = {}
+        bodegas_existentes = set()
+        estanterias_ids = list({item.estanteria_id for _, item in items})
+        # De cada bodega solo se traen las estanterías usadas por las filas
+        bodegas = await db.bodegas.aggregate([
+            {"$match": {"_id": {"$in": bodegas_ids}}},
+            {"$project": {"estanterias": {"$filter": {
+                "input": {"$ifNull": ["$estanterias", []]},
+                "cond": {"$in": ["$$this._id", estanterias_ids]}
+            }}}}
+        ], session=session)
+        async for bodega in bodegas:
+            bodegas_existentes.add(bodega["_id"])
+            for estanteria in bodega.get("estanterias", []):
+                ocupacion[(bodega["_id"], estanteria["_id"])] = [estanteria["capacidad_utilizada"], estanteria["capacidad_total"]]
+
+        validos = {"disponibles": [], "otros": []}
+        filas_por_sku = {}
+        for fila, item in items:
+            error = None
+            estanteria = ocupacion.get((item.bodega_id, item.estanteria_id))
+            if item.estado == "reservado":
+                error = ERROR_ESTADO_RESERVADO
+            elif item.sku in skus_existentes or item.sku in filas_por_sku:
+                error = "El item con este SKU ya existe"
+            elif item.producto_id not in productos_existentes:
+                error = "El producto asociado no existe"
+            elif item.bodega_id not in bodegas_existentes:
+                error = "La bodega asociada no existe"
+            elif estanteria is None:
+                error = "La estantería asociada no existe"
+            elif item.estado == "disponible" and estanteria[0] >= estanteria[1]:
+                error = "La estantería está llena"
+            if error:
+                errores_carga.append({"fila": fila, "sku": item.sku, "error": error})
+                continue
+
+            filas_por_sku[item.sku] = fila
+            if item.estado == "disponible":
+                estanteria[0] += 1
+                validos["disponibles"].append(item.model_dump(by_alias=True))
+            else:
+                validos["otros"].append(item.model_dump(by_alias=True))
+
+        movimientos = {
+            movimiento["sku"]: movimiento
+            for documentos in validos.values()
+            for movimiento in embeber_movimiento(documentos, "ingreso", "Ingreso por carga masiva")
+        }
+
+        # Ocupar el espacio de cada estantería con un update condicional por estantería. Si otra
+        # petición la llenó después de la lectura anterior, las filas que ya no caben no se insertan
+        por_estanteria = {}
+        for documento in validos["disponibles"]:
+            por_estanteria.setdefault((documento["bodega_id"], documento["estanteria_id"]), []).append(documento)
+        ocupados = {}
+        validos["disponibles"] = []
+        for (bodega_id, estanteria_id), documentos in por_estanteria.items():
+            ocupados[(bodega_id, estanteria_id)] = await ocupar_estanteria_lote(
+                db, bodega_id, estanteria_id, len(documentos), session=session
+            )
+            validos["disponibles"].extend(documentos[:ocupados[(bodega_id, estanteria_id)]])
+            for documento in documentos[ocupados[(bodega_id, estanteria_id)]:]:
+                errores_carga.append({"fila": filas_por_sku[documento["_id"]], "sku": documento["_id"], "error": "La estantería está llena"})
+
+        # Insertar; si otra petición insertó un SKU entretanto, esa fila se reporta como error
+        insertados = {}
+        for clave, coleccion in (("disponibles", db.itemsDisponibles), ("otros", db.items)):
+            documentos = validos[clave]
+            fallidos = set()
+            if documentos:
+                try:
+                    await coleccion.insert_many(documentos, ordered=False, session=session)
+                except BulkWriteError as e:
+                    # Dentro de una transacción el error la aborta: se reintenta la carga completa
+                    if session is not None:
+                        raise
+                    for error in e.details["writeErrors"]:
+                        sku = documentos[error["index"]]["_id"]
+                        fallidos.add(sku)
+                        mensaje = "El item con este SKU ya existe" if error["code"] == 11000 else error["errmsg"]
+                        errores_carga.append({"fila": filas_por_sku[sku], "sku": sku, "error": mensaje})
+            insertados[clave] = [doc for doc in documentos if doc["_id"] not in fallidos]
+
+        # Devolver el espacio ocupado por filas que no se pudieron insertar
+        capacidad = Counter((doc["bodega_id"], doc["estanteria_id"]) for doc in insertados["disponibles"])
+        for (bodega_id, estanteria_id), cantidad in ocupados.items():
+            if cantidad > capacidad[(bodega_id, estanteria_id)]:
+                await liberar_estanteria(db, bodega_id, estanteria_id, cantidad - capacidad[(bodega_id, estanteria_id)], session=session)
+        await ajustar_disponibilidad_items(db, insertados["disponibles"], 1, session=session)
+
+        creados = [doc["_id"] for docs in insertados.values() for doc in docs]
+        await registrar_movimientos(db, [movimientos[sku] for sku in creados], session=session)
+        bodegas_creadas = sorted({doc["bodega_id"] for docs in insertados.values() for doc in docs})
+        return creados, bodegas_creadas, errores_carga
+
+    # La capacidad de las estanterías, los items, los contadores y los movimientos se escriben en una
+    # sola transacción. Si otra petición insertó uno de los SKUs entre la validación y el insert, la
+    # transacción se aborta y la carga se repite: en el nuevo intento esa fila se reporta como error
+    for intento in range(ITEMS_BULK_REINTENTOS):
+        try:
+            creados, bodegas_creadas, errores = await en_transaccion(cargar)
+            break
+        except BulkWriteError:
+            if intento == ITEMS_BULK_REINTENTOS - 1:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Los SKUs de la carga se están creando en otra petición; intente de nuevo"
+                )
+
+    if creados:
+        enviar_evento_auditoria(
+            user_id="system",
+            action="CREATE",
+            description=f"Carga masiva de items: {len(creados)} creados, {len(errores)} con error",
+            entity="ITEM",
+            entity_id=f"bulk-{len(creados)}",
+            metadata={
+                "cantidad": len(creados),
+                "skus": creados[:ITEMS_BULK_SKUS_AUDITORIA],
+                "bodegas": bodegas_creadas,
+                "errores": len(errores),
+            },
+            ip=request.client.host
+        )
+
+    errores.sort(key=lambda error: error["fila"])
+    return {
+        "items_creados": len(creados),
+        "errores": errores,
+        "codigo": "EXITO" if not errores else ("PARCIAL" if creados else "ERROR")
+    }
+
 @router.put("/sku/{item_sku}", status_code=status.HTTP_200_OK)
 async def actualizar_item(item_sku: str, item: Item, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Actualiza un item identificado por su SKU.
     """
-    resultado = db.items.update_one({"_id": item_sku}, {"$set": item.model_dump(by_alias=True)})
-    if resultado.matched_count == 0:
+    if item.estado == "reservado":
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=ERROR_ESTADO_RESERVADO)
+    # Los movimientos recientes solo se modifican al registrar movimientos
+    anterior = await db.items.find_one_and_update(
+        {"_id": item_sku},
+        {"$set": item.model_dump(by_alias=True, exclude={"movimientos_recientes"})}
+    )
+    if anterior is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
+
+    movimientos = []
+    if anterior.get("estado") != item.estado:
+        movimientos.append(construir_movimiento(
+            item_sku, "estado", f"Estado cambiado de {anterior.get('estado')} a {item.estado}",
+            bodega_id=item.bodega_id, estanteria_id=item.estanteria_id
+        ))
+    if (anterior.get("bodega_id"), anterior.get("estanteria_id")) != (item.bodega_id, item.estanteria_id):
+        movimientos.append(construir_movimiento(
+            item_sku, "ubicacion",
+            f"Ubicación cambiada de {anterior.get('bodega_id')}/{anterior.get('estanteria_id')} a {item.bodega_id}/{item.estanteria_id}",
+            bodega_id=item.bodega_id, estanteria_id=item.estanteria_id
+        ))
+    await registrar_movimientos(db, movimientos, coleccion="items")
     
     enviar_evento_auditoria(
         user_id="system",
@@ -96,26 +361,40 @@ async def actualizar_item(item_sku: str, item: Item, request: Request, db=Depend
         ip=request.client.host
     )
     
-    return {"item_actualizado": resultado.acknowledged, "codigo": "EXITO"}
+    return {"item_actualizado": True, "codigo": "EXITO"}
 
 @router.delete("/sku/{item_sku}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_item(item_sku: str, request: Request, db=Depends(get_db)):
-    # Obtener el item antes de eliminarlo
-    item = db.items.find_one({"_id": item_sku})
-    
-    # Si no está en items, buscar en itemsDisponibles
-    if not item:
-        item = db.itemsDisponibles.find_one({"_id": item_sku})
+    async def eliminar(session):
+        # Si no está en items, buscar en itemsDisponibles
+        item = await db.items.find_one_and_delete({"_id": item_sku}, session=session)
+        if item:
+            await registrar_movimiento(
+                db, item_sku, "salida", "Item eliminado",
+                bodega_id=item.get("bodega_id"), estanteria_id=item.get("estanteria_id"), session=session
+            )
+            return True
+        item = await db.itemsDisponibles.find_one_and_delete({"_id": item_sku}, session=session)
         if not item:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
-        # Eliminar de itemsDisponibles
-        db.itemsDisponibles.delete_one({"_id": item_sku})
-        # Decrementar el contador de items disponibles
-        db.productos.update_one({"_id": item["producto_id"]}, {"$inc": {"cantidad_items_disponibles": -1}})
-    else:
-        # Eliminar de items
-        db.items.delete_one({"_id": item_sku})
-    
+            # Un item reservado pertenece a una reserva: sale de inventario al liberarla o despacharla
+            if await db.itemsReservados.find_one({"_id": item_sku}, {"_id": 1}, session=session):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="El item está reservado; libere o despache su reserva"
+                )
+            return False
+        await registrar_movimiento(
+            db, item_sku, "salida", "Item eliminado de la estantería",
+            bodega_id=item["bodega_id"], estanteria_id=item["estanteria_id"], session=session
+        )
+        # Liberar su espacio en la estantería y descontarlo de los contadores de disponibilidad
+        await liberar_estanteria(db, item["bodega_id"], item["estanteria_id"], session=session)
+        await ajustar_disponibilidad_items(db, [item], -1, session=session)
+        return True
+
+    if not await en_transaccion(eliminar):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
+
     enviar_evento_auditoria(
         user_id="system",
         action="DELETE",
@@ -127,11 +406,59 @@ async def eliminar_item(item_sku: str, request: Request, db=Depends(get_db)):
 
 
 @router.get("/", status_code=status.HTTP_200_OK)
-async def listar_items(db=Depends(get_db)) -> list[Item]:
-    items = db.items.find()
-    items_disponibles = db.itemsDisponibles.find()
-    items = list(items) + list(items_disponibles)
-    return [Item.model_validate(item) for item in items]
+async def listar_items(
+    formato: Literal["json", "ndjson"] = "json",
+    saltar: int = Query(default=0, ge=0),
+    limite: Optional[int] = Query(default=None, ge=1),
+    tamano_lote: int = Query(default=500, ge=1, le=10000),
+    incluir_movimientos: bool = True,
+    fields: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    Lista los items (no disponibles, disponibles y reservados) de todas las bodegas.
+    Con saltar y limite se obtiene una página del listado, ordenado por SKU.
+    Con formato=ndjson la respuesta se transmite un item por línea a medida que se
+    leen los cursores, sin cargar el listado completo en memoria.
+    Con fields (por ejemplo fields=_id,estado,bodega_id) MongoDB solo retorna esos
+    campos y la respuesta se valida con un modelo que contiene únicamente esos campos.
+    """
+    try:
+        campos = resolver_campos(Item, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    pipeline = [{"$unionWith": {"coll": "itemsDisponibles"}}, {"$unionWith": {"coll": "itemsReservados"}}]
+    paginado = bool(saltar) or limite is not None
+    if paginado:
+        if limite is not None:
+            # Cada colección aporta, recorriendo su índice de _id, solo sus primeros saltar + limite
+            # items; así el $sort de la unión ordena a lo sumo tres veces esa cantidad y no todo el listado
+            primeros = [{"$sort": {"_id": 1}}, {"$limit": saltar + limite}]
+            pipeline = primeros + [
+                {"$unionWith": {"coll": coleccion, "pipeline": primeros}}
+                for coleccion in ("itemsDisponibles", "itemsReservados")
+            ]
+        # Sin un orden estable las páginas pueden repetir u omitir items
+        pipeline.append({"$sort": {"_id": 1}})
+    if saltar:
+        pipeline.append({"$skip": saltar})
+    if limite is not None:
+        pipeline.append({"$limit": limite})
+    if campos is not None:
+        pipeline.append({"$project": proyeccion_mongo(Item, campos)})
+    elif not incluir_movimientos:
+        pipeline.append({"$project": {"movimientos_recientes": 0}})
+    cursor = await db.items.aggregate(pipeline, batchSize=tamano_lote, allowDiskUse=paginado)
+
+    if formato == "ndjson":
+        async def generar_items():
+            async for item in cursor:
+                yield json.dumps(jsonable_encoder(item)) + "\n"
+        return StreamingResponse(generar_items(), media_type="application/x-ndjson")
+
+    modelo = Item if campos is None else modelo_parcial(Item, campos)
+    return respuesta_listado(modelo, await cursor.to_list())
 
 @router.get("/productoBodega", status_code=status.HTTP_200_OK)
 async def obtener_items_producto_bodega(codigo_barras: str, bodega_id: str, db=Depends(get_db)) -> Dict[str, Any]:
@@ -139,78 +466,102 @@ async def obtener_items_producto_bodega(codigo_barras: str, bodega_id: str, db=D
     Obtiene todos los items asociados a un producto identificado por su código de barras y a una bodega.
     """
     # Verificar si el producto existe
-    producto = db.productos.find_one({"_id": codigo_barras})
+    producto = await db.productos.find_one({"_id": codigo_barras})
     if not producto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
-    bodega = db.bodegas.find_one({"_id": bodega_id})
+    bodega = await db.bodegas.find_one({"_id": bodega_id})
     if not bodega:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
     
-    items = db.items.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    items_disponibles = db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    items = list(items) + list(items_disponibles)
+    items = await db.items.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items_disponibles = await db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items_reservados = await db.itemsReservados.find({"producto_id": codigo_barras, "bodega_id": bodega_id}).to_list()
+    items = items + items_disponibles + items_reservados
     return {"items": items, "codigo": "EXITO"}
 
 @router.get("/itemsDisponibles", status_code=status.HTTP_200_OK)
-async def obtener_items_disponibles_producto_bodega(codigo_barras: str, bodega_id: str, db=Depends(get_db)) -> Dict[str, Any]:
+async def obtener_items_disponibles_producto_bodega(codigo_barras: str, bodega_id: str, solo_conteo: bool = False, minimo: Optional[int] = None, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Obtiene todos los items disponibles para un pedido que están
     asociados a un producto identificado por su código de barras.
+    Con solo_conteo=true retorna únicamente la cantidad de items disponibles, leída del
+    contador de disponibilidad; si además se envía minimo, indica si la cantidad es suficiente.
+    También se expone como /bodegas/itemsDisponibles.
     """
     # Verificar si el producto existe
-    producto = db.productos.find_one({"_id": codigo_barras})
+    producto = await db.productos.find_one({"_id": codigo_barras})
     if not producto:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Producto no encontrado")
 
-    items_disponibles = db.itemsDisponibles.find({"producto_id": codigo_barras, "bodega_id": bodega_id})
-    return {"items_disponibles": list(items_disponibles), "codigo": "EXITO"}
+    filtro = {"producto_id": codigo_barras, "bodega_id": bodega_id}
+    if solo_conteo:
+        cantidad = (await obtener_disponibles(db, bodega_id, [codigo_barras]))[codigo_barras]
+        if minimo is not None and minimo > 0:
+            return {"cantidad_disponible": cantidad, "suficiente": cantidad >= minimo, "codigo": "EXITO"}
+        return {"cantidad_disponible": cantidad, "codigo": "EXITO"}
+
+    items_disponibles = await db.itemsDisponibles.find(filtro).to_list()
+    return {"items_disponibles": items_disponibles, "codigo": "EXITO"}
+
+@router.post("/disponibilidad", status_code=status.HTTP_200_OK)
+async def consultar_disponibilidad_productos(consulta: ConsultaDisponibilidad, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Verifica en una sola llamada la existencia y la cantidad de items disponibles
+    de varios productos en una bodega. Pensado para validar pedidos completos.
+    Si un producto aparece en varias líneas, suficiente compara la suma de sus cantidades.
+    """
+    # Varias líneas del mismo producto se comparan con los disponibles como una sola
+    cantidades = cantidades_por_producto(consulta.productos)
+    codigos = list(cantidades)
+
+    existentes = {producto["_id"] async for producto in db.productos.find({"_id": {"$in": codigos}}, {"_id": 1})}
+
+    disponibles_por_producto = await obtener_disponibles(db, consulta.bodega_id, codigos)
+
+    productos = []
+    for producto in consulta.productos:
+        disponibles = disponibles_por_producto.get(producto.codigo_barras, 0)
+        productos.append({
+            "codigo_barras": producto.codigo_barras,
+            "existe": producto.codigo_barras in existentes,
+            "cantidad_solicitada": producto.cantidad,
+            "cantidad_total_solicitada": cantidades[producto.codigo_barras],
+            "disponibles": disponibles,
+            "suficiente": disponibles >= cantidades[producto.codigo_barras]
+        })
+    return {"bodega_id": consulta.bodega_id, "productos": productos, "codigo": "EXITO"}
 
 @router.get("/estanteria/disponibles", status_code=status.HTTP_200_OK)
 async def obtener_items_estanteria_disponibles(bodega_id: str, numero_estanteria: str, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Obtiene todos los items disponibles en una estantería específica dentro de una bodega.
     """
-    # Verificar si la bodega existe
-    bodega = db.bodegas.find_one({"_id": bodega_id})
-    if not bodega:
+    # Verificar que la bodega y la estantería existen, leyendo de la bodega solo esa estantería
+    bodega_existe, estanteria = await buscar_estanteria(db, bodega_id, numero_estanteria)
+    if not bodega_existe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
-    
-    # Verificar si la estantería existe dentro de la bodega
-    estanteria_existe = False
-    for estanteria in bodega.get("estanterias", []):
-        if estanteria["_id"] == numero_estanteria:
-            estanteria_existe = True
-            break
-    
-    if not estanteria_existe:
+    if estanteria is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
     
     # Obtener los items disponibles en la estantería
-    items_disponibles = db.itemsDisponibles.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0})
-    return {"items_disponibles": list(items_disponibles), "codigo": "EXITO"}
+    items_disponibles = await db.itemsDisponibles.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0}).to_list()
+    return {"items_disponibles": items_disponibles, "codigo": "EXITO"}
 
 @router.get("/estanteria/todos", status_code=status.HTTP_200_OK)
 async def obtener_items_estanteria_todos(bodega_id: str, numero_estanteria: str, db=Depends(get_db)) -> Dict[str, Any]:
     """
     Obtiene todos los items (disponibles y no disponibles) en una estantería específica dentro de una bodega.
     """
-    # Verificar si la bodega existe
-    bodega = db.bodegas.find_one({"_id": bodega_id})
-    if not bodega:
+    # Verificar que la bodega y la estantería existen, leyendo de la bodega solo esa estantería
+    bodega_existe, estanteria = await buscar_estanteria(db, bodega_id, numero_estanteria)
+    if not bodega_existe:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Bodega no encontrada")
-    
-    # Verificar si la estantería existe dentro de la bodega
-    estanteria_existe = False
-    for estanteria in bodega.get("estanterias", []):
-        if estanteria["_id"] == numero_estanteria:
-            estanteria_existe = True
-            break
-    
-    if not estanteria_existe:
+    if estanteria is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Estantería no encontrada")
     
     # Obtener todos los items en la estantería
-    items = db.items.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0})
-    items_disponibles = db.itemsDisponibles.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0})
-    items = list(items) + list(items_disponibles)
+    items = await db.items.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0}).to_list()
+    items_disponibles = await db.itemsDisponibles.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0}).to_list()
+    items_reservados = await db.itemsReservados.find({"bodega_id": bodega_id, "estanteria_id": numero_estanteria}, {"estanteria_id":0, "bodega_id":0}).to_list()
+    items = items + items_disponibles + items_reservados
     return {"items": items, "codigo": "EXITO"}
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Historial de movimientos de los items.
+
+Cada movimiento se guarda en la colección movimientos (indexada por SKU y fecha) y
+los últimos MOVIMIENTOS_RECIENTES_MAX se mantienen embebidos en el item con $push y
+$slice, de modo que leer un item nunca arrastra su historial completo.
+"""
+import os
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from models.movimiento import MovimientoHistorico, MovimientoReciente
+
+MOVIMIENTOS_RECIENTES_MAX = int(os.environ.get("MOVIMIENTOS_RECIENTES_MAX", "10"))
+
+
+def construir_movimiento(sku: str, tipo: str, descripcion: str, usuario_id: str = "system",
+                         bodega_id: Optional[str] = None, estanteria_id: Optional[str] = None) -> dict:
+    return MovimientoHistorico(
+        _id=str(ObjectId()),
+        sku=sku,
+        tipo=tipo,
+        fecha=datetime.now(),
+        descripcion=descripcion,
+        usuario_id=usuario_id,
+        bodega_id=bodega_id,
+        estanteria_id=estanteria_id,
+    ).model_dump(by_alias=True)
+
+
+def movimiento_reciente(movimiento: dict) -> dict:
+    """
+    Versión ligera del movimiento que se embebe en el item.
+    """
+    return MovimientoReciente.model_validate(movimiento).model_dump()
+
+
+async def registrar_movimientos(db, movimientos: List[dict], coleccion: Optional[str] = None, session=None):
+    """
+    Guarda los movimientos en el historial y, si se indica la colección donde está el
+    item, agrega cada uno a sus movimientos recientes conservando solo los últimos.
+    """
+    if not movimientos:
+        return
+    await db.movimientos.insert_many(movimientos, session=session)
+    if coleccion:
+        await db[coleccion].bulk_write([
+            UpdateOne(
+                {"_id": movimiento["sku"]},
+                {"$push": {"movimientos_recientes": {
+                    "$each": [movimiento_reciente(movimiento)],
+                    "$slice": -MOVIMIENTOS_RECIENTES_MAX
+                }}}
+            )
+            for movimiento in movimientos
+        ], ordered=True, session=session)
+
+
+async def registrar_movimiento(db, sku: str, tipo: str, descripcion: str, coleccion: Optional[str] = None,
+                               bodega_id: Optional[str] = None, estanteria_id: Optional[str] = None,
+                               usuario_id: str = "system", session=None):
+    await registrar_movimientos(
+        db,
+        [construir_movimiento(sku, tipo, descripcion, usuario_id, bodega_id, estanteria_id)],
+        coleccion,
+        session=session
+    )
+
+
+def embeber_movimiento(documentos: Iterable[dict], tipo: str, descripcion: str) -> List[dict]:
+    """
+    Crea un movimiento por documento de item aún no insertado y lo deja embebido en él.
+    Retorna los movimientos para guardarlos en el historial.
+    """
+    movimientos = []
+    for documento in documentos:
+        movimiento = construir_movimiento(
+            documento["_id"], tipo, descripcion,
+            bodega_id=documento.get("bodega_id"), estanteria_id=documento.get("estanteria_id")
+        )
+        documento["movimientos_recientes"] = (
+            documento.get("movimientos_recientes", []) + [movimiento_reciente(movimiento)]
+        )[-MOVIMIENTOS_RECIENTES_MAX:]
+        movimientos.append(movimiento)
+    return movimientos
+
+
+async def recortar_movimientos_recientes(db) -> int:
+    """
+    Deja solo los últimos MOVIMIENTOS_RECIENTES_MAX movimientos embebidos en los items
+    guardados antes de limitar la lista. Retorna la cantidad de items modificados.
+    """
+    filtro = {f"movimientos_recientes.{MOVIMIENTOS_RECIENTES_MAX}": {"$exists": True}}
+    recorte = [{"$set": {"movimientos_recientes": {"$slice": ["$movimientos_recientes", -MOVIMIENTOS_RECIENTES_MAX]}}}]
+    modificados = 0
+    for coleccion in ("items", "itemsDisponibles", "itemsReservados"):
+        resultado = await db[coleccion].update_many(filtro, recorte)
+        modificados += resultado.modified_count
+    return modificados
@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends, Request
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from database.database import get_db
 from models.producto import Producto
+from models.lectura import respuesta_listado
+from models.proyeccion import modelo_parcial, proyeccion_mongo, resolver_campos
 from models.item import Item
 from logic.logic_audit_producer import enviar_evento_auditoria
 from security.auth0 import validate_auth0_token
@@ -11,16 +14,23 @@ router = APIRouter(
     dependencies=[Depends(validate_auth0_token)]
 )
 
-@router.get("/")
-async def listar_productos(db=Depends(get_db)) -> list[Producto]:
+@router.get("/", response_model=list[Producto])
+async def listar_productos(fields: Optional[str] = None, db=Depends(get_db)):
     """
     Lista todos los productos en la base de datos, excluyendo los items asociados.
+    Con fields (por ejemplo fields=_id,nombre) solo se leen y retornan esos campos.
     """
-    productos = db.productos.find({})
-    resultado = []
-    for producto in productos:
-        resultado.append(Producto.model_validate(producto))
-    return resultado
+    try:
+        campos = resolver_campos(Producto, fields)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if campos is None:
+        productos = await db.productos.find({}).to_list()
+        modelo = Producto
+    else:
+        productos = await db.productos.find({}, proyeccion_mongo(Producto, campos)).to_list()
+        modelo = modelo_parcial(Producto, campos)
+    return respuesta_listado(modelo, productos)
 
 @router.post("/")
 async def crear_producto(producto: Producto, request: Request, db=Depends(get_db)):
@@ -29,10 +39,10 @@ async def crear_producto(producto: Producto, request: Request, db=Depends(get_db
     Se basa en el código de barras para verificar si el producto ya existe.
     Ver el modelo ejemplo abajo
     """
-    if db.productos.find_one({"_id": producto.codigo_barras}):
+    if await db.productos.find_one({"_id": producto.codigo_barras}):
         return {"message": "El producto con este código de barras ya existe", "codigo": "ERROR"}
     
-    resultado = db.productos.insert_one(producto.model_dump(by_alias=True))
+    resultado = await db.productos.insert_one(producto.model_dump(by_alias=True))
     
     enviar_evento_auditoria(
         user_id="system",
@@ -51,7 +61,7 @@ async def actualizar_producto(codigo_barras: str, producto: Producto, request: R
     """
     Actualiza un producto identificado por su código de barras.
     """
-    resultado = db.productos.update_one({"_id": codigo_barras}, {"$set": producto.model_dump()})
+    resultado = await db.productos.update_one({"_id": codigo_barras}, {"$set": producto.model_dump()})
     if resultado.matched_count == 0:
         return {"message": "Producto no encontrado", "codigo": "ERROR"}
     
@@ -72,7 +82,7 @@ async def eliminar_producto(codigo_barras: str, request: Request, db=Depends(get
     """
     Elimina un producto identificado por su código de barras.
     """
-    resultado = db.productos.delete_one({"_id": codigo_barras})
+    resultado = await db.productos.delete_one({"_id": codigo_barras})
     if resultado.deleted_count == 0:
         return {"message": "Producto no encontrado", "codigo": "ERROR"}
     
@@ -92,7 +102,7 @@ async def obtener_producto(codigo_barras: str, db=Depends(get_db)):
     """
     Obtiene un producto identificado por su código de barras.
     """
-    producto = db.productos.find_one({"_id": codigo_barras})
+    producto = await db.productos.find_one({"_id": codigo_barras})
     if not producto:
         return {"message": "Producto no encontrado", "codigo": "ERROR"}
     return producto
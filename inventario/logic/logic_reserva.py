@@ -0,0 +1,277 @@
+import asyncio
+import os
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pymongo.errors import BulkWriteError
+
+from database.database import db as base_datos, en_transaccion, get_db
+from logic.logic_audit_producer import enviar_evento_auditoria
+from logic.logic_disponibilidad import ajustar_disponibilidad_items, cantidades_por_producto
+from logic.logic_estanteria import liberar_estanteria
+from logic.logic_movimiento import embeber_movimiento, registrar_movimientos
+from models.reserva import ConfirmacionReserva, SolicitudReserva
+from security.auth0 import validate_auth0_token
+
+# Tiempo por defecto que se mantiene una reserva sin confirmar, el máximo que puede pedir un
+# cliente y cada cuánto se liberan las vencidas
+RESERVA_TTL_SEGUNDOS = int(os.environ.get("RESERVA_TTL_SEGUNDOS", "120"))
+RESERVA_TTL_MAX_SEGUNDOS = int(os.environ.get("RESERVA_TTL_MAX_SEGUNDOS", "900"))
+RESERVA_BARRIDO_SEGUNDOS = float(os.environ.get("RESERVA_BARRIDO_SEGUNDOS", "30"))
+
+router = APIRouter(
+    prefix="/reservas",
+    tags=["Reserva"],
+    dependencies=[Depends(validate_auth0_token)]
+)
+
+
+async def _devolver_a_disponibles(db, items: List[dict], session=None):
+    """
+    Devuelve a itemsDisponibles items tomados por una reserva.
+    Los que ya estén en itemsDisponibles se omiten y los contadores de disponibilidad
+    solo se ajustan con los items que realmente se insertaron.
+    """
+    if not items:
+        return
+    existentes = {
+        item["_id"] async for item in db.itemsDisponibles.find(
+            {"_id": {"$in": [item["_id"] for item in items]}}, {"_id": 1}, session=session
+        )
+    }
+    items = [item for item in items if item["_id"] not in existentes]
+    if not items:
+        return
+    for item in items:
+        item["estado"] = "disponible"
+        item.pop("reserva_id", None)
+    movimientos = embeber_movimiento(items, "estado", "Reserva liberada, el item vuelve a estar disponible")
+    try:
+        await db.itemsDisponibles.insert_many(items, ordered=False, session=session)
+        insertados = items
+    except BulkWriteError as e:
+        # Solo sin transacciones: otra operación devolvió el mismo item entretanto
+        if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+            raise
+        fallidos = {error["index"] for error in e.details["writeErrors"]}
+        insertados = [item for indice, item in enumerate(items) if indice not in fallidos]
+    await ajustar_disponibilidad_items(db, insertados, 1, session=session)
+    skus_insertados = {item["_id"] for item in insertados}
+    await registrar_movimientos(db, [m for m in movimientos if m["sku"] in skus_insertados], session=session)
+
+
+async def _liberar_reserva(db, reserva_id: str, filtro_extra: dict = None) -> bool:
+    """
+    Marca la reserva como liberada y devuelve sus items a itemsDisponibles, todo en una
+    transacción. El cambio de estado es condicional, así que una reserva solo se libera
+    (o confirma) una vez.
+    """
+    async def liberar(session):
+        filtro = {"_id": reserva_id, "estado": "pendiente", **(filtro_extra or {})}
+        reserva = await db.reservas.find_one_and_update(filtro, {"$set": {"estado": "liberada"}}, session=session)
+        if reserva is None:
+            return False
+        items = await db.itemsReservados.find({"reserva_id": reserva_id}, session=session).to_list()
+        await _devolver_a_disponibles(db, items, session=session)
+        await db.itemsReservados.delete_many({"reserva_id": reserva_id}, session=session)
+        return True
+
+    return await en_transaccion(liberar)
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED)
+async def crear_reserva(solicitud: SolicitudReserva, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Reserva items disponibles de cada producto solicitado en la bodega y retorna sus SKUs.
+
+    La reserva completa se ejecuta en una transacción: se leen los items de cada producto,
+    se eliminan de itemsDisponibles, se insertan en itemsReservados y se ajustan los
+    contadores. Si otra reserva toma los mismos items, la transacción se reintenta; si algún
+    producto no tiene suficientes items, nada queda escrito. El tiempo de expiración se
+    limita a RESERVA_TTL_MAX_SEGUNDOS; si la reserva no se confirma antes, los items
+    vuelven a estar disponibles.
+    """
+    ttl = min(solicitud.ttl_segundos or RESERVA_TTL_SEGUNDOS, RESERVA_TTL_MAX_SEGUNDOS)
+    reserva_id = str(ObjectId())
+
+    async def reservar(session):
+        ahora = datetime.now()
+        expira = ahora + timedelta(seconds=ttl)
+        tomados = []
+        # Las líneas del mismo producto se suman: cada producto se lee una vez, sin tomar dos veces los mismos items
+        for codigo_barras, cantidad in cantidades_por_producto(solicitud.productos).items():
+            items = await db.itemsDisponibles.find(
+                {"producto_id": codigo_barras, "bodega_id": solicitud.bodega_id},
+                session=session
+            ).limit(cantidad).to_list()
+            if len(items) < cantidad:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"No hay suficientes items disponibles del producto {codigo_barras} en la bodega "
+                           f"{solicitud.bodega_id}. Solicitado {cantidad}, disponibles {len(items)}"
+                )
+            tomados.extend(items)
+
+        skus = [item["_id"] for item in tomados]
+        await db.reservas.insert_one({
+            "_id": reserva_id,
+            "bodega_id": solicitud.bodega_id,
+            "estado": "pendiente",
+            "creada": ahora,
+            "expira": expira,
+        }, session=session)
+        eliminados = await db.itemsDisponibles.delete_many({"_id": {"$in": skus}}, session=session)
+        if eliminados.deleted_count != len(skus):
+            # Solo sin transacciones: otra operación tomó alguno de los items entretanto
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Los items cambiaron durante la reserva, intente de nuevo")
+        for item in tomados:
+            item["estado"] = "reservado"
+            item["reserva_id"] = reserva_id
+        movimientos = embeber_movimiento(tomados, "estado", f"Item reservado (reserva {reserva_id})")
+        if tomados:
+            await db.itemsReservados.insert_many(tomados, session=session)
+        await ajustar_disponibilidad_items(db, tomados, -1, session=session)
+        await registrar_movimientos(db, movimientos, session=session)
+        return skus, expira
+
+    skus, expira = await en_transaccion(reservar)
+
+    enviar_evento_auditoria(
+        user_id="system",
+        action="CREATE",
+        description=f"Reserva creada: {len(skus)} items en la bodega {solicitud.bodega_id}",
+        entity="RESERVA",
+        entity_id=reserva_id,
+        metadata={"skus": skus, "expira": expira.isoformat()},
+        ip=request.client.host
+    )
+
+    return {"reserva_id": reserva_id, "skus": skus, "expira": expira, "codigo": "EXITO"}
+
+
+@router.post("/{reserva_id}/confirmar", status_code=status.HTTP_200_OK)
+async def confirmar_reserva(reserva_id: str, confirmacion: ConfirmacionReserva, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Confirma una reserva pendiente y no vencida. Sus items quedan reservados hasta que la
+    reserva se despacha con POST /reservas/{reserva_id}/despachar.
+    Confirmar de nuevo con el mismo pedido_id responde con éxito, así que el cliente puede
+    reintentar si no recibió la respuesta.
+    """
+    reserva = await db.reservas.find_one_and_update(
+        {"_id": reserva_id, "estado": "pendiente", "expira": {"$gt": datetime.now()}},
+        {"$set": {"estado": "confirmada", "pedido_id": confirmacion.pedido_id}}
+    )
+    if reserva is None:
+        if await db.reservas.find_one({"_id": reserva_id, "estado": "confirmada", "pedido_id": confirmacion.pedido_id}):
+            return {"reserva_confirmada": True, "codigo": "EXITO"}
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La reserva no existe, ya expiró o no está pendiente")
+
+    enviar_evento_auditoria(
+        user_id="system",
+        action="UPDATE",
+        description=f"Reserva confirmada: {reserva_id}",
+        entity="RESERVA",
+        entity_id=reserva_id,
+        metadata={"pedido_id": confirmacion.pedido_id},
+        ip=request.client.host
+    )
+
+    return {"reserva_confirmada": True, "codigo": "EXITO"}
+
+
+@router.post("/{reserva_id}/despachar", status_code=status.HTTP_200_OK)
+async def despachar_reserva(reserva_id: str, request: Request, db=Depends(get_db)) -> Dict[str, Any]:
+    """
+    Despacha los items de una reserva confirmada: salen de itemsReservados, pasan a items en
+    estado vendido y liberan su espacio en la estantería, todo en una transacción.
+    Despachar de nuevo una reserva ya despachada responde con éxito sin volver a mover items.
+    """
+    async def despachar(session):
+        ahora = datetime.now()
+        reserva = await db.reservas.find_one_and_update(
+            {"_id": reserva_id, "estado": "confirmada"},
+            {"$set": {"estado": "despachada", "despachada": ahora}},
+            session=session
+        )
+        if reserva is None:
+            if await db.reservas.find_one({"_id": reserva_id, "estado": "despachada"}, {"_id": 1}, session=session):
+                return None
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="La reserva no existe o no está confirmada")
+
+        items = await db.itemsReservados.find({"reserva_id": reserva_id}, session=session).to_list()
+        for item in items:
+            item["estado"] = "vendido"
+            item["salida_fecha"] = ahora
+            item.pop("reserva_id", None)
+        movimientos = embeber_movimiento(items, "salida", f"Item despachado (pedido {reserva.get('pedido_id')})")
+        if items:
+            await db.items.insert_many(items, session=session)
+        await db.itemsReservados.delete_many({"reserva_id": reserva_id}, session=session)
+        # Los items reservados seguían ocupando su espacio en la estantería
+        for (bodega_id, estanteria_id), cantidad in Counter((item["bodega_id"], item["estanteria_id"]) for item in items).items():
+            await liberar_estanteria(db, bodega_id, estanteria_id, cantidad, session=session)
+        await registrar_movimientos(db, movimientos, session=session)
+        return [item["_id"] for item in items]
+
+    skus = await en_transaccion(despachar)
+    if skus is None:
+        return {"reserva_despachada": True, "codigo": "EXITO"}
+
+    enviar_evento_auditoria(
+        user_id="system",
+        action="UPDATE",
+        description=f"Reserva despachada: {reserva_id} ({len(skus)} items)",
+        entity="RESERVA",
+        entity_id=reserva_id,
+        metadata={"skus": skus},
+        ip=request.client.host
+    )
+
+    return {"reserva_despachada": True, "skus": skus, "codigo": "EXITO"}
+
+
+@router.delete("/{reserva_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def liberar_reserva(reserva_id: str, request: Request, db=Depends(get_db)):
+    """
+    Libera una reserva pendiente y devuelve sus items a itemsDisponibles.
+    """
+    if not await _liberar_reserva(db, reserva_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Reserva pendiente no encontrada")
+
+    enviar_evento_auditoria(
+        user_id="system",
+        action="DELETE",
+        description=f"Reserva liberada: {reserva_id}",
+        entity="RESERVA",
+        entity_id=reserva_id,
+        ip=request.client.host
+    )
+
+
+async def liberar_reservas_vencidas() -> int:
+    """
+    Libera las reservas pendientes cuyo tiempo de expiración ya pasó.
+    """
+    liberadas = 0
+    vencidas = base_datos.reservas.find({"estado": "pendiente", "expira": {"$lte": datetime.now()}}, {"_id": 1})
+    async for reserva in vencidas:
+        if await _liberar_reserva(base_datos, reserva["_id"], {"expira": {"$lte": datetime.now()}}):
+            liberadas += 1
+    return liberadas
+
+
+async def barrer_reservas_vencidas():
+    """
+    Tarea en segundo plano que libera periódicamente las reservas vencidas.
+    """
+    while True:
+        try:
+            liberadas = await liberar_reservas_vencidas()
+            if liberadas:
+                print(f"Reservas vencidas liberadas: {liberadas}")
+        except Exception as e:
+            print(f"Error liberando reservas vencidas: {e}")
+        await asyncio.sleep(RESERVA_BARRIDO_SEGUNDOS)
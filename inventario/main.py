@@ -1,13 +1,47 @@
+import asyncio
 from fastapi import FastAPI
+from database.database import crear_indices, db
+from logic.logic_audit_producer import publicador
 from logic.logic_producto import router as producto
 from logic.logic_item import router as item
 from logic.logic_bodega import router as bodega
 from logic.logic_estanteria import router as estanteria
+from logic.logic_admin import router as admin
+from logic.logic_reserva import router as reserva, barrer_reservas_vencidas
+from logic.logic_disponibilidad import (
+    DISPONIBILIDAD_RECONCILIACION_SEGUNDOS,
+    reconciliar_disponibilidad,
+    reconciliar_disponibilidad_periodicamente,
+)
 app = FastAPI()
 app.include_router(producto)
 app.include_router(item)
 app.include_router(bodega)
 app.include_router(estanteria)
+app.include_router(admin)
+app.include_router(reserva)
+
+@app.on_event("startup")
+async def startup_event():
+    """
+    Crea los índices de MongoDB, arranca el publicador de auditoría y el barrido de
+    reservas vencidas al iniciar la aplicación. Si los contadores de disponibilidad aún
+    no existen, los construye a partir de itemsDisponibles.
+    """
+    await crear_indices()
+    if await db.disponibilidad.estimated_document_count() == 0:
+        await reconciliar_disponibilidad(db)
+    if DISPONIBILIDAD_RECONCILIACION_SEGUNDOS > 0:
+        app.state.reconciliacion_disponibilidad = asyncio.create_task(reconciliar_disponibilidad_periodicamente())
+    publicador.iniciar()
+    app.state.barrido_reservas = asyncio.create_task(barrer_reservas_vencidas())
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """
+    Publica los eventos de auditoría pendientes antes de apagar la aplicación.
+    """
+    publicador.detener()
 
 @app.get("/")
 async def read_root():
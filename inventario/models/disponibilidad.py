@@ -0,0 +1,28 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List
+
+
+class ProductoSolicitado(BaseModel):
+    codigo_barras: str
+    cantidad: int = Field(gt=0)
+
+
+class ConsultaDisponibilidad(BaseModel):
+    """
+    Consulta de disponibilidad de varios productos en una bodega.
+    Permite a pedidos validar un pedido completo en una sola llamada.
+    """
+    bodega_id: str
+    productos: List[ProductoSolicitado]
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "bodega_id": "1",
+                "productos": [
+                    {"codigo_barras": "1234567890123", "cantidad": 2},
+                    {"codigo_barras": "9876543210987", "cantidad": 1}
+                ]
+            }
+        }
+    )
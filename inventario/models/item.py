@@ -7,7 +7,7 @@ class Item(BaseModel):
     sku: str = Field(alias="_id")
     ingreso_fecha: datetime = Field(default_factory=datetime.now)
     salida_fecha: Optional[datetime] = None
-    estado: Literal["disponible", "vendido", "devuelto", "dañado"]
+    estado: Literal["disponible", "reservado", "vendido", "devuelto", "dañado"]
     producto_id: str
     estanteria_id: str
     bodega_id: str
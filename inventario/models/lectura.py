@@ -0,0 +1,70 @@
+"""
+Respuestas de listados a partir de documentos leídos de MongoDB.
+
+Los documentos de las colecciones ya fueron validados al escribirse. Con
+VALIDAR_LECTURAS=false los listados no los vuelven a validar: de cada documento se
+toman las claves del modelo, se completan los valores por defecto que falten y el
+listado se serializa directamente; los documentos embebidos (estanterías, movimientos
+recientes) se retornan tal como están guardados. Con VALIDAR_LECTURAS=true (por defecto) cada
+documento pasa por model_validate. En ambos modos la respuesta se serializa una sola
+vez y FastAPI no la vuelve a validar ni a codificar; el esquema de la respuesta se
+declara con response_model en la ruta.
+"""
+import os
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import PydanticUndefined, to_json
+
+# Con false los listados confían en los documentos de la base de datos y no los validan
+VALIDAR_LECTURAS = os.environ.get("VALIDAR_LECTURAS", "true").lower() != "false"
+
+
+@lru_cache(maxsize=256)
+def _esquema_lectura(modelo: Type[BaseModel]) -> Tuple[Tuple[str, ...], Dict[str, object], Dict[str, object]]:
+    """
+    Claves del modelo en el documento (alias o nombre), sus valores por defecto y sus fábricas por defecto.
+    """
+    claves, por_defecto, fabricas = [], {}, {}
+    for nombre, info in modelo.model_fields.items():
+        clave = info.alias or nombre
+        claves.append(clave)
+        if info.default_factory is not None:
+            fabricas[clave] = info.default_factory
+        elif info.default is not PydanticUndefined:
+            por_defecto[clave] = info.default
+    return tuple(claves), por_defecto, fabricas
+
+
+@lru_cache(maxsize=256)
+def _adaptador_lista(modelo: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[modelo])
+
+
+def _documentos_sin_validar(modelo: Type[BaseModel], documentos: Iterable[dict]) -> List[dict]:
+    claves, por_defecto, fabricas = _esquema_lectura(modelo)
+    resultado = []
+    for documento in documentos:
+        fila = {clave: documento[clave] for clave in claves if clave in documento}
+        if len(fila) < len(claves):
+            for clave, valor in por_defecto.items():
+                fila.setdefault(clave, valor)
+            for clave, fabrica in fabricas.items():
+                if clave not in fila:
+                    fila[clave] = fabrica()
+        resultado.append(fila)
+    return resultado
+
+
+def respuesta_listado(modelo: Type[BaseModel], documentos: Iterable[dict]) -> Response:
+    """
+    Serializa a JSON (por alias) el listado de documentos con la forma del modelo.
+    """
+    if VALIDAR_LECTURAS:
+        modelos = [modelo.model_validate(documento) for documento in documentos]
+        contenido = _adaptador_lista(modelo).dump_json(modelos, by_alias=True)
+    else:
+        contenido = to_json(_documentos_sin_validar(modelo, documentos), fallback=str)
+    return Response(content=contenido, media_type="application/json")
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, StringConstraints
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
 from datetime import datetime
 from typing import Annotated, Literal, Optional
 
@@ -16,6 +16,12 @@ class MovimientoReciente(Movimiento):
     pass
 
 class MovimientoHistorico(Movimiento):
-    sku: str = Field(alias="_id")         # SKU
+    """
+    Movimiento guardado en la colección movimientos (historial completo por SKU).
+    """
+    id: Optional[str] = Field(default=None, alias="_id")
+    sku: str
     bodega_id: Optional[str] = None
     estanteria_id: Optional[str] = None
+
+    model_config = ConfigDict(populate_by_name=True)
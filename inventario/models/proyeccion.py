@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import FrozenSet, Optional, Type
+
+from pydantic import BaseModel, ConfigDict, create_model
+
+
+def resolver_campos(modelo: Type[BaseModel], fields: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    Convierte el parámetro fields ("_id,estado" o "sku,estado") en los nombres de campo
+    del modelo. Retorna None si no se pidió proyección.
+    Lanza ValueError si algún campo no existe en el modelo.
+    """
+    if not fields:
+        return None
+    nombres = {}
+    for nombre, info in modelo.model_fields.items():
+        nombres[nombre] = nombre
+        if info.alias:
+            nombres[info.alias] = nombre
+    solicitados = [campo.strip() for campo in fields.split(",") if campo.strip()]
+    invalidos = [campo for campo in solicitados if campo not in nombres]
+    if invalidos:
+        raise ValueError(f"Campos no válidos: {', '.join(invalidos)}")
+    return frozenset(nombres[campo] for campo in solicitados)
+
+
+def proyeccion_mongo(modelo: Type[BaseModel], campos: FrozenSet[str]) -> dict:
+    """
+    Proyección de MongoDB con los campos pedidos; _id siempre se incluye.
+    """
+    proyeccion = {"_id": 1}
+    for nombre in campos:
+        proyeccion[modelo.model_fields[nombre].alias or nombre] = 1
+    return proyeccion
+
+
+@lru_cache(maxsize=128)
+def modelo_parcial(modelo: Type[BaseModel], campos: FrozenSet[str]) -> Type[BaseModel]:
+    """
+    Modelo de respuesta con solo los campos pedidos (y el identificador). Los campos
+    no pedidos, como las listas embebidas, no se validan ni se serializan.
+    """
+    identificador = next(
+        (nombre for nombre, info in modelo.model_fields.items() if info.alias == "_id"), None
+    )
+    definiciones = {
+        nombre: (info.annotation, info)
+        for nombre, info in modelo.model_fields.items()
+        if nombre in campos or nombre == identificador
+    }
+    return create_model(
+        f"{modelo.__name__}Parcial",
+        __config__=ConfigDict(populate_by_name=True),
+        **definiciones
+    )
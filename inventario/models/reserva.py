@@ -0,0 +1,30 @@
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
+from models.disponibilidad import ProductoSolicitado
+
+
+class SolicitudReserva(BaseModel):
+    """
+    Solicitud para reservar items disponibles de varios productos en una bodega.
+    La reserva es de todo o nada y expira si no se confirma antes de ttl_segundos.
+    """
+    bodega_id: str
+    productos: List[ProductoSolicitado]
+    ttl_segundos: Optional[int] = Field(default=None, gt=0)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "bodega_id": "1",
+                "productos": [
+                    {"codigo_barras": "1234567890123", "cantidad": 2},
+                    {"codigo_barras": "9876543210987", "cantidad": 1}
+                ],
+                "ttl_segundos": 120
+            }
+        }
+    )
+
+
+class ConfirmacionReserva(BaseModel):
+    pedido_id: Optional[str] = None
@@ -0,0 +1,140 @@
+"""
+Fixtures de las pruebas de inventario.
+
+Las pruebas que usan la fixture db (o api) corren contra un MongoDB real indicado por
+MONGO_TEST_URL, en la base de datos inventario_test, que se borra antes de cada prueba.
+Si MongoDB no responde, esas pruebas se omiten. Las transacciones se usan solo si el
+servidor es un replica set, salvo que MONGO_TRANSACCIONES se indique explícitamente; las
+pruebas que dependen de transacciones se omiten sin replica set. Con
+MONGO_TEST_REQUERIDO=true (así corren en CI, ver .github/workflows/tests.yml) la sesión
+termina con error si el servidor no responde o no es un replica set, en lugar de omitirlas.
+
+Uso (desde el directorio inventario), con un replica set de un nodo en Docker:
+    docker run -d --name mongo_pruebas -p 27017:27017 mongo:7 --replSet rs0 --bind_ip_all
+    docker exec mongo_pruebas mongosh --quiet --eval "rs.initiate({_id: 'rs0', members: [{_id: 0, host: 'localhost:27017'}]})"
+    pip install -r requirements-test.txt
+    MONGO_TEST_URL="mongodb://localhost:27017/?directConnection=true" MONGO_TEST_REQUERIDO=true python -m pytest -q
+"""
+import os
+
+import pytest
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+MONGO_TEST_URL = os.environ.get("MONGO_TEST_URL", "mongodb://localhost:27017/?directConnection=true")
+BASE_PRUEBAS = "inventario_test"
+MONGO_TEST_REQUERIDO = os.environ.get("MONGO_TEST_REQUERIDO", "false").lower() == "true"
+
+
+def _inspeccionar_mongo():
+    """
+    Retorna (disponible, es_replica_set) del servidor de pruebas.
+    """
+    try:
+        with MongoClient(MONGO_TEST_URL, serverSelectionTimeoutMS=1000) as cliente:
+            hello = cliente.admin.command("hello")
+        return True, "setName" in hello
+    except PyMongoError:
+        return False, False
+
+
+MONGO_DISPONIBLE, REPLICA_SET = _inspeccionar_mongo()
+
+# database.database crea el cliente al importarse, así que se configura antes de importar la app
+os.environ["MONGO_URL"] = MONGO_TEST_URL
+os.environ.setdefault("MONGO_TRANSACCIONES", "true" if REPLICA_SET else "false")
+
+import httpx  # noqa: E402
+
+from database import database  # noqa: E402
+from logic.logic_audit_producer import publicador  # noqa: E402
+from main import app  # noqa: E402
+from security.auth0 import validate_auth0_token  # noqa: E402
+
+
+def pytest_sessionstart(session):
+    if MONGO_TEST_REQUERIDO and not REPLICA_SET:
+        pytest.exit(f"MONGO_TEST_REQUERIDO: se requiere un replica set de MongoDB en {MONGO_TEST_URL}", returncode=1)
+
+
+@pytest.fixture(autouse=True)
+def eventos_auditoria(monkeypatch):
+    """
+    Reemplaza el publicador de auditoría: los eventos quedan en la lista en lugar de ir a RabbitMQ.
+    """
+    eventos = []
+    monkeypatch.setattr(publicador, "publicar", eventos.append)
+    return eventos
+
+
+@pytest.fixture
+async def db():
+    if not MONGO_DISPONIBLE:
+        pytest.skip(f"MongoDB no disponible en {MONGO_TEST_URL}")
+    await database.client.drop_database(BASE_PRUEBAS)
+    base = database.client[BASE_PRUEBAS]
+    # Los índices de la aplicación, incluidos los que usan las consultas de las pruebas
+    for coleccion, indices in database.INDICES.items():
+        for campos in indices:
+            await base[coleccion].create_index(campos)
+    yield base
+
+
+def _cliente_api(base):
+    async def base_de_datos():
+        yield base
+
+    app.dependency_overrides[database.get_db] = base_de_datos
+    app.dependency_overrides[validate_auth0_token] = lambda: {"sub": "pruebas"}
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://inventario")
+
+
+@pytest.fixture
+async def api(db):
+    """
+    Cliente HTTP de la aplicación con la base de datos de pruebas y sin validar tokens.
+    """
+    async with _cliente_api(db) as cliente:
+        yield cliente
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def api_sin_db():
+    """
+    Cliente HTTP para rutas que deben responder sin llegar a la base de datos.
+    """
+    async with _cliente_api(None) as cliente:
+        yield cliente
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+async def bodega(db):
+    """
+    Un producto y una bodega con una estantería de capacidad 10, sin items.
+    """
+    await db.productos.insert_one({
+        "_id": "PROD-1", "tipo": "Prueba", "nombre": "Producto de prueba",
+        "descripcion": "Producto usado en las pruebas", "precio": 1000.0,
+        "cantidad_items_disponibles": 0, "atributos": {},
+    })
+    await db.bodegas.insert_one({
+        "_id": "1", "ciudad": "Bogotá", "direccion": "Calle 1 # 2-3",
+        "estanterias": [{"_id": "EST-1", "area_bodega": "Pasillo A", "capacidad_total": 10, "capacidad_utilizada": 0}],
+    })
+    return {"producto_id": "PROD-1", "bodega_id": "1", "estanteria_id": "EST-1"}
+
+
+@pytest.fixture
+def crear_items(api, bodega):
+    """
+    Crea items disponibles en la estantería de la bodega con POST /items/bulk, de modo que
+    los contadores de disponibilidad y la capacidad quedan como en la aplicación.
+    """
+    async def crear(cantidad: int, prefijo: str = "SKU") -> list:
+        skus = [f"{prefijo}-{i:03d}" for i in range(cantidad)]
+        respuesta = await api.post("/items/bulk", json=[{"_id": sku, "estado": "disponible", **bodega} for sku in skus])
+        assert respuesta.json()["items_creados"] == cantidad, respuesta.text
+        return skus
+    return crear
@@ -0,0 +1,62 @@
+import logging
+
+import pika
+
+import logic.logic_audit_producer as logic_audit_producer
+from logic.logic_audit_producer import PublicadorAuditoria
+
+
+class _ConexionFalsa:
+    def __init__(self):
+        self.is_open = True
+
+    @property
+    def is_closed(self):
+        return not self.is_open
+
+    def close(self):
+        self.is_open = False
+
+
+class _CanalFalso:
+    def __init__(self, al_publicar):
+        self.al_publicar = al_publicar
+
+    def basic_publish(self, **kwargs):
+        self.al_publicar(kwargs)
+
+
+def test_error_del_broker_cierra_la_conexion_antes_de_reconectar(monkeypatch):
+    monkeypatch.setattr(logic_audit_producer, "AUDIT_PUBLISHER_RETRY_SECONDS", 0)
+    publicador = PublicadorAuditoria(canales=1, tamano_cola=10)
+    publicados = []
+
+    def fallar(_):
+        raise pika.exceptions.StreamLostError("conexión perdida")
+
+    def publicar(mensaje):
+        publicados.append(mensaje["body"])
+        publicador._detenido.set()
+
+    conexiones = [(_ConexionFalsa(), _CanalFalso(fallar)), (_ConexionFalsa(), _CanalFalso(publicar))]
+    abiertas = list(conexiones)
+    monkeypatch.setattr(publicador, "_conectar", lambda: abiertas.pop(0))
+    publicador._pendientes.put(("INVENTARIO.ITEM.CREATE", "{}"))
+
+    publicador._publicar_pendientes()
+
+    assert publicados == ["{}"]
+    assert [conexion.is_open for conexion, _ in conexiones] == [False, False]
+
+
+def test_cola_llena_descarta_el_evento_con_una_advertencia(monkeypatch, caplog):
+    publicador = PublicadorAuditoria(canales=1, tamano_cola=1)
+    monkeypatch.setattr(publicador, "iniciar", lambda: None)
+    evento = {"audited_service_id": "INVENTARIO", "entity": "ITEM", "action": "CREATE"}
+
+    with caplog.at_level(logging.WARNING, logger=logic_audit_producer.__name__):
+        publicador.publicar(evento)
+        publicador.publicar(evento)
+
+    assert publicador._pendientes.qsize() == 1
+    assert [registro.getMessage() for registro in caplog.records] == ["Audit queue full, dropping event: CREATE on ITEM"]
@@ -0,0 +1,42 @@
+import asyncio
+
+from pymongo import AsyncMongoClient
+
+from database import database
+
+
+def test_cliente_asincrono_con_el_pool_configurado():
+    assert isinstance(database.client, AsyncMongoClient)
+    assert database.client.options.pool_options.max_pool_size == database.MONGO_MAX_POOL_SIZE
+    assert database.client.options.pool_options.min_pool_size == database.MONGO_MIN_POOL_SIZE
+
+
+async def test_sin_transacciones_la_operacion_corre_sin_sesion(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_TRANSACCIONES", False)
+    sesiones = []
+
+    async def operacion(session):
+        sesiones.append(session)
+        return "resultado"
+
+    assert await database.en_transaccion(operacion) == "resultado"
+    assert sesiones == [None]
+
+
+async def test_crear_indices_crea_los_indices_compuestos(db, monkeypatch):
+    await db.drop_collection("itemsDisponibles")
+    monkeypatch.setattr(database, "db", db)
+
+    await database.crear_indices()
+    await database.crear_indices()
+
+    indices = [list(indice["key"].items()) async for indice in await db.itemsDisponibles.list_indexes()]
+    for campos in database.INDICES["itemsDisponibles"]:
+        assert [(campo, orden) for campo, orden in campos] in indices
+
+
+async def test_consultas_concurrentes_comparten_el_cliente(api, bodega):
+    respuestas = await asyncio.gather(*(api.get("/productos/PROD-1") for _ in range(20)))
+
+    assert {respuesta.status_code for respuesta in respuestas} == {200}
+    assert {respuesta.json()["_id"] for respuesta in respuestas} == {"PROD-1"}
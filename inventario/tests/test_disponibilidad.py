@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+
+from database import database
+from logic.logic_disponibilidad import reconciliar_disponibilidad
+
+
+async def test_reconciliar_corrige_contadores_desalineados(db, crear_items):
+    await crear_items(3)
+    await db.disponibilidad.update_one({"_id": "PROD-1:1"}, {"$set": {"disponibles": 7}})
+    await db.disponibilidad.insert_one({"_id": "PROD-1:9", "producto_id": "PROD-1", "bodega_id": "9", "disponibles": 2})
+    await db.productos.update_one({"_id": "PROD-1"}, {"$set": {"cantidad_items_disponibles": 11}})
+
+    resultado = await reconciliar_disponibilidad(db)
+
+    assert resultado == {
+        "contadores": 1, "contadores_corregidos": 2, "contadores_eliminados": 1, "productos_corregidos": 1,
+    }
+    assert await db.disponibilidad.find({}).to_list() == [
+        {"_id": "PROD-1:1", "producto_id": "PROD-1", "bodega_id": "1", "disponibles": 3}
+    ]
+    assert (await db.productos.find_one({"_id": "PROD-1"}))["cantidad_items_disponibles"] == 3
+
+
+async def test_reconciliar_crea_los_contadores_que_faltan(db, bodega):
+    await db.itemsDisponibles.insert_many([{"_id": f"SKU-{i}", "estado": "disponible", **bodega} for i in range(2)])
+
+    resultado = await reconciliar_disponibilidad(db)
+
+    assert resultado["contadores_corregidos"] == 1
+    assert (await db.disponibilidad.find_one({"_id": "PROD-1:1"}))["disponibles"] == 2
+    assert (await db.productos.find_one({"_id": "PROD-1"}))["cantidad_items_disponibles"] == 2
+
+
+async def test_reconciliar_sin_diferencias_no_escribe(db, crear_items):
+    await crear_items(2)
+
+    resultado = await reconciliar_disponibilidad(db)
+
+    assert resultado == {
+        "contadores": 1, "contadores_corregidos": 0, "contadores_eliminados": 0, "productos_corregidos": 0,
+    }
+
+
+@pytest.mark.skipif(not database.MONGO_TRANSACCIONES, reason="Requiere un replica set con transacciones")
+async def test_reconciliar_en_paralelo_con_ingresos_no_pierde_incrementos(api, db, bodega):
+    async def ingresar(i):
+        respuesta = await api.post("/items/", json={"_id": f"SKU-{i:03d}", "estado": "disponible", **bodega})
+        assert respuesta.status_code == 201, respuesta.text
+
+    async def reconciliar_varias_veces():
+        for _ in range(5):
+            await reconciliar_disponibilidad(db)
+
+    await asyncio.gather(*(ingresar(i) for i in range(10)), reconciliar_varias_veces())
+
+    assert (await db.disponibilidad.find_one({"_id": "PROD-1:1"}))["disponibles"] == 10
+    assert (await db.productos.find_one({"_id": "PROD-1"}))["cantidad_items_disponibles"] == 10
+
+
+async def test_ruta_de_administracion_reconcilia(api, db, crear_items):
+    await crear_items(1)
+    await db.disponibilidad.delete_many({})
+
+    respuesta = await api.post("/admin/disponibilidad/reconciliar")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json()["codigo"] == "EXITO"
+    assert (await db.disponibilidad.find_one({"_id": "PROD-1:1"}))["disponibles"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+from logic.logic_estanteria import buscar_estanteria, ocupar_estanteria, ocupar_estanteria_lote
+
+ESTANTERIA_2 = {"_id": "EST-2", "area_bodega": "Pasillo B", "capacidad_total": 5}
+
+
+async def test_buscar_estanteria_trae_solo_la_estanteria_pedida(db, bodega):
+    await db.bodegas.update_one({"_id": "1"}, {"$push": {"estanterias": {**ESTANTERIA_2, "capacidad_utilizada": 0}}})
+
+    assert await buscar_estanteria(db, "1", "EST-2") == (True, {**ESTANTERIA_2, "capacidad_utilizada": 0})
+    assert await buscar_estanteria(db, "1", "EST-9") == (True, None)
+    assert await buscar_estanteria(db, "9", "EST-1") == (False, None)
+
+
+async def test_obtener_estanteria_distingue_bodega_y_estanteria_inexistentes(api, bodega):
+    encontrada = await api.get("/estanterias/1/EST-1")
+    sin_estanteria = await api.get("/estanterias/1/EST-9")
+    sin_bodega = await api.get("/estanterias/9/EST-1")
+
+    assert encontrada.status_code == 200
+    assert encontrada.json()["capacidad_total"] == 10
+    assert (sin_estanteria.status_code, sin_estanteria.json()["detail"]) == (404, "Estantería no encontrada")
+    assert (sin_bodega.status_code, sin_bodega.json()["detail"]) == (404, "Bodega no encontrada")
+
+
+async def test_agregar_estanteria_verifica_duplicados_en_el_mismo_update(api, db, bodega):
+    assert (await api.post("/estanterias/1", json=ESTANTERIA_2)).status_code == 201
+    assert (await api.post("/estanterias/1", json=ESTANTERIA_2)).status_code == 409
+    assert (await api.post("/estanterias/9", json=ESTANTERIA_2)).status_code == 404
+
+    bodega = await db.bodegas.find_one({"_id": "1"})
+    assert [estanteria["_id"] for estanteria in bodega["estanterias"]] == ["EST-1", "EST-2"]
+
+
+async def test_estanteria_con_items_reservados_no_se_elimina(api, db, crear_items):
+    await crear_items(1)
+    await api.post("/reservas/", json={"bodega_id": "1", "productos": [{"codigo_barras": "PROD-1", "cantidad": 1}]})
+
+    respuesta = await api.delete("/estanterias/1/EST-1")
+
+    assert respuesta.status_code == 409
+    assert (await buscar_estanteria(db, "1", "EST-1"))[1] is not None
+
+
+async def _capacidad_utilizada(db) -> int:
+    return (await buscar_estanteria(db, "1", "EST-1"))[1]["capacidad_utilizada"]
+
+
+async def test_ocupar_estanteria_solo_si_cabe(db, bodega):
+    ocupada = await ocupar_estanteria(db, "1", "EST-1", 9)
+
+    assert ocupada["capacidad_utilizada"] == 9
+    assert await ocupar_estanteria(db, "1", "EST-1", 2) is None
+    assert (await ocupar_estanteria(db, "1", "EST-1", 1))["capacidad_utilizada"] == 10
+    assert await ocupar_estanteria(db, "1", "EST-1", 1) is None
+    assert await ocupar_estanteria(db, "1", "EST-9", 1) is None
+    assert await ocupar_estanteria(db, "9", "EST-1", 1) is None
+    assert await _capacidad_utilizada(db) == 10
+
+
+async def test_ocupaciones_concurrentes_no_superan_la_capacidad(db, bodega):
+    resultados = await asyncio.gather(*(ocupar_estanteria(db, "1", "EST-1") for _ in range(25)))
+
+    assert sum(resultado is not None for resultado in resultados) == 10
+    assert await _capacidad_utilizada(db) == 10
+
+
+async def test_ocupar_estanteria_lote_ocupa_el_espacio_libre(db, bodega):
+    await ocupar_estanteria(db, "1", "EST-1", 4)
+
+    assert await ocupar_estanteria_lote(db, "1", "EST-1", 10) == 6
+    assert await ocupar_estanteria_lote(db, "1", "EST-1", 3) == 0
+    assert await ocupar_estanteria_lote(db, "1", "EST-9", 3) == 0
+    assert await _capacidad_utilizada(db) == 10
+
+
+async def test_inserciones_concurrentes_no_sobrellenan_la_estanteria(api, db, bodega):
+    respuestas = await asyncio.gather(*(
+        api.post("/items/", json={"_id": f"SKU-{i:03d}", "estado": "disponible", **bodega}) for i in range(15)
+    ))
+
+    codigos = sorted(respuesta.status_code for respuesta in respuestas)
+    assert codigos == [201] * 10 + [400] * 5
+    assert {respuesta.json()["detail"] for respuesta in respuestas if respuesta.status_code == 400} == {"La estantería está llena"}
+    assert await db.itemsDisponibles.count_documents({}) == 10
+    assert await _capacidad_utilizada(db) == 10
+
+
+async def test_carga_masiva_rechaza_las_filas_que_no_caben(api, db, bodega, crear_items):
+    await crear_items(7)
+
+    respuesta = await api.post("/items/bulk", json=[
+        {"_id": f"NUEVO-{i}", "estado": "disponible", **bodega} for i in range(5)
+    ])
+
+    cuerpo = respuesta.json()
+    assert (cuerpo["items_creados"], cuerpo["codigo"]) == (3, "PARCIAL")
+    assert [(error["fila"], error["error"]) for error in cuerpo["errores"]] == [
+        (3, "La estantería está llena"), (4, "La estantería está llena"),
+    ]
+    assert await db.itemsDisponibles.count_documents({}) == 10
+    assert await _capacidad_utilizada(db) == 10
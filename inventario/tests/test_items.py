@@ -0,0 +1,145 @@
+import pytest
+
+import logic.logic_item as logic_item
+from database import database
+
+
+async def _estado_bodega(db) -> tuple:
+    """
+    Capacidad utilizada de la estantería, contador de la bodega y total del producto.
+    """
+    bodega = await db.bodegas.find_one({"_id": "1"})
+    contador = await db.disponibilidad.find_one({"_id": "PROD-1:1"}) or {}
+    producto = await db.productos.find_one({"_id": "PROD-1"})
+    return (
+        bodega["estanterias"][0]["capacidad_utilizada"],
+        contador.get("disponibles", 0),
+        producto["cantidad_items_disponibles"],
+    )
+
+
+async def test_listado_paginado_ordenado_por_sku_sin_repetir(api, db, bodega):
+    await db.itemsDisponibles.insert_many([{"_id": f"D-{i}", "estado": "disponible", **bodega} for i in range(4)])
+    await db.items.insert_many([{"_id": f"V-{i}", "estado": "vendido", **bodega} for i in range(3)])
+    await db.itemsReservados.insert_many([{"_id": f"R-{i}", "estado": "reservado", **bodega} for i in range(2)])
+
+    paginas = []
+    for saltar in range(0, 10, 3):
+        respuesta = await api.get("/items/", params={"saltar": saltar, "limite": 3, "fields": "estado"})
+        assert respuesta.status_code == 200
+        paginas.append([item["_id"] for item in respuesta.json()])
+
+    skus = [sku for pagina in paginas for sku in pagina]
+    assert [len(pagina) for pagina in paginas] == [3, 3, 3, 0]
+    assert skus == sorted(skus)
+    assert set(skus) == {f"D-{i}" for i in range(4)} | {f"V-{i}" for i in range(3)} | {f"R-{i}" for i in range(2)}
+
+
+async def test_listado_ndjson_incluye_items_reservados(api, db, bodega):
+    await db.itemsDisponibles.insert_one({"_id": "D-1", "estado": "disponible", **bodega})
+    await db.itemsReservados.insert_one({"_id": "R-1", "estado": "reservado", "reserva_id": "r1", **bodega})
+
+    respuesta = await api.get("/items/", params={"formato": "ndjson"})
+
+    assert respuesta.status_code == 200
+    assert len(respuesta.text.strip().splitlines()) == 2
+
+
+async def test_crear_item_disponible_escribe_item_capacidad_contadores_y_movimiento(api, db, bodega):
+    respuesta = await api.post("/items/", json={"_id": "SKU-1", "estado": "disponible", **bodega})
+
+    assert respuesta.status_code == 201
+    item = await db.itemsDisponibles.find_one({"_id": "SKU-1"})
+    assert [movimiento["tipo"] for movimiento in item["movimientos_recientes"]] == ["ingreso"]
+    assert await db.movimientos.count_documents({"sku": "SKU-1"}) == 1
+    assert await _estado_bodega(db) == (1, 1, 1)
+
+
+async def test_crear_item_rechazado_no_deja_escrituras(api, db, bodega, crear_items):
+    await crear_items(1)
+    await db.bodegas.update_one({"_id": "1"}, {"$set": {"estanterias.0.capacidad_total": 1}})
+
+    duplicado = await api.post("/items/", json={"_id": "SKU-000", "estado": "disponible", **bodega})
+    sin_espacio = await api.post("/items/", json={"_id": "SKU-2", "estado": "disponible", **bodega})
+
+    assert duplicado.status_code == 400
+    assert sin_espacio.status_code == 400
+    assert sin_espacio.json()["detail"] == "La estantería está llena"
+    assert await db.itemsDisponibles.count_documents({}) == 1
+    assert await db.movimientos.count_documents({}) == 1
+    assert await _estado_bodega(db) == (1, 1, 1)
+
+
+async def test_eliminar_item_disponible_libera_espacio_y_contadores(api, db, crear_items):
+    await crear_items(2)
+
+    assert (await api.delete("/items/sku/SKU-000")).status_code == 204
+    assert (await api.delete("/items/sku/SKU-000")).status_code == 404
+
+    assert await db.itemsDisponibles.count_documents({}) == 1
+    assert await db.movimientos.count_documents({"sku": "SKU-000", "tipo": "salida"}) == 1
+    assert await _estado_bodega(db) == (1, 1, 1)
+
+
+async def test_carga_masiva_escribe_items_capacidad_contadores_y_movimientos(api, db, bodega, eventos_auditoria, monkeypatch):
+    monkeypatch.setattr(logic_item, "ITEMS_BULK_SKUS_AUDITORIA", 2)
+
+    respuesta = await api.post("/items/bulk", json=[
+        {"_id": "SKU-1", "estado": "disponible", **bodega},
+        {"_id": "SKU-2", "estado": "disponible", **bodega},
+        {"_id": "SKU-3", "estado": "vendido", **bodega},
+        {"_id": "SKU-4", "estado": "disponible", **bodega, "producto_id": "PROD-9"},
+    ])
+
+    cuerpo = respuesta.json()
+    assert (cuerpo["items_creados"], cuerpo["codigo"]) == (3, "PARCIAL")
+    assert [(error["fila"], error["error"]) for error in cuerpo["errores"]] == [(3, "El producto asociado no existe")]
+    assert await db.items.count_documents({}) == 1
+    assert await db.movimientos.count_documents({"tipo": "ingreso"}) == 3
+    assert await _estado_bodega(db) == (2, 2, 2)
+    # El evento de auditoría lleva la cantidad y solo los primeros SKUs
+    assert eventos_auditoria[-1]["metadata"] == {"cantidad": 3, "skus": ["SKU-1", "SKU-2"], "bodegas": ["1"], "errores": 1}
+
+
+@pytest.mark.skipif(not database.MONGO_TRANSACCIONES, reason="Requiere un replica set con transacciones")
+async def test_carga_masiva_que_falla_a_mitad_no_deja_escrituras(api, db, bodega, monkeypatch):
+    async def fallar(*args, **kwargs):
+        raise RuntimeError("falla al registrar movimientos")
+    monkeypatch.setattr(logic_item, "registrar_movimientos", fallar)
+
+    with pytest.raises(RuntimeError):
+        await api.post("/items/bulk", json=[{"_id": f"SKU-{i}", "estado": "disponible", **bodega} for i in range(3)])
+
+    assert await db.itemsDisponibles.count_documents({}) == 0
+    assert await _estado_bodega(db) == (0, 0, 0)
+
+
+async def test_disponibilidad_suma_las_lineas_del_mismo_producto(api, crear_items):
+    await crear_items(4)
+
+    respuesta = await api.post("/items/disponibilidad", json={"bodega_id": "1", "productos": [
+        {"codigo_barras": "PROD-1", "cantidad": 3},
+        {"codigo_barras": "PROD-1", "cantidad": 3},
+        {"codigo_barras": "PROD-9", "cantidad": 1},
+    ]})
+
+    assert respuesta.status_code == 200
+    productos = respuesta.json()["productos"]
+    assert [(p["cantidad_solicitada"], p["cantidad_total_solicitada"], p["suficiente"]) for p in productos[:2]] == [
+        (3, 6, False), (3, 6, False),
+    ]
+    assert (productos[2]["existe"], productos[2]["disponibles"], productos[2]["suficiente"]) == (False, 0, False)
+
+
+async def test_conteo_de_disponibles_igual_en_items_y_bodegas(api, crear_items):
+    await crear_items(3)
+    params = {"codigo_barras": "PROD-1", "bodega_id": "1", "solo_conteo": "true"}
+
+    for ruta in ("/items/itemsDisponibles", "/bodegas/itemsDisponibles"):
+        conteo = (await api.get(ruta, params=params)).json()
+        suficiente = (await api.get(ruta, params={**params, "minimo": 2})).json()
+        insuficiente = (await api.get(ruta, params={**params, "minimo": 5})).json()
+
+        assert conteo == {"cantidad_disponible": 3, "codigo": "EXITO"}
+        assert suficiente == {"cantidad_disponible": 3, "suficiente": True, "codigo": "EXITO"}
+        assert insuficiente == {"cantidad_disponible": 3, "suficiente": False, "codigo": "EXITO"}
@@ -0,0 +1,56 @@
+import json
+from datetime import datetime
+
+import pytest
+from pydantic import ValidationError
+
+import models.lectura as lectura
+from models.item import Item
+from models.lectura import respuesta_listado
+from models.producto import Producto
+
+PRODUCTO = {
+    "_id": "PROD-1", "tipo": "Prueba", "nombre": "Producto", "descripcion": "Producto de prueba",
+    "precio": 1000.0, "otro_campo": "no va en la respuesta",
+}
+
+
+def _listado(modelo, documentos) -> list:
+    respuesta = respuesta_listado(modelo, documentos)
+    assert respuesta.media_type == "application/json"
+    return json.loads(respuesta.body)
+
+
+@pytest.mark.parametrize("validar", [True, False])
+def test_listado_usa_alias_completa_valores_por_defecto_y_omite_claves_ajenas(monkeypatch, validar):
+    monkeypatch.setattr(lectura, "VALIDAR_LECTURAS", validar)
+
+    assert _listado(Producto, [PRODUCTO]) == [{
+        "_id": "PROD-1", "tipo": "Prueba", "nombre": "Producto", "descripcion": "Producto de prueba",
+        "precio": 1000.0, "cantidad_items_disponibles": 0, "atributos": {},
+    }]
+
+
+@pytest.mark.parametrize("validar", [True, False])
+def test_listado_serializa_fechas_y_listas_por_defecto(monkeypatch, validar):
+    monkeypatch.setattr(lectura, "VALIDAR_LECTURAS", validar)
+    documento = {
+        "_id": "SKU-1", "ingreso_fecha": datetime(2025, 1, 2, 3, 4, 5), "estado": "disponible",
+        "producto_id": "PROD-1", "estanteria_id": "EST-1", "bodega_id": "1",
+    }
+
+    item = _listado(Item, [documento])[0]
+
+    assert item["ingreso_fecha"] == "2025-01-02T03:04:05"
+    assert (item["salida_fecha"], item["movimientos_recientes"]) == (None, [])
+
+
+def test_sin_validar_confia_en_el_documento(monkeypatch):
+    invalido = {**PRODUCTO, "nombre": "X"}
+
+    monkeypatch.setattr(lectura, "VALIDAR_LECTURAS", True)
+    with pytest.raises(ValidationError):
+        respuesta_listado(Producto, [invalido])
+
+    monkeypatch.setattr(lectura, "VALIDAR_LECTURAS", False)
+    assert _listado(Producto, [invalido])[0]["nombre"] == "X"
@@ -0,0 +1,26 @@
+from datetime import datetime, timedelta
+
+
+async def test_eliminar_item_no_disponible_registra_su_ubicacion(api, db, bodega):
+    await api.post("/items/", json={"_id": "SKU-1", "estado": "vendido", **bodega})
+
+    assert (await api.delete("/items/sku/SKU-1")).status_code == 204
+
+    salida = await db.movimientos.find_one({"sku": "SKU-1", "tipo": "salida"})
+    assert (salida["bodega_id"], salida["estanteria_id"]) == ("1", "EST-1")
+
+
+async def test_historial_paginado_sin_cursor_en_la_ultima_pagina(api, db):
+    inicio = datetime(2025, 1, 1)
+    await db.movimientos.insert_many([
+        {"_id": f"M-{i}", "sku": "SKU-1", "tipo": "estado", "fecha": inicio + timedelta(minutes=i),
+         "descripcion": f"Movimiento {i}", "usuario_id": "system"}
+        for i in range(4)
+    ])
+
+    primera = (await api.get("/items/sku/SKU-1/movimientos", params={"limite": 2})).json()
+    segunda = (await api.get("/items/sku/SKU-1/movimientos", params={"limite": 2, "cursor": primera["siguiente_cursor"]})).json()
+
+    assert [movimiento["_id"] for movimiento in primera["movimientos"]] == ["M-3", "M-2"]
+    assert [movimiento["_id"] for movimiento in segunda["movimientos"]] == ["M-1", "M-0"]
+    assert segunda["siguiente_cursor"] is None
@@ -0,0 +1,51 @@
+import pytest
+
+from models.item import Item
+from models.proyeccion import modelo_parcial, proyeccion_mongo, resolver_campos
+
+
+def test_resolver_campos_acepta_alias_y_nombres():
+    assert resolver_campos(Item, None) is None
+    assert resolver_campos(Item, "") is None
+    assert resolver_campos(Item, "_id, estado") == {"sku", "estado"}
+    assert resolver_campos(Item, "sku,estado,") == {"sku", "estado"}
+
+
+def test_resolver_campos_rechaza_campos_desconocidos():
+    with pytest.raises(ValueError, match="Campos no válidos: color, talla"):
+        resolver_campos(Item, "estado,color,talla")
+
+
+def test_proyeccion_mongo_usa_alias_e_incluye_id():
+    assert proyeccion_mongo(Item, frozenset({"estado", "bodega_id"})) == {"_id": 1, "estado": 1, "bodega_id": 1}
+    assert proyeccion_mongo(Item, frozenset({"sku"})) == {"_id": 1}
+
+
+def test_modelo_parcial_solo_valida_los_campos_pedidos():
+    modelo = modelo_parcial(Item, frozenset({"estado"}))
+
+    assert set(modelo.model_fields) == {"sku", "estado"}
+    assert modelo.model_validate({"_id": "SKU-1", "estado": "vendido"}).model_dump(by_alias=True) == {
+        "_id": "SKU-1", "estado": "vendido",
+    }
+    assert modelo_parcial(Item, frozenset({"estado"})) is modelo
+
+
+@pytest.mark.parametrize("ruta", ["/items/", "/productos/", "/bodegas/"])
+async def test_fields_desconocido_responde_400(api_sin_db, ruta):
+    respuesta = await api_sin_db.get(ruta, params={"fields": "nombre_inexistente"})
+
+    assert respuesta.status_code == 400
+    assert respuesta.json()["detail"] == "Campos no válidos: nombre_inexistente"
+
+
+async def test_listados_retornan_solo_los_campos_pedidos(api, db, bodega):
+    await db.itemsDisponibles.insert_one({"_id": "SKU-1", "estado": "disponible", **bodega})
+
+    items = (await api.get("/items/", params={"fields": "estado"})).json()
+    productos = (await api.get("/productos/", params={"fields": "nombre,precio"})).json()
+    bodegas = (await api.get("/bodegas/", params={"fields": "ciudad"})).json()
+
+    assert items == [{"_id": "SKU-1", "estado": "disponible"}]
+    assert productos == [{"_id": "PROD-1", "nombre": "Producto de prueba", "precio": 1000.0}]
+    assert bodegas == [{"_id": "1", "ciudad": "Bogotá"}]
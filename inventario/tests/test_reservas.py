@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+import logic.logic_reserva as logic_reserva
+
+
+def _solicitud(cantidad: int, **extra) -> dict:
+    return {"bodega_id": "1", "productos": [{"codigo_barras": "PROD-1", "cantidad": cantidad}], **extra}
+
+
+async def _disponibles(db) -> tuple:
+    """
+    Items en itemsDisponibles, contador de la bodega y total del producto.
+    """
+    contador = await db.disponibilidad.find_one({"_id": "PROD-1:1"}) or {}
+    producto = await db.productos.find_one({"_id": "PROD-1"})
+    return (
+        await db.itemsDisponibles.count_documents({}),
+        contador.get("disponibles", 0),
+        producto["cantidad_items_disponibles"],
+    )
+
+
+async def test_crear_reserva_mueve_los_items_y_descuenta_los_contadores(api, db, crear_items):
+    await crear_items(3)
+
+    respuesta = await api.post("/reservas/", json=_solicitud(2))
+
+    assert respuesta.status_code == 201
+    reserva = respuesta.json()
+    assert len(reserva["skus"]) == 2
+    reservados = await db.itemsReservados.find({}).to_list()
+    assert sorted(item["_id"] for item in reservados) == sorted(reserva["skus"])
+    assert all(item["estado"] == "reservado" and item["reserva_id"] == reserva["reserva_id"] for item in reservados)
+    assert await _disponibles(db) == (1, 1, 1)
+    assert (await db.reservas.find_one({"_id": reserva["reserva_id"]}))["estado"] == "pendiente"
+
+
+async def test_reserva_sin_items_suficientes_no_escribe_nada(api, db, crear_items):
+    await crear_items(1)
+
+    respuesta = await api.post("/reservas/", json=_solicitud(2))
+
+    assert respuesta.status_code == 409
+    assert await db.reservas.count_documents({}) == 0
+    assert await db.itemsReservados.count_documents({}) == 0
+    assert await _disponibles(db) == (1, 1, 1)
+
+
+async def test_lineas_repetidas_del_mismo_producto_se_reservan_juntas(api, db, crear_items):
+    await crear_items(3)
+    lineas = [{"codigo_barras": "PROD-1", "cantidad": 1}, {"codigo_barras": "PROD-1", "cantidad": 2}]
+
+    respuesta = await api.post("/reservas/", json={"bodega_id": "1", "productos": lineas})
+
+    assert respuesta.status_code == 201, respuesta.text
+    assert sorted(respuesta.json()["skus"]) == ["SKU-000", "SKU-001", "SKU-002"]
+    assert await _disponibles(db) == (0, 0, 0)
+
+
+async def test_lineas_repetidas_que_superan_el_stock_no_se_reservan(api, db, crear_items):
+    await crear_items(3)
+    lineas = [{"codigo_barras": "PROD-1", "cantidad": 2}, {"codigo_barras": "PROD-1", "cantidad": 2}]
+
+    respuesta = await api.post("/reservas/", json={"bodega_id": "1", "productos": lineas})
+
+    assert respuesta.status_code == 409
+    assert "Solicitado 4, disponibles 3" in respuesta.json()["detail"]
+    assert await _disponibles(db) == (3, 3, 3)
+
+
+async def test_ttl_de_la_reserva_se_limita_al_maximo(api, db, crear_items):
+    await crear_items(1)
+
+    respuesta = await api.post("/reservas/", json=_solicitud(1, ttl_segundos=logic_reserva.RESERVA_TTL_MAX_SEGUNDOS * 10))
+
+    assert respuesta.status_code == 201
+    reserva = await db.reservas.find_one({"_id": respuesta.json()["reserva_id"]})
+    assert reserva["expira"] - reserva["creada"] == timedelta(seconds=logic_reserva.RESERVA_TTL_MAX_SEGUNDOS)
+
+
+async def test_liberar_reserva_devuelve_los_items_una_sola_vez(api, db, crear_items):
+    await crear_items(3)
+    reserva_id = (await api.post("/reservas/", json=_solicitud(2))).json()["reserva_id"]
+
+    assert (await api.delete(f"/reservas/{reserva_id}")).status_code == 204
+    assert (await api.delete(f"/reservas/{reserva_id}")).status_code == 404
+
+    assert await db.itemsReservados.count_documents({}) == 0
+    assert await _disponibles(db) == (3, 3, 3)
+    assert (await db.reservas.find_one({"_id": reserva_id}))["estado"] == "liberada"
+
+
+async def test_confirmar_reserva_es_idempotente_para_el_mismo_pedido(api, db, crear_items):
+    await crear_items(1)
+    reserva_id = (await api.post("/reservas/", json=_solicitud(1))).json()["reserva_id"]
+
+    assert (await api.post(f"/reservas/{reserva_id}/confirmar", json={"pedido_id": "PED-1"})).status_code == 200
+    assert (await api.post(f"/reservas/{reserva_id}/confirmar", json={"pedido_id": "PED-1"})).status_code == 200
+    assert (await api.post(f"/reservas/{reserva_id}/confirmar", json={"pedido_id": "PED-2"})).status_code == 409
+    # Una reserva confirmada ya no se puede liberar
+    assert (await api.delete(f"/reservas/{reserva_id}")).status_code == 404
+    assert await db.itemsReservados.count_documents({}) == 1
+
+
+async def test_reservas_vencidas_se_liberan(api, db, crear_items, monkeypatch):
+    await crear_items(2)
+    vencida = (await api.post("/reservas/", json=_solicitud(1))).json()["reserva_id"]
+    vigente = (await api.post("/reservas/", json=_solicitud(1))).json()["reserva_id"]
+    await db.reservas.update_one({"_id": vencida}, {"$set": {"expira": datetime.now() - timedelta(seconds=1)}})
+    monkeypatch.setattr(logic_reserva, "base_datos", db)
+
+    assert await logic_reserva.liberar_reservas_vencidas() == 1
+
+    assert (await db.reservas.find_one({"_id": vencida}))["estado"] == "liberada"
+    assert (await db.reservas.find_one({"_id": vigente}))["estado"] == "pendiente"
+    assert await _disponibles(db) == (1, 1, 1)
+    # Una reserva vencida no se puede confirmar
+    assert (await api.post(f"/reservas/{vencida}/confirmar", json={"pedido_id": "PED-1"})).status_code == 409
+
+
+async def test_items_reservados_solo_se_crean_con_una_reserva(api, db, bodega, crear_items):
+    await crear_items(1)
+    sku = (await api.post("/reservas/", json=_solicitud(1))).json()["skus"][0]
+
+    nuevo_reservado = await api.post("/items/", json={"_id": "SKU-NUEVO", "estado": "reservado", **bodega})
+    sku_en_reserva = await api.post("/items/", json={"_id": sku, "estado": "vendido", **bodega})
+
+    assert nuevo_reservado.status_code == 400
+    assert sku_en_reserva.status_code == 400
+    assert await db.items.count_documents({}) == 0
+
+
+async def test_bodega_con_reserva_pendiente_no_se_elimina(api, db, crear_items):
+    await crear_items(1)
+    await api.post("/reservas/", json=_solicitud(1))
+
+    respuesta = await api.delete("/bodegas/1")
+
+    assert respuesta.status_code == 409
+    assert await db.bodegas.count_documents({"_id": "1"}) == 1
+
+
+async def test_despachar_reserva_confirmada_saca_los_items_y_libera_la_estanteria(api, db, crear_items):
+    await crear_items(3)
+    reserva = (await api.post("/reservas/", json=_solicitud(2))).json()
+    reserva_id = reserva["reserva_id"]
+
+    sin_confirmar = await api.post(f"/reservas/{reserva_id}/despachar")
+    await api.post(f"/reservas/{reserva_id}/confirmar", json={"pedido_id": "PED-1"})
+    despachada = await api.post(f"/reservas/{reserva_id}/despachar")
+    de_nuevo = await api.post(f"/reservas/{reserva_id}/despachar")
+
+    assert sin_confirmar.status_code == 409
+    assert despachada.status_code == 200
+    assert sorted(despachada.json()["skus"]) == sorted(reserva["skus"])
+    assert de_nuevo.status_code == 200
+    assert await db.itemsReservados.count_documents({}) == 0
+    vendidos = await db.items.find({}).to_list()
+    assert sorted(item["_id"] for item in vendidos) == sorted(reserva["skus"])
+    assert all(item["estado"] == "vendido" and "reserva_id" not in item for item in vendidos)
+    assert await db.movimientos.count_documents({"tipo": "salida"}) == 2
+    assert (await db.bodegas.find_one({"_id": "1"}))["estanterias"][0]["capacidad_utilizada"] == 1
+    assert await _disponibles(db) == (1, 1, 1)
+
+
+async def test_item_reservado_no_se_elimina_hasta_despachar_la_reserva(api, db, crear_items):
+    await crear_items(1)
+    reserva = (await api.post("/reservas/", json=_solicitud(1))).json()
+    sku = reserva["skus"][0]
+
+    reservado = await api.delete(f"/items/sku/{sku}")
+    await api.post(f"/reservas/{reserva['reserva_id']}/confirmar", json={"pedido_id": "PED-1"})
+    await api.post(f"/reservas/{reserva['reserva_id']}/despachar")
+    despachado = await api.delete(f"/items/sku/{sku}")
+
+    assert reservado.status_code == 409
+    assert despachado.status_code == 204
+    assert await db.items.count_documents({}) == 0
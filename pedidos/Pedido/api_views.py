@@ -1,5 +1,6 @@
-from Pedido.logic.logic_pedido import actualizar_estado_pedido_api, consultar_pedido_por_id, procesar_creacion_pedido_completa, verificar_integridad_pedido
-from Pedido.logic.logic_usuario import token_requerido
+from Pedido.logic.logic_pedido import actualizar_estado_pedido_api, consultar_pedido_por_id, procesar_creacion_pedido_completa, verificar_integridad_pedido, metricas_validacion
+from Pedido.logic.logic_usuario import token_requerido, obtener_estadisticas_cache_tokens
+from Pedido.logic.logic_inventario import cliente_inventario
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
@@ -89,3 +90,16 @@ def verificar_integridad(request):
 @token_requerido
 def consultar_pedido(request, id):
     return consultar_pedido_por_id(request, id)
+
+
+@api_view(['GET'])
+@token_requerido
+def metricas(request):
+    """
+    Endpoint con las métricas internas del servicio de pedidos
+    """
+    return Response({
+        "cache_tokens": obtener_estadisticas_cache_tokens(),
+        "inventario": cliente_inventario.metricas(),
+        "validacion_productos": metricas_validacion.resumen(),
+    }, status=200)
@@ -1,14 +1,193 @@
-import requests
+import os
+import json
+import queue
+import logging
+import threading
+from datetime import datetime
+
+import pika
 from django.conf import settings
 
-AUDITORIA_URL = getattr(settings, 'AUDITORIA_URL', 'http://kong:8000/auditoria')
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
+RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'admin')
+RABBITMQ_PASS = os.getenv('RABBITMQ_PASS', 'admin')
+QUEUE_NAME = 'audit_queue'
+
+AUDIT_PUBLISHER_QUEUE_SIZE = int(os.getenv('AUDIT_PUBLISHER_QUEUE_SIZE', '10000'))
+AUDIT_PUBLISHER_RETRY_SECONDS = float(os.getenv('AUDIT_PUBLISHER_RETRY_SECONDS', '5'))
+# Archivo donde se guardan los eventos mientras el broker no está disponible
+AUDIT_SPOOL_PATH = getattr(settings, 'AUDIT_SPOOL_PATH', os.path.join(settings.BASE_DIR, 'audit_spool.ndjson'))
+
+
+class _SpoolAuditoria:
+    """
+    Almacenamiento local durable (un evento JSON por línea) para los eventos
+    que no se pudieron publicar porque el broker no estaba disponible.
+
+    Los workers de gunicorn comparten el archivo, así que además del lock entre hilos
+    cada acceso toma un bloqueo exclusivo del archivo (flock). El archivo se vacía con
+    truncate en lugar de borrarse para que ningún proceso escriba en un archivo eliminado.
+    """
+
+    def __init__(self, ruta):
+        self._ruta = ruta
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _bloquear(archivo):
+        if fcntl is not None:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+
+    def guardar(self, body):
+        with self._lock:
+            with open(self._ruta, 'a', encoding='utf-8') as archivo:
+                self._bloquear(archivo)
+                archivo.write(body + '\n')
+                archivo.flush()
+                os.fsync(archivo.fileno())
+
+    def hay_pendientes(self):
+        try:
+            return os.path.getsize(self._ruta) > 0
+        except OSError:
+            return False
+
+    def tomar_pendientes(self):
+        """
+        Retorna los eventos guardados y vacía el spool.
+        Si luego falla la publicación, quien los tomó debe volver a guardarlos.
+        """
+        with self._lock:
+            if not os.path.exists(self._ruta):
+                return []
+            with open(self._ruta, 'r+', encoding='utf-8') as archivo:
+                self._bloquear(archivo)
+                pendientes = [linea.rstrip('\n') for linea in archivo if linea.strip()]
+                archivo.seek(0)
+                archivo.truncate()
+                archivo.flush()
+                os.fsync(archivo.fileno())
+            return pendientes
+
+
+class PublicadorAuditoria:
+    """
+    Publicador persistente de eventos de auditoría hacia la cola audit_queue de RabbitMQ.
+
+    Las vistas solo encolan el evento en memoria. Un hilo en segundo plano mantiene una
+    conexión abierta, publica con confirmaciones del broker y, si el broker no está
+    disponible o la cola en memoria está llena, guarda los eventos en el spool local.
+    El spool se reenvía al reconectar y cada vez que la cola en memoria queda vacía.
+    """
+
+    def __init__(self, spool, tamano_cola):
+        self._spool = spool
+        self._pendientes = queue.Queue(maxsize=tamano_cola)
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._publicar_pendientes, name='audit-publisher', daemon=True)
+                self._hilo.start()
+
+    def publicar(self, mensaje):
+        self.iniciar()
+        body = json.dumps(mensaje, default=str)
+        try:
+            self._pendientes.put_nowait(body)
+        except queue.Full:
+            self._spool.guardar(body)
+
+    def _conectar(self):
+        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+        connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            credentials=credentials,
+            heartbeat=30,
+            blocked_connection_timeout=300
+        ))
+        channel = connection.channel()
+        channel.queue_declare(queue=QUEUE_NAME, durable=True)
+        channel.confirm_delivery()
+        return connection, channel
+
+    def _enviar(self, channel, body):
+        channel.basic_publish(
+            exchange='',
+            routing_key=QUEUE_NAME,
+            body=body,
+            properties=pika.BasicProperties(delivery_mode=2)
+        )
+
+    def _reenviar_spool(self, channel):
+        pendientes = self._spool.tomar_pendientes()
+        for i, body in enumerate(pendientes):
+            try:
+                self._enviar(channel, body)
+            except Exception:
+                for restante in pendientes[i:]:
+                    self._spool.guardar(restante)
+                raise
+        if pendientes:
+            logger.info("Reenviados %s eventos de auditoría desde el spool", len(pendientes))
+
+    def _publicar_pendientes(self):
+        connection, channel = None, None
+        while True:
+            try:
+                if connection is None or connection.is_closed:
+                    connection, channel = self._conectar()
+                    self._reenviar_spool(channel)
+            except Exception as e:
+                logger.warning("Broker de auditoría no disponible: %s", e)
+                connection, channel = None, None
+
+            try:
+                body = self._pendientes.get(timeout=AUDIT_PUBLISHER_RETRY_SECONDS)
+            except queue.Empty:
+                if connection is not None and connection.is_open:
+                    connection.process_data_events(time_limit=0)
+                    body = None
+                else:
+                    continue
+
+            if channel is None:
+                self._spool.guardar(body)
+                continue
+            try:
+                if body is not None:
+                    self._enviar(channel, body)
+                if self._pendientes.empty() and self._spool.hay_pendientes():
+                    self._reenviar_spool(channel)
+            except (pika.exceptions.UnroutableError, pika.exceptions.NackError) as e:
+                logger.error("El broker rechazó el evento de auditoría: %s", e)
+            except Exception as e:
+                logger.warning("Error publicando evento de auditoría, se guarda en el spool: %s", e)
+                if body is not None:
+                    self._spool.guardar(body)
+                connection, channel = None, None
+
+
+publicador = PublicadorAuditoria(_SpoolAuditoria(AUDIT_SPOOL_PATH), AUDIT_PUBLISHER_QUEUE_SIZE)
+
 
 def enviar_evento_auditoria(user_data, action, entity, entity_id, description, metadata=None):
     """
-    Envía un evento de auditoría al microservicio de Auditoría.
+    Envía un evento de auditoría al microservicio de Auditoría a través de RabbitMQ.
+    El evento se publica en segundo plano, por lo que la petición nunca espera al broker.
     """
     try:
         payload = {
+            'timestamp': datetime.now().isoformat(),
             'user_id': str(user_data.get('id') or user_data.get('username') or 'unknown'),
             'audited_service_id': 'pedidos',
             'action': action,
@@ -17,7 +196,8 @@ def enviar_evento_auditoria(user_data, action, entity, entity_id, description, m
             'entity_id': str(entity_id),
             'metadata': metadata or {},
         }
-        resp = requests.post(f"{AUDITORIA_URL}/audit-logs/", json=payload, timeout=5)
-        return resp.status_code in (200, 201)
-    except requests.RequestException:
+        publicador.publicar(payload)
+        return True
+    except Exception as e:
+        logger.error("No fue posible encolar el evento de auditoría: %s", e)
         return False
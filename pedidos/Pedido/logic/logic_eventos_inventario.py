@@ -0,0 +1,87 @@
+"""
+Escucha los eventos de auditoría que publica inventario y elimina de la cache local
+los productos y bodegas que fueron creados, actualizados o eliminados.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import pika
+
+from Pedido.logic.logic_inventario import invalidar_cache
+
+logger = logging.getLogger(__name__)
+
+RABBITMQ_HOST = os.getenv('RABBITMQ_HOST', 'rabbitmq')
+RABBITMQ_USER = os.getenv('RABBITMQ_USER', 'admin')
+RABBITMQ_PASS = os.getenv('RABBITMQ_PASS', 'admin')
+# Exchange topic en el que inventario publica sus eventos con routing key SERVICIO.ENTIDAD.ACCION
+AUDIT_EXCHANGE = 'auditoria'
+INVENTARIO_EVENTOS_RETRY_SECONDS = float(os.getenv('INVENTARIO_EVENTOS_RETRY_SECONDS', '5'))
+
+# Entidad del evento -> entidad de la cache
+ENTIDADES_CACHE = {
+    'PRODUCTO': 'producto',
+    'BODEGA': 'bodega',
+}
+ACCIONES_INVALIDACION = ('CREATE', 'UPDATE', 'DELETE')
+
+
+class EscuchaEventosInventario:
+    """
+    Hilo en segundo plano con una cola exclusiva (se borra al desconectarse) enlazada al
+    exchange de auditoría. Cada proceso de pedidos tiene la suya, así todos invalidan su cache.
+    """
+
+    def __init__(self):
+        self._hilo = None
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        if self._hilo is not None and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._escuchar, name='inventario-eventos', daemon=True)
+                self._hilo.start()
+
+    def _conectar(self):
+        credentials = pika.PlainCredentials(RABBITMQ_USER, RABBITMQ_PASS)
+        connection = pika.BlockingConnection(pika.ConnectionParameters(
+            host=RABBITMQ_HOST,
+            credentials=credentials,
+            heartbeat=30
+        ))
+        channel = connection.channel()
+        channel.exchange_declare(exchange=AUDIT_EXCHANGE, exchange_type='topic', durable=True)
+        cola = channel.queue_declare(queue='', exclusive=True).method.queue
+        for entidad in ENTIDADES_CACHE:
+            for accion in ACCIONES_INVALIDACION:
+                channel.queue_bind(queue=cola, exchange=AUDIT_EXCHANGE, routing_key=f"INVENTARIO.{entidad}.{accion}")
+        return connection, channel, cola
+
+    def _procesar(self, body):
+        try:
+            evento = json.loads(body)
+        except ValueError:
+            logger.warning("Evento de inventario inválido: %s", body)
+            return
+        entidad = ENTIDADES_CACHE.get(evento.get('entity'))
+        if entidad and evento.get('action') in ACCIONES_INVALIDACION and evento.get('entity_id'):
+            invalidar_cache(entidad, evento['entity_id'])
+
+    def _escuchar(self):
+        while True:
+            try:
+                connection, channel, cola = self._conectar()
+                for _, _, body in channel.consume(queue=cola, auto_ack=True):
+                    self._procesar(body)
+            except Exception as e:
+                # Mientras no hay conexión la cache depende solo del TTL
+                logger.warning("No fue posible escuchar eventos de inventario: %s", e)
+                time.sleep(INVENTARIO_EVENTOS_RETRY_SECONDS)
+
+
+escucha_eventos_inventario = EscuchaEventosInventario()
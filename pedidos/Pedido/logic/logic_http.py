@@ -0,0 +1,158 @@
+"""
+Cliente HTTP compartido para las llamadas de pedidos a otros microservicios.
+
+Reutiliza conexiones (keep-alive) con un pool por host, aplica timeouts por endpoint,
+reintenta con backoff las peticiones idempotentes, corta las llamadas con un circuit
+breaker cuando el servicio destino no está sano y registra un histograma de latencias.
+"""
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Límites superiores (ms) de los buckets del histograma de latencias
+BUCKETS_LATENCIA_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class CircuitoAbiertoError(requests.RequestException):
+    """El servicio destino está marcado como no disponible y la llamada no se realiza."""
+
+
+class _CircuitBreaker:
+    """
+    Abre el circuito tras `umbral_fallos` fallos consecutivos. Mientras está abierto las
+    llamadas fallan de inmediato; pasado `tiempo_abierto` deja pasar una llamada de prueba.
+    """
+
+    def __init__(self, umbral_fallos, tiempo_abierto):
+        self._umbral_fallos = umbral_fallos
+        self._tiempo_abierto = tiempo_abierto
+        self._fallos = 0
+        self._abierto_desde = None
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self._abierto_desde is None:
+                return True
+            if time.monotonic() - self._abierto_desde >= self._tiempo_abierto:
+                # Semiabierto: se permite una llamada de prueba y se vuelve a esperar si falla
+                self._abierto_desde = time.monotonic()
+                return True
+            return False
+
+    def registrar_exito(self):
+        with self._lock:
+            self._fallos = 0
+            self._abierto_desde = None
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            if self._fallos >= self._umbral_fallos:
+                self._abierto_desde = time.monotonic()
+
+    def estado(self):
+        with self._lock:
+            return {'abierto': self._abierto_desde is not None, 'fallos_consecutivos': self._fallos}
+
+
+class HistogramaLatencias:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_endpoint = {}
+
+    def registrar(self, endpoint, latencia_ms, exito):
+        with self._lock:
+            datos = self._por_endpoint.setdefault(endpoint, {
+                'llamadas': 0,
+                'errores': 0,
+                'suma_ms': 0.0,
+                'buckets': [0] * (len(BUCKETS_LATENCIA_MS) + 1),
+            })
+            datos['llamadas'] += 1
+            datos['suma_ms'] += latencia_ms
+            if not exito:
+                datos['errores'] += 1
+            indice = next((i for i, limite in enumerate(BUCKETS_LATENCIA_MS) if latencia_ms <= limite), len(BUCKETS_LATENCIA_MS))
+            datos['buckets'][indice] += 1
+
+    def resumen(self):
+        with self._lock:
+            etiquetas = [f"<={limite}ms" for limite in BUCKETS_LATENCIA_MS] + ['+Inf']
+            return {
+                endpoint: {
+                    'llamadas': datos['llamadas'],
+                    'errores': datos['errores'],
+                    'promedio_ms': round(datos['suma_ms'] / datos['llamadas'], 2),
+                    'buckets': dict(zip(etiquetas, datos['buckets'])),
+                }
+                for endpoint, datos in self._por_endpoint.items()
+            }
+
+
+class ClienteHTTP:
+    """
+    Cliente con una sesión de requests compartida por todos los hilos del proceso.
+
+    Args:
+        base_url: URL base del servicio destino
+        timeouts: diccionario endpoint -> (timeout de conexión, timeout de lectura)
+        timeout_por_defecto: timeout para endpoints sin entrada en `timeouts`
+    """
+
+    def __init__(self, base_url, timeouts=None, timeout_por_defecto=(2, 5), pool_size=20,
+                 reintentos=2, backoff=0.2, umbral_fallos=5, tiempo_abierto=30):
+        self.base_url = base_url.rstrip('/')
+        self._timeouts = timeouts or {}
+        self._timeout_por_defecto = timeout_por_defecto
+        self._circuito = _CircuitBreaker(umbral_fallos, tiempo_abierto)
+        self._histograma = HistogramaLatencias()
+
+        # Solo se reintentan métodos idempotentes (GET, HEAD...) ante errores de conexión o 502/503/504
+        retry = Retry(total=reintentos, backoff_factor=backoff, status_forcelist=(502, 503, 504), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+
+    def request(self, metodo, endpoint, path, timeout: Optional[tuple] = None, **kwargs):
+        """
+        Ejecuta una petición contra `path`. `endpoint` es el nombre lógico usado para el
+        timeout y las métricas. Lanza CircuitoAbiertoError (un RequestException) si el
+        circuito está abierto.
+        """
+        if not self._circuito.permitir():
+            raise CircuitoAbiertoError(f"Circuito abierto hacia {self.base_url}")
+
+        timeout = timeout or self._timeouts.get(endpoint, self._timeout_por_defecto)
+        inicio = time.perf_counter()
+        try:
+            response = self._session.request(metodo, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+        except requests.RequestException:
+            self._histograma.registrar(endpoint, (time.perf_counter() - inicio) * 1000, exito=False)
+            self._circuito.registrar_fallo()
+            raise
+
+        exito = response.status_code < 500
+        self._histograma.registrar(endpoint, (time.perf_counter() - inicio) * 1000, exito=exito)
+        if exito:
+            self._circuito.registrar_exito()
+        else:
+            self._circuito.registrar_fallo()
+        return response
+
+    def get(self, endpoint, path, **kwargs):
+        return self.request('GET', endpoint, path, **kwargs)
+
+    def post(self, endpoint, path, **kwargs):
+        return self.request('POST', endpoint, path, **kwargs)
+
+    def delete(self, endpoint, path, **kwargs):
+        return self.request('DELETE', endpoint, path, **kwargs)
+
+    def metricas(self):
+        return {'circuito': self._circuito.estado(), 'latencias': self._histograma.resumen()}
@@ -1,16 +1,77 @@
+import os
+import time
 import requests
 from django.conf import settings
+from django.core.cache import caches
 from typing import Optional
 import logging
+from Pedido.logic.logic_http import ClienteHTTP
 
 logger = logging.getLogger(__name__)
 
 # Usar la URL directa del microservicio de inventario
 INVENTARIO_URL = getattr(settings, 'INVENTARIO_URL', 'http://inventario:8000')
 
+# Cliente compartido con keep-alive, reintentos y circuit breaker hacia inventario.
+# Timeouts (conexión, lectura) en segundos por endpoint.
+cliente_inventario = ClienteHTTP(
+    INVENTARIO_URL,
+    timeouts={
+        'bodegas': (2, 10),
+        'bodega': (2, 3),
+        'item': (2, 3),
+        'producto': (2, 3),
+        'items_disponibles': (2, 5),
+        'disponibilidad': (2, 10),
+        'productos': (2, 10),
+        'crear_producto': (2, 5),
+        'reservas': (2, 10),
+    },
+    pool_size=int(os.getenv('INVENTARIO_POOL_SIZE', '20')),
+    reintentos=int(os.getenv('INVENTARIO_REINTENTOS', '2')),
+    umbral_fallos=int(os.getenv('INVENTARIO_CIRCUIT_FALLOS', '5')),
+    tiempo_abierto=float(os.getenv('INVENTARIO_CIRCUIT_SEGUNDOS', '30')),
+)
+
+# Cache de lectura para productos y bodegas. Usa un backend de CACHES (LocMemCache con
+# MAX_ENTRIES hace desalojo LRU; puede cambiarse por uno compartido como Redis).
+# Las entradas expiran por TTL y se invalidan con los eventos de inventario (ver logic_eventos_inventario).
+INVENTARIO_CACHE_ALIAS = getattr(settings, 'INVENTARIO_CACHE_ALIAS', 'default')
+INVENTARIO_CACHE_TTL = int(os.getenv('INVENTARIO_CACHE_TTL', '300'))
+
+# Intentos para confirmar una reserva ante errores de conexión o respuestas 5xx
+CONFIRMACION_RESERVA_INTENTOS = int(os.getenv('CONFIRMACION_RESERVA_INTENTOS', '3'))
+
+
+def _clave_cache(entidad, identificador):
+    return f"inventario:{entidad}:{identificador}"
+
+
+def _leer_cache(entidad, identificador):
+    # Se importa aquí para evitar el import circular con el módulo de eventos
+    from Pedido.logic.logic_eventos_inventario import escucha_eventos_inventario
+    escucha_eventos_inventario.iniciar()
+    return caches[INVENTARIO_CACHE_ALIAS].get(_clave_cache(entidad, identificador))
+
+
+def _guardar_cache(entidad, identificador, valor):
+    # Inventario responde 200 con {"codigo": "ERROR"} cuando el producto no existe; eso no se guarda
+    if isinstance(valor, dict) and valor.get('codigo') == 'ERROR':
+        return
+    caches[INVENTARIO_CACHE_ALIAS].set(_clave_cache(entidad, identificador), valor, INVENTARIO_CACHE_TTL)
+
+
+def invalidar_cache(entidad, identificador):
+    """
+    Elimina de la cache la entrada de un producto o bodega.
+    entidad: 'producto' o 'bodega'
+    """
+    caches[INVENTARIO_CACHE_ALIAS].delete(_clave_cache(entidad, identificador))
+
+
 def get_bodegas(headers: Optional[dict] = None):
     try:
-        response = requests.get(f"{INVENTARIO_URL}/bodegas/", headers=headers)
+        response = cliente_inventario.get('bodegas', "/bodegas/", headers=headers)
         if response.status_code == 200:
             data = response.json()
             if isinstance(data, dict) and data.get('codigo') == 'ERROR':
@@ -23,9 +84,9 @@ def get_bodegas(headers: Optional[dict] = None):
 
 def get_item(sku, headers: Optional[dict] = None):
     try:
-        url = f"{INVENTARIO_URL}/items/sku/{sku}"
+        url = f"/items/sku/{sku}"
         logger.info(f"Consultando item en: {url} con headers: {headers}")
-        response = requests.get(url, headers=headers, timeout=5)
+        response = cliente_inventario.get('item', url, headers=headers)
         logger.info(f"Respuesta de inventario: status={response.status_code}, headers={response.headers}")
         logger.info(f"Respuesta body: {response.text}")
         if response.status_code == 200:
@@ -38,14 +99,19 @@ def get_item(sku, headers: Optional[dict] = None):
         return None
 
 def get_producto(producto_codigo, headers: Optional[dict] = None):
+    producto = _leer_cache('producto', producto_codigo)
+    if producto is not None:
+        return producto
     try:
-        response = requests.get(
-            f"{INVENTARIO_URL}/productos/{producto_codigo}",
-            headers=headers,
-            timeout=5
+        response = cliente_inventario.get(
+            'producto',
+            f"/productos/{producto_codigo}",
+            headers=headers
         )
         if response.status_code == 200:
-            return response.json()
+            producto = response.json()
+            _guardar_cache('producto', producto_codigo, producto)
+            return producto
         if response.status_code == 404:
             return None
         logger.error(
@@ -61,10 +127,15 @@ def get_producto(producto_codigo, headers: Optional[dict] = None):
 
 
 def get_bodega(bodega_id, headers: Optional[dict] = None):
+    bodega = _leer_cache('bodega', bodega_id)
+    if bodega is not None:
+        return bodega
     try:
-        response = requests.get(f"{INVENTARIO_URL}/bodegas/{bodega_id}", headers=headers, timeout=5)
+        response = cliente_inventario.get('bodega', f"/bodegas/{bodega_id}", headers=headers)
         if response.status_code == 200:
-            return response.json()
+            bodega = response.json()
+            _guardar_cache('bodega', bodega_id, bodega)
+            return bodega
         else:
             logger.error(f"Error obteniendo bodega {bodega_id}: {response.status_code}")
             return None
@@ -73,24 +144,31 @@ def get_bodega(bodega_id, headers: Optional[dict] = None):
         return None
 
 
-def get_items_disponibles_por_producto(producto_codigo, bodega_id, headers: Optional[dict] = None):
-    """Obtiene el listado de items disponibles para un producto en una bodega."""
+def get_items_disponibles_por_producto(producto_codigo, bodega_id, minimo: Optional[int] = None, headers: Optional[dict] = None):
+    """
+    Obtiene la cantidad de items disponibles para un producto en una bodega.
+    inventario la lee de su contador de disponibilidad, sin contar items. Si se indica
+    minimo, la respuesta además trae el campo suficiente; la cantidad no depende de minimo.
+    """
     try:
         params = {
             "codigo_barras": producto_codigo,
-            "bodega_id": bodega_id
+            "bodega_id": bodega_id,
+            "solo_conteo": "true"
         }
-        response = requests.get(
-            f"{INVENTARIO_URL}/items/itemsDisponibles",
+        if minimo is not None:
+            params["minimo"] = minimo
+        response = cliente_inventario.get(
+            'items_disponibles',
+            "/items/itemsDisponibles",
             headers=headers,
-            params=params,
-            timeout=5
+            params=params
         )
         if response.status_code == 200:
             data = response.json()
-            return data.get("items_disponibles", [])
+            return data.get("cantidad_disponible", 0)
         logger.error(
-            "Error obteniendo items disponibles para producto %s en bodega %s: %s - %s",
+            "Error obteniendo cantidad de items disponibles para producto %s en bodega %s: %s - %s",
             producto_codigo,
             bodega_id,
             response.status_code,
@@ -105,3 +183,116 @@ def get_items_disponibles_por_producto(producto_codigo, bodega_id, headers: Opti
             str(e)
         )
         return None
+
+
+def get_disponibilidad_productos(bodega_id, productos, headers: Optional[dict] = None):
+    """
+    Consulta en una sola llamada la existencia y disponibilidad de varios productos en una bodega.
+
+    Args:
+        bodega_id: identificador de la bodega
+        productos: lista de diccionarios con 'producto' (código de barras) y 'cantidad'
+
+    Returns:
+        dict o None: disponibilidad por código de barras, o None si inventario no respondió
+    """
+    try:
+        payload = {
+            "bodega_id": str(bodega_id),
+            "productos": [
+                {"codigo_barras": p['producto'], "cantidad": p['cantidad']}
+                for p in productos
+            ]
+        }
+        response = cliente_inventario.post(
+            'disponibilidad',
+            "/items/disponibilidad",
+            headers=headers,
+            json=payload
+        )
+        if response.status_code == 200:
+            data = response.json()
+            return {p['codigo_barras']: p for p in data.get("productos", [])}
+        logger.error(
+            "Error consultando disponibilidad en bodega %s: %s - %s",
+            bodega_id,
+            response.status_code,
+            response.text
+        )
+        return None
+    except requests.RequestException as e:
+        logger.error("Error conectando a inventario para disponibilidad en bodega %s: %s", bodega_id, str(e))
+        return None
+
+
+def reservar_items(bodega_id, productos, headers: Optional[dict] = None):
+    """
+    Reserva en inventario items disponibles para los productos solicitados.
+
+    Args:
+        bodega_id: identificador de la bodega
+        productos: lista de diccionarios con 'producto' (código de barras) y 'cantidad'
+
+    Returns:
+        tuple: (reserva, error). reserva tiene 'reserva_id', 'skus' y 'expira'; error es
+        el mensaje a mostrar si no se pudo reservar.
+    """
+    try:
+        payload = {
+            "bodega_id": str(bodega_id),
+            "productos": [
+                {"codigo_barras": p['producto'], "cantidad": p['cantidad']}
+                for p in productos
+            ]
+        }
+        response = cliente_inventario.post('reservas', "/reservas/", headers=headers, json=payload)
+        if response.status_code == 201:
+            return response.json(), None
+        if response.status_code == 409:
+            return None, response.json().get('detail')
+        logger.error("Error reservando items en bodega %s: %s - %s", bodega_id, response.status_code, response.text)
+    except requests.RequestException as e:
+        logger.error("Error conectando a inventario para reservar items en bodega %s: %s", bodega_id, str(e))
+    return None, f"No fue posible reservar los items del pedido en la bodega {bodega_id}"
+
+
+def confirmar_reserva(reserva_id, pedido_id, headers: Optional[dict] = None):
+    """
+    Confirma una reserva para que no expire. Retorna True si inventario la confirmó.
+
+    Ante errores de conexión o 5xx se reintenta hasta CONFIRMACION_RESERVA_INTENTOS veces;
+    inventario responde con éxito si la reserva ya estaba confirmada para el mismo pedido.
+    Una respuesta 4xx (reserva vencida o liberada) no se reintenta.
+    """
+    for intento in range(1, CONFIRMACION_RESERVA_INTENTOS + 1):
+        try:
+            response = cliente_inventario.post(
+                'reservas',
+                f"/reservas/{reserva_id}/confirmar",
+                headers=headers,
+                json={"pedido_id": str(pedido_id)}
+            )
+            if response.status_code == 200:
+                return True
+            logger.error("Error confirmando reserva %s (intento %s): %s - %s",
+                         reserva_id, intento, response.status_code, response.text)
+            if response.status_code < 500:
+                return False
+        except requests.RequestException as e:
+            logger.error("Error conectando a inventario para confirmar reserva %s (intento %s): %s",
+                         reserva_id, intento, str(e))
+        if intento < CONFIRMACION_RESERVA_INTENTOS:
+            time.sleep(0.2 * intento)
+    return False
+
+
+def liberar_reserva(reserva_id, headers: Optional[dict] = None):
+    """
+    Libera una reserva que no se va a usar. Si falla, inventario la libera al expirar.
+    """
+    try:
+        response = cliente_inventario.delete('reservas', f"/reservas/{reserva_id}", headers=headers)
+        if response.status_code not in (204, 404):
+            logger.error("Error liberando reserva %s: %s - %s", reserva_id, response.status_code, response.text)
+    except requests.RequestException as e:
+        logger.error("Error conectando a inventario para liberar reserva %s: %s", reserva_id, str(e))
@@ -1,9 +1,18 @@
 import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 logger = logging.getLogger(__name__)
+from Pedido.logic.logic_http import HistogramaLatencias
 from Pedido.logic.logic_inventario import (
+    confirmar_reserva,
     get_bodega,
+    get_disponibilidad_productos,
     get_items_disponibles_por_producto,
     get_producto,
+    liberar_reserva,
+    reservar_items,
 )
 from Pedido.logic.logic_factura import crear_factura_para_pedido
 from Pedido.logic.logic_usuario import verificar_permiso_rol, obtener_operario
@@ -13,6 +22,16 @@ from Pedido.serializers import PedidoCreateSerializer, PedidoSerializer
 from rest_framework import status
 from rest_framework.response import Response
 
+# 'lote' usa el endpoint de disponibilidad de inventario; 'paralelo' y 'serial' validan producto por producto
+VALIDACION_PRODUCTOS_MODO = os.getenv('VALIDACION_PRODUCTOS_MODO', 'lote')
+VALIDACION_PRODUCTOS_HILOS = int(os.getenv('VALIDACION_PRODUCTOS_HILOS', '8'))
+
+# Límites superiores de los rangos de tamaño de pedido usados en las métricas de validación
+RANGOS_TAMANO_PEDIDO = (1, 5, 10, 25, 50)
+
+# Latencia de la validación de productos por modo y tamaño de pedido
+metricas_validacion = HistogramaLatencias()
+
 
 def obtener_pedido(id : int):
     try:
@@ -20,6 +39,17 @@ def obtener_pedido(id : int):
         return pedido
     except Pedido.DoesNotExist:
         return None
+
+
+def obtener_pedido_para_integridad(id : int):
+    """
+    Obtiene un pedido con la factura y los productos solicitados ya cargados,
+    de modo que calcular o verificar su hash no haga consultas adicionales.
+    """
+    try:
+        return Pedido.objects.select_related('factura').prefetch_related('productos_solicitados').get(id = id)
+    except Pedido.DoesNotExist:
+        return None
     
 
 def registrar_pedido(data: dict) -> Pedido:
@@ -62,10 +92,38 @@ def procesar_creacion_pedido_completa(request):
             
             return Response({'error': error_msg, 'codigo': codigo, 'campos_faltantes': campos_faltantes}, status=status.HTTP_400_BAD_REQUEST)
         
+        # Reservar en inventario los items del pedido para que otro pedido no los tome
+        reserva, error_reserva = reservar_items(
+            pedido_data['bodega_id'],
+            pedido_data['productos_solicitados'],
+            headers=inv_headers
+        )
+        if error_reserva:
+            return Response({'error': error_reserva, 'codigo': 'INVENTORY_ERROR', 'campos_faltantes': [error_reserva]}, status=status.HTTP_400_BAD_REQUEST)
+        pedido_data['items'] = reserva['skus']
+
         #Crear pedido
         success_response, error_response = crear_pedido_logica(pedido_data, user_data)
         if error_response:
+            liberar_reserva(reserva['reserva_id'], headers=inv_headers)
             return error_response
+        pedido_id = success_response.data['pedido']['id']
+        if not confirmar_reserva(reserva['reserva_id'], pedido_id, headers=inv_headers):
+            # Sin reserva confirmada sus items volverían a estar disponibles y podrían venderse
+            # dos veces, así que el pedido se revierte
+            logger.error("La reserva %s del pedido %s no pudo confirmarse; se revierte el pedido", reserva['reserva_id'], pedido_id)
+            Pedido.objects.filter(id=pedido_id).delete()
+            liberar_reserva(reserva['reserva_id'], headers=inv_headers)
+            enviar_evento_auditoria(
+                user_data,
+                action="DELETE",
+                entity="PEDIDO",
+                entity_id=pedido_id,
+                description="Pedido revertido: la reserva de inventario no pudo confirmarse",
+                metadata={"reserva_id": reserva['reserva_id']}
+            )
+            error = "No fue posible confirmar la reserva de inventario del pedido; el pedido no se creó"
+            return Response({'error': error, 'codigo': 'INVENTORY_ERROR', 'campos_faltantes': [error]}, status=status.HTTP_409_CONFLICT)
         return success_response
         
     except Exception as e:
@@ -104,6 +162,103 @@ def crear_pedido_logica(pedido_data, user_data):
         return None, Response({'error': f'Error interno del servidor: {str(e)}','codigo': 'INTERNAL_ERROR'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _rango_tamano_pedido(cantidad_productos):
+    anterior = 0
+    for limite in RANGOS_TAMANO_PEDIDO:
+        if cantidad_productos <= limite:
+            return str(limite) if limite - anterior == 1 else f"{anterior + 1}-{limite}"
+        anterior = limite
+    return f"{anterior + 1}+"
+
+
+def _sumar_cantidades_por_producto(productos):
+    """
+    Une las líneas del mismo producto sumando sus cantidades, en el orden de la solicitud,
+    para que la disponibilidad se valide contra el total pedido de cada producto.
+    """
+    cantidades = {}
+    for producto in productos:
+        cantidades[producto['producto']] = cantidades.get(producto['producto'], 0) + producto['cantidad']
+    return [{'producto': codigo, 'cantidad': cantidad} for codigo, cantidad in cantidades.items()]
+
+
+def _validar_productos_en_lote(productos, bodega_id, inv_headers):
+    """
+    Valida existencia y disponibilidad de todos los productos en una sola consulta a inventario.
+    Retorna la lista de errores, o None si inventario no pudo responder la consulta.
+    """
+    disponibilidad = get_disponibilidad_productos(bodega_id, productos, headers=inv_headers)
+    if disponibilidad is None:
+        return None
+
+    for producto in productos:
+        producto_codigo = producto['producto']
+        producto_disponibilidad = disponibilidad.get(producto_codigo)
+        if not producto_disponibilidad or not producto_disponibilidad.get('existe'):
+            return [f"Producto con código {producto_codigo} no existe"]
+
+        disponibles = producto_disponibilidad.get('disponibles', 0)
+        if disponibles < producto['cantidad']:
+            return [
+                f"No hay suficientes items disponibles del producto {producto_codigo} en la bodega {bodega_id}. "
+                f"Solicitado {producto['cantidad']}, disponibles {disponibles}"
+            ]
+    return []
+
+
+def _validar_producto(producto, bodega_id, inv_headers):
+    """
+    Valida un producto solicitado contra inventario. Retorna el mensaje de error o None.
+    """
+    producto_codigo = producto['producto']
+    if not get_producto(producto_codigo, headers=inv_headers):
+        return f"Producto con código {producto_codigo} no existe"
+
+    disponibles = get_items_disponibles_por_producto(
+        producto_codigo,
+        bodega_id,
+        minimo=producto['cantidad'],
+        headers=inv_headers
+    )
+    if disponibles is None:
+        return f"No fue posible validar la disponibilidad del producto {producto_codigo} en la bodega {bodega_id}"
+
+    if disponibles < producto['cantidad']:
+        return (
+            f"No hay suficientes items disponibles del producto {producto_codigo} en la bodega {bodega_id}. "
+            f"Solicitado {producto['cantidad']}, disponibles {disponibles}"
+        )
+    return None
+
+
+def _validar_productos_individualmente(productos, bodega_id, inv_headers, paralelo=True):
+    """
+    Valida cada producto con sus propias consultas a inventario.
+
+    En modo paralelo las consultas se reparten en un pool de hilos acotado. Los resultados
+    se recorren en el orden de la solicitud, así que el error reportado es siempre el del
+    primer producto inválido, igual que en la validación serial.
+    """
+    if not paralelo or len(productos) <= 1:
+        for producto in productos:
+            error = _validar_producto(producto, bodega_id, inv_headers)
+            if error:
+                return [error]
+        return []
+
+    hilos = min(VALIDACION_PRODUCTOS_HILOS, len(productos))
+    executor = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='validacion-productos')
+    try:
+        resultados = executor.map(lambda producto: _validar_producto(producto, bodega_id, inv_headers), productos)
+        for error in resultados:
+            if error:
+                return [error]
+        return []
+    finally:
+        # Al encontrar un error no se esperan ni se lanzan las consultas que falten
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def validar_datos_pedido(request_data, inv_headers=None):
     """Valida que los datos del pedido sean consistentes usando el microservicio de inventario."""
 
@@ -160,33 +315,29 @@ def validar_datos_pedido(request_data, inv_headers=None):
         return None, [f"Bodega con ID {bodega_seleccionada_id} no existe"]
 
     # Validar productos y disponibilidad
-    import time 
-    tiempo_actual = time.time()
-    for producto in productos_solicitados_data:
-        producto_codigo = producto['producto']
-        producto_data = get_producto(producto_codigo, headers=inv_headers)
-        if not producto_data:
-            return None, [f"Producto con código {producto_codigo} no existe"]
-
-        inventario_items = get_items_disponibles_por_producto(
-            producto_codigo,
+    productos_a_validar = _sumar_cantidades_por_producto(productos_solicitados_data)
+    modo = VALIDACION_PRODUCTOS_MODO
+    inicio = time.perf_counter()
+    if modo == 'lote':
+        errores = _validar_productos_en_lote(productos_a_validar, bodega_seleccionada_id, inv_headers)
+        if errores is None:
+            # Inventario sin endpoint de disponibilidad o con error: se valida producto por producto
+            modo = 'paralelo'
+            inicio = time.perf_counter()
+    if modo != 'lote':
+        errores = _validar_productos_individualmente(
+            productos_a_validar,
             bodega_seleccionada_id,
-            headers=inv_headers
+            inv_headers,
+            paralelo=(modo == 'paralelo')
         )
-
-        if inventario_items is None:
-            return None, [
-                f"No fue posible validar la disponibilidad del producto {producto_codigo} en la bodega {bodega_seleccionada_id}"
-            ]
-
-        disponibles = len(inventario_items)
-        if disponibles < producto['cantidad']:
-            return None, [
-                f"No hay suficientes items disponibles del producto {producto_codigo} en la bodega {bodega_seleccionada_id}. "
-                f"Solicitado {producto['cantidad']}, disponibles {disponibles}"
-            ]
-    tiempo_final = time.time()
-    logger.debug(f"Tiempo de validación: {(tiempo_final - tiempo_actual)*1000} milisegundos")
+    metricas_validacion.registrar(
+        f"{modo}/{_rango_tamano_pedido(len(productos_solicitados_data))}",
+        (time.perf_counter() - inicio) * 1000,
+        exito=not errores
+    )
+    if errores:
+        return None, errores
     return pedido_data, []
 
 
@@ -195,7 +346,9 @@ def actualizar_estado_pedido(pedido_id, nuevo_estado):
     Actualiza el estado de un pedido usando la instancia
     """
     try:
-        pedido = Pedido.objects.get(id=pedido_id)
+        pedido = obtener_pedido_para_integridad(pedido_id)
+        if pedido is None:
+            return None, "Pedido no encontrado"
         
         # Validar transición de estado (opcional)
         #Esto hay que usarlo eventualmente porque no debería de poder pasar un pedido
@@ -218,8 +371,6 @@ def actualizar_estado_pedido(pedido_id, nuevo_estado):
         
         return pedido, None
         
-    except Pedido.DoesNotExist:
-        return None, "Pedido no encontrado"
     except Exception as e:
         return None, f"Error actualizando pedido: {str(e)}"
     
@@ -260,7 +411,6 @@ def actualizar_estado_pedido_api(request):
                     'error': 'Se requieren datos_factura cuando el nuevo estado es "Empacado x despachar"',
                     'codigo': 'FACTURA_DATA_REQUIRED'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            pedido = Pedido.objects.get(id=pedido_id)
             # Validar campos requeridos de la factura
             campos_factura_requeridos = ['costo_total', 'metodo_pago', 'num_cuenta', 'comprobante']
             campos_faltantes = [campo for campo in campos_factura_requeridos if not datos_factura.get(campo)]
@@ -271,7 +421,24 @@ def actualizar_estado_pedido_api(request):
                     'error': f'Campos faltantes en datos_factura: {", ".join(campos_faltantes)}',
                     'codigo': 'MISSING_FACTURA_FIELDS'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            
+
+        # Verificar permisos para otros cambios de estado
+        tiene_permisos, mensaje = verificar_permiso_rol(user_data, ['JefeBodega', 'Operario', 'Vendedor'])
+        if not tiene_permisos:
+            return Response({
+                'error': mensaje,
+                'codigo': 'INSUFFICIENT_PERMISSIONS'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        # Cargar el pedido una sola vez con la factura y los productos que usa el hash
+        pedido = obtener_pedido_para_integridad(pedido_id)
+        if pedido is None:
+            return Response({
+                'error': 'Pedido no encontrado',
+                'codigo': 'UPDATE_ERROR'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if nuevo_estado == "Empacado x despachar":
             factura, error_factura = crear_factura_para_pedido(pedido, datos_factura)
             
             if error_factura:
@@ -281,18 +448,8 @@ def actualizar_estado_pedido_api(request):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             pedido.factura = factura
-            pedido.save()
-
-        # Verificar permisos para otros cambios de estado
-        tiene_permisos, mensaje = verificar_permiso_rol(user_data, ['JefeBodega', 'Operario', 'Vendedor'])
-        if not tiene_permisos:
-            return Response({
-                'error': mensaje,
-                'codigo': 'INSUFFICIENT_PERMISSIONS'
-            }, status=status.HTTP_403_FORBIDDEN)
 
-        # Aplicar cambio de estado
-        pedido = Pedido.objects.get(id=pedido_id)
+        # Aplicar cambio de estado (y factura, si aplica) en un solo UPDATE
         estado_anterior = pedido.estado
         pedido.estado = nuevo_estado
         pedido.save()
@@ -311,15 +468,6 @@ def actualizar_estado_pedido_api(request):
             }
         )
         
-        # Actualizar
-        pedido, error = actualizar_estado_pedido(pedido_id, nuevo_estado)
-        
-        if error:
-            return Response({
-                'error': error,
-                'codigo': 'UPDATE_ERROR'
-            }, status=status.HTTP_400_BAD_REQUEST)
-        
         # Serializar respuesta
         serializer = PedidoSerializer(pedido)
         return Response({
@@ -346,12 +494,10 @@ def verificar_integridad_pedido(request_data):
                 'error': 'pedido_id es requerido',
                 'codigo': 'MISSING_FIELDS'
             }, status=status.HTTP_400_BAD_REQUEST)
-    pedido = Pedido.objects.get(id=pedido_id)
+    pedido = obtener_pedido_para_integridad(pedido_id)
     if pedido:
-        print("entro a donde era")
         return pedido.verificar_integridad()
     else:
-        print("entro al else")
         return False
     
 def consultar_pedido_por_id(request, id_pedido):
@@ -366,7 +512,7 @@ def consultar_pedido_por_id(request, id_pedido):
                 'codigo': 'INSUFFICIENT_PERMISSIONS'
             }, status=status.HTTP_403_FORBIDDEN)
         
-        pedido = Pedido.objects.get(id=id_pedido)
+        pedido = obtener_pedido_para_integridad(id_pedido)
 
         if pedido:
             verificado = pedido.verificar_integridad()
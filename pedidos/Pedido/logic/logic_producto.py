@@ -2,15 +2,15 @@ import logging
 from typing import Optional
 
 import requests
-from django.conf import settings
 
-INVENTARIO_URL = getattr(settings, 'INVENTARIO_URL', 'http://inventario:8000')
+from Pedido.logic.logic_inventario import cliente_inventario, invalidar_cache
+
 logger = logging.getLogger(__name__)
 
 
 def obtener_productos(headers: Optional[dict] = None):
     try:
-        response = requests.get(f"{INVENTARIO_URL}/productos/", headers=headers, timeout=5)
+        response = cliente_inventario.get('productos', "/productos/", headers=headers)
         if response.status_code == 200:
             return response.json()
         logger.error("No se pudieron obtener productos: %s - %s", response.status_code, response.text)
@@ -21,13 +21,15 @@ def obtener_productos(headers: Optional[dict] = None):
 
 def registrar_producto(data: dict, headers: Optional[dict] = None):
     try:
-        response = requests.post(
-            f"{INVENTARIO_URL}/productos/",
+        response = cliente_inventario.post(
+            'crear_producto',
+            "/productos/",
             json=data,
             headers=headers,
-            timeout=5,
         )
         if response.status_code in (200, 201):
+            # No esperar al evento de inventario para dejar de usar una entrada anterior
+            invalidar_cache('producto', data.get('codigo_barras'))
             return response.json()
         raise ValueError(response.json().get('message') or response.text)
     except requests.RequestException as exc:
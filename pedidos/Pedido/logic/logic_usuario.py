@@ -6,6 +6,10 @@ contra el servicio externo de usuarios (vía Kong)
 import requests
 import os
 import jwt
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
@@ -13,6 +17,104 @@ from functools import wraps
 
 USERS_SERVICE_URL = getattr(settings, 'USERS_SERVICE_URL', 'http://usuarios:8081/usuarios')
 
+# Cache de tokens validados: TTL máximo (acotado por el exp del token) y número máximo de entradas
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', '300'))
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv('TOKEN_CACHE_MAX_ENTRIES', '10000'))
+# Cada cuánto se refrescan en segundo plano las llaves públicas (JWKS) de Auth0
+JWKS_REFRESH_SECONDS = int(os.getenv('JWKS_REFRESH_SECONDS', '600'))
+
+
+class _CacheTokens:
+    """
+    Cache LRU en memoria de tokens ya validados, indexada por el hash del token.
+    Cada entrada expira al cumplirse el TTL o el exp del token, lo que ocurra primero.
+    """
+
+    def __init__(self, ttl, max_entradas):
+        self._ttl = ttl
+        self._max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    @staticmethod
+    def _llave(token):
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def obtener(self, token):
+        llave = self._llave(token)
+        with self._lock:
+            entrada = self._entradas.get(llave)
+            if entrada is None or entrada[1] <= time.time():
+                if entrada is not None:
+                    del self._entradas[llave]
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(llave)
+            self.aciertos += 1
+            return entrada[0]
+
+    def guardar(self, token, user_data, exp=None):
+        expira_en = time.time() + self._ttl
+        if exp is not None:
+            expira_en = min(expira_en, exp)
+        if expira_en <= time.time():
+            return
+        llave = self._llave(token)
+        with self._lock:
+            self._entradas[llave] = (user_data, expira_en)
+            self._entradas.move_to_end(llave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+
+    def estadisticas(self):
+        with self._lock:
+            return {'aciertos': self.aciertos, 'fallos': self.fallos, 'entradas': len(self._entradas)}
+
+
+_cache_tokens = _CacheTokens(TOKEN_CACHE_TTL, TOKEN_CACHE_MAX_ENTRIES)
+_jwks_client = None
+_jwks_lock = threading.Lock()
+
+
+def _refrescar_jwks_periodicamente(jwks_client):
+    while True:
+        time.sleep(JWKS_REFRESH_SECONDS)
+        try:
+            jwks_client.get_jwk_set(refresh=True)
+        except Exception:
+            # Si Auth0 no responde se conservan las llaves en cache hasta el siguiente intento
+            pass
+
+
+def _get_jwks_client():
+    """
+    Retorna el cliente JWKS compartido por todo el proceso.
+    Al crearlo arranca un hilo que refresca las llaves en segundo plano.
+    """
+    global _jwks_client
+    if _jwks_client is None:
+        with _jwks_lock:
+            if _jwks_client is None:
+                jwks_url = f"https://{os.getenv('AUTHZ_DOMAIN')}/.well-known/jwks.json"
+                _jwks_client = jwt.PyJWKClient(jwks_url, cache_keys=True, lifespan=JWKS_REFRESH_SECONDS * 2)
+                threading.Thread(target=_refrescar_jwks_periodicamente, args=(_jwks_client,), daemon=True).start()
+    return _jwks_client
+
+
+def _exp_del_token(token):
+    """Lee el exp del token sin verificar la firma; solo se usa para acotar el TTL de la cache."""
+    try:
+        return jwt.decode(token, options={'verify_signature': False}).get('exp')
+    except jwt.InvalidTokenError:
+        return None
+
+
+def obtener_estadisticas_cache_tokens():
+    """Retorna los contadores de aciertos y fallos de la cache de tokens."""
+    return _cache_tokens.estadisticas()
+
 
 def autenticar_usuario_api(username, password):
     """
@@ -70,6 +172,10 @@ def validar_token(token):
             'error': 'Token no proporcionado',
             'codigo': 'MISSING_TOKEN'
         }, status=status.HTTP_401_UNAUTHORIZED)
+
+    user_data = _cache_tokens.obtener(token)
+    if user_data is not None:
+        return user_data, None
     
     # Primero, intentar validar con el microservicio de usuarios
     try:
@@ -81,6 +187,7 @@ def validar_token(token):
         
         if response.status_code == 200:
             user_data = response.json()
+            _cache_tokens.guardar(token, user_data, _exp_del_token(token))
             return user_data, None
         elif response.status_code == 401:
             return None, Response({
@@ -94,10 +201,7 @@ def validar_token(token):
     
     # Fallback: validar token directamente de Auth0
     try:
-        jwks_url = f"https://{os.getenv('AUTHZ_DOMAIN')}/.well-known/jwks.json"
-        jwks_client = jwt.PyJWKClient(jwks_url)
-        
-        signing_key = jwks_client.get_signing_key_from_jwt(token)
+        signing_key = _get_jwks_client().get_signing_key_from_jwt(token)
         
         payload = jwt.decode(
             token,
@@ -115,6 +219,7 @@ def validar_token(token):
             'email': payload.get('email'),
             'rol': 'JefeBodega'  # Por defecto, en el futuro se obtendrá del token o metadata
         }
+        _cache_tokens.guardar(token, user_data, payload.get('exp'))
         
         return user_data, None
         
@@ -54,7 +54,21 @@ class Pedido(models.Model):
     bodega_id = models.CharField(max_length=100, blank=True)
     hash_de_integridad = models.CharField(max_length=64, editable=False, blank=True)
 
-    def _datos_para_hash(self):
+    def _productos_para_hash(self, productos=None):
+        """
+        Retorna los productos solicitados como lista de diccionarios.
+        Usa, en orden: los datos en memoria recibidos, los prefetch del queryset o una consulta.
+        """
+        if productos is not None:
+            return [{'producto': p['producto'], 'cantidad': p['cantidad']} for p in productos]
+        if self.pk is None:
+            return []
+        prefetch = getattr(self, '_prefetched_objects_cache', {}).get('productos_solicitados')
+        if prefetch is not None:
+            return [{'producto': p.producto, 'cantidad': p.cantidad} for p in prefetch]
+        return list(self.productos_solicitados.all().values('producto', 'cantidad'))
+
+    def _datos_para_hash(self, productos=None):
         datos_factura = None
         if self.factura:
             datos_factura = {
@@ -65,9 +79,6 @@ class Pedido(models.Model):
                 "comprobante": self.factura.comprobante,
                 "cliente_id": self.factura.cliente_id,
             }
-        productos = list(
-            self.productos_solicitados.all().values('producto', 'cantidad')
-        ) if hasattr(self, 'productos_solicitados') else []
 
         datos = {
             "id": self.id,
@@ -76,33 +87,48 @@ class Pedido(models.Model):
             "factura": datos_factura,
             "items": list(self.items or []),
             "bodega_id": self.bodega_id,
-            "productos_solicitados": productos,
+            "productos_solicitados": self._productos_para_hash(productos),
         }
         return json.dumps(datos, sort_keys=True).encode()
 
-    def generar_hash(self):
+    def generar_hash(self, productos=None):
         INTEGRITY_KEY = os.getenv("INTEGRITY_KEY")
         if not INTEGRITY_KEY:
             raise RuntimeError("Falta INTEGRITY_KEY en las variables de entorno")
-        return hmac.new(INTEGRITY_KEY.encode(), self._datos_para_hash(), hashlib.sha256).hexdigest()
+        return hmac.new(INTEGRITY_KEY.encode(), self._datos_para_hash(productos), hashlib.sha256).hexdigest()
 
-    
-    # Siempre recalcula hash salvo en admin
-    def save(self, *args, **kwargs):
-        
-        super().save(*args, **kwargs)
+    def actualizar_hash(self, productos=None):
+        """
+        Calcula el hash una sola vez y lo persiste con un único UPDATE de la columna.
+        """
+        self.hash_de_integridad = self.generar_hash(productos)
+        Pedido.objects.filter(pk=self.pk).update(hash_de_integridad=self.hash_de_integridad)
+
+    @staticmethod
+    def _debe_calcular_hash():
         request = get_current_request()
-        if request is None:
+        return request is not None and not request.path.startswith("/admin/")
+
+    # Siempre recalcula hash salvo en admin
+    def save(self, *args, calcular_hash=True, **kwargs):
+        if not calcular_hash or not self._debe_calcular_hash():
+            super().save(*args, **kwargs)
             return
-        if request.path.startswith("/admin/"):
+
+        if self.pk is None:
+            # El hash incluye el id, que solo existe después del INSERT
+            super().save(*args, **kwargs)
+            self.actualizar_hash()
             return
-        
+
+        # Pedido existente: el hash se calcula antes y se guarda en el mismo UPDATE
         self.hash_de_integridad = self.generar_hash()
-        super().save(update_fields=["hash_de_integridad"])
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"hash_de_integridad"}
+        super().save(*args, **kwargs)
 
     def verificar_integridad(self):
-        print("codigo 1 "+self.hash_de_integridad)
-        print("codigo 2 "+self.generar_hash())
         return hmac.compare_digest(self.hash_de_integridad, self.generar_hash())
 
 
@@ -1,3 +1,4 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Cliente, Pedido, ProductoSolicitado
 
@@ -37,13 +38,18 @@ class PedidoCreateSerializer(serializers.ModelSerializer):
         productos_solicitados_data = validated_data.pop('productos_solicitados', [])
         items_data = validated_data.pop('items', [])
 
-        pedido = Pedido.objects.create(items=items_data, **validated_data)
-        
-        for producto_data in productos_solicitados_data:
-            ProductoSolicitado.objects.create(pedido=pedido, **producto_data)
+        # Pedido, productos y hash en una sola transacción con un número constante de sentencias
+        with transaction.atomic():
+            pedido = Pedido(items=items_data, **validated_data)
+            pedido.save(calcular_hash=False)
+
+            ProductoSolicitado.objects.bulk_create([
+                ProductoSolicitado(pedido=pedido, **producto_data)
+                for producto_data in productos_solicitados_data
+            ])
 
-        pedido.hash_de_integridad = pedido.generar_hash()
-        pedido.save(update_fields=['hash_de_integridad'])
+            # El hash se calcula una sola vez con los productos en memoria
+            pedido.actualizar_hash(productos_solicitados_data)
         
         return pedido
     
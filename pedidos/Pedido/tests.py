@@ -1,3 +1,359 @@
-from django.test import TestCase
+import os
+import tempfile
+import time
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.core.cache import caches
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from Pedido.logic import logic_auditoria, logic_inventario, logic_pedido, logic_usuario
+from Pedido.logic.logic_auditoria import PublicadorAuditoria, _SpoolAuditoria
+from Pedido.logic.logic_eventos_inventario import escucha_eventos_inventario
+from Pedido.logic.logic_http import CircuitoAbiertoError, ClienteHTTP
+from Pedido.models import Pedido
+from Pedido.serializers import PedidoCreateSerializer
+
+
+class _CanalFalso:
+    def __init__(self):
+        self.enviados = []
+
+    def basic_publish(self, exchange, routing_key, body, properties):
+        self.enviados.append(body)
+
+
+class _ConexionFalsa:
+    is_open = True
+    is_closed = False
+
+    def process_data_events(self, time_limit=None):
+        pass
+
+
+class SpoolAuditoriaTests(SimpleTestCase):
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.spool = _SpoolAuditoria(os.path.join(directorio.name, 'audit_spool.ndjson'))
+
+    def test_tomar_pendientes_retorna_en_orden_y_vacia_el_archivo(self):
+        self.spool.guardar('{"n": 1}')
+        self.spool.guardar('{"n": 2}')
+
+        self.assertTrue(self.spool.hay_pendientes())
+        self.assertEqual(self.spool.tomar_pendientes(), ['{"n": 1}', '{"n": 2}'])
+        self.assertFalse(self.spool.hay_pendientes())
+        self.assertEqual(self.spool.tomar_pendientes(), [])
+
+    def test_spool_inexistente_no_tiene_pendientes(self):
+        self.assertFalse(self.spool.hay_pendientes())
+        self.assertEqual(self.spool.tomar_pendientes(), [])
+
+    def test_cola_llena_guarda_el_evento_en_el_spool(self):
+        publicador = PublicadorAuditoria(self.spool, 1)
+        with mock.patch.object(publicador, 'iniciar'):
+            publicador.publicar({'action': 'CREATE'})
+            publicador.publicar({'action': 'UPDATE'})
+
+        self.assertEqual(self.spool.tomar_pendientes(), ['{"action": "UPDATE"}'])
+
+    def test_spool_se_reenvia_al_vaciarse_la_cola_sin_reconectar(self):
+        canal = _CanalFalso()
+        conexiones = []
+
+        def conectar():
+            conexiones.append(_ConexionFalsa())
+            return conexiones[-1], canal
+
+        publicador = PublicadorAuditoria(self.spool, 10)
+        publicador._conectar = conectar
+        with mock.patch.object(logic_auditoria, 'AUDIT_PUBLISHER_RETRY_SECONDS', 0.05):
+            publicador.iniciar()
+            publicador.publicar({'action': 'CREATE'})
+            self._esperar(lambda: len(canal.enviados) == 1)
+
+            # Evento que otro worker guardó en el spool mientras el broker estaba disponible
+            self.spool.guardar('{"action": "DELETE"}')
+            self._esperar(lambda: len(canal.enviados) == 2)
+
+        self.assertEqual(canal.enviados, ['{"action": "CREATE"}', '{"action": "DELETE"}'])
+        self.assertEqual(len(conexiones), 1)
+        self.assertFalse(self.spool.hay_pendientes())
+
+    def _esperar(self, condicion, timeout=5):
+        limite = time.monotonic() + timeout
+        while not condicion():
+            if time.monotonic() > limite:
+                self.fail('La condición no se cumplió a tiempo')
+            time.sleep(0.01)
+
+
+def _respuesta(status_code, cuerpo):
+    return mock.Mock(status_code=status_code, json=mock.Mock(return_value=cuerpo), text=str(cuerpo))
+
+
+class CacheInventarioTests(SimpleTestCase):
+
+    def setUp(self):
+        caches[logic_inventario.INVENTARIO_CACHE_ALIAS].clear()
+        self.addCleanup(caches[logic_inventario.INVENTARIO_CACHE_ALIAS].clear)
+        # Sin RabbitMQ: la invalidación por eventos se prueba llamando a _procesar
+        patcher = mock.patch.object(escucha_eventos_inventario, 'iniciar')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(logic_inventario.cliente_inventario, 'get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_producto_encontrado_se_sirve_desde_la_cache(self):
+        producto = {'_id': 'P1', 'nombre': 'Producto 1'}
+        self.get.return_value = _respuesta(200, producto)
+
+        self.assertEqual(logic_inventario.get_producto('P1'), producto)
+        self.assertEqual(logic_inventario.get_producto('P1'), producto)
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_cuerpo_con_codigo_error_no_se_guarda(self):
+        self.get.return_value = _respuesta(200, {'message': 'Producto no encontrado', 'codigo': 'ERROR'})
+
+        logic_inventario.get_producto('P1')
+        logic_inventario.get_producto('P1')
+
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_producto_no_encontrado_no_se_guarda(self):
+        self.get.return_value = _respuesta(404, {'detail': 'Producto no encontrado'})
+
+        self.assertIsNone(logic_inventario.get_producto('P1'))
+        self.assertIsNone(logic_inventario.get_producto('P1'))
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_invalidar_cache_vuelve_a_consultar_inventario(self):
+        self.get.side_effect = [_respuesta(200, {'_id': 'P1', 'precio': 10}), _respuesta(200, {'_id': 'P1', 'precio': 12})]
+
+        logic_inventario.get_producto('P1')
+        logic_inventario.invalidar_cache('producto', 'P1')
+
+        self.assertEqual(logic_inventario.get_producto('P1')['precio'], 12)
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_evento_de_inventario_invalida_la_bodega(self):
+        self.get.side_effect = [_respuesta(200, {'_id': '1', 'ciudad': 'Bogotá'}), _respuesta(200, {'_id': '1', 'ciudad': 'Cali'})]
+
+        logic_inventario.get_bodega('1')
+        escucha_eventos_inventario._procesar('{"entity": "BODEGA", "action": "UPDATE", "entity_id": "1"}')
+
+        self.assertEqual(logic_inventario.get_bodega('1')['ciudad'], 'Cali')
+        self.assertEqual(self.get.call_count, 2)
+
+
+class ValidacionDisponibilidadTests(SimpleTestCase):
+    """
+    Varias líneas del mismo producto se validan contra la suma de sus cantidades.
+    """
+
+    DATOS = {
+        'cliente': 'C1',
+        'operario': 'O1',
+        'bodega_seleccionada': '1',
+        'productos_solicitados': [{'producto': 'P1', 'cantidad': 3}, {'producto': 'P1', 'cantidad': 3}],
+    }
+
+    def setUp(self):
+        patcher = mock.patch.object(logic_pedido, 'get_bodega', return_value={'_id': '1'})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_validacion_en_lote_suma_las_lineas_repetidas(self):
+        disponibilidad = {'P1': {'codigo_barras': 'P1', 'existe': True, 'disponibles': 4}}
+        with mock.patch.object(logic_pedido, 'get_disponibilidad_productos', return_value=disponibilidad) as consulta:
+            pedido, errores = logic_pedido.validar_datos_pedido(self.DATOS)
+
+        self.assertIsNone(pedido)
+        self.assertIn('Solicitado 6, disponibles 4', errores[0])
+        self.assertEqual(consulta.call_args.args[1], [{'producto': 'P1', 'cantidad': 6}])
+
+    def test_validacion_individual_suma_las_lineas_repetidas(self):
+        with mock.patch.object(logic_pedido, 'VALIDACION_PRODUCTOS_MODO', 'serial'), \
+                mock.patch.object(logic_pedido, 'get_producto', return_value={'_id': 'P1'}), \
+                mock.patch.object(logic_pedido, 'get_items_disponibles_por_producto', return_value=4) as conteo:
+            pedido, errores = logic_pedido.validar_datos_pedido(self.DATOS)
+
+        self.assertIsNone(pedido)
+        self.assertIn('Solicitado 6, disponibles 4', errores[0])
+        self.assertEqual(conteo.call_count, 1)
+        self.assertEqual(conteo.call_args.kwargs['minimo'], 6)
+
+    def test_pedido_valido_conserva_las_lineas_originales(self):
+        disponibilidad = {'P1': {'codigo_barras': 'P1', 'existe': True, 'disponibles': 6}}
+        with mock.patch.object(logic_pedido, 'get_disponibilidad_productos', return_value=disponibilidad):
+            pedido, errores = logic_pedido.validar_datos_pedido(self.DATOS)
+
+        self.assertEqual(errores, [])
+        self.assertEqual(pedido['productos_solicitados'], self.DATOS['productos_solicitados'])
+
+
+class CacheTokensTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = logic_usuario._CacheTokens(ttl=60, max_entradas=2)
+
+    def test_token_guardado_se_sirve_hasta_vencer(self):
+        self.cache.guardar('token-1', {'sub': 'u1'})
+
+        self.assertEqual(self.cache.obtener('token-1'), {'sub': 'u1'})
+        self.assertIsNone(self.cache.obtener('token-2'))
+        self.assertEqual(self.cache.estadisticas(), {'aciertos': 1, 'fallos': 1, 'entradas': 1})
+
+    def test_el_exp_del_token_acota_el_ttl(self):
+        ahora = time.time()
+        self.cache.guardar('token-1', {'sub': 'u1'}, exp=ahora + 5)
+        self.cache.guardar('vencido', {'sub': 'u2'}, exp=ahora - 1)
+
+        with mock.patch.object(logic_usuario.time, 'time', return_value=ahora + 6):
+            self.assertIsNone(self.cache.obtener('token-1'))
+        self.assertIsNone(self.cache.obtener('vencido'))
+        self.assertEqual(self.cache.estadisticas()['entradas'], 0)
+
+    def test_se_descarta_el_token_usado_hace_mas_tiempo(self):
+        self.cache.guardar('token-1', {'sub': 'u1'})
+        self.cache.guardar('token-2', {'sub': 'u2'})
+        self.cache.obtener('token-1')
+        self.cache.guardar('token-3', {'sub': 'u3'})
+
+        self.assertIsNone(self.cache.obtener('token-2'))
+        self.assertEqual(self.cache.obtener('token-1'), {'sub': 'u1'})
+        self.assertEqual(self.cache.obtener('token-3'), {'sub': 'u3'})
+
+    def test_la_llave_no_guarda_el_token(self):
+        self.cache.guardar('token-secreto', {'sub': 'u1'})
+
+        self.assertNotIn('token-secreto', self.cache._entradas)
+
+
+@mock.patch.dict(os.environ, {'INTEGRITY_KEY': 'llave-de-pruebas'})
+class HashIntegridadTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(Pedido, '_debe_calcular_hash', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_pedido_nuevo_guarda_un_hash_valido(self):
+        pedido = Pedido.objects.create(operario='O1', bodega_id='1')
+
+        pedido.refresh_from_db()
+        self.assertTrue(pedido.verificar_integridad())
+
+    def test_pedido_existente_se_guarda_con_un_solo_update(self):
+        pedido = Pedido.objects.create(operario='O1', bodega_id='1')
+        pedido.estado = Pedido.Estado.VERIFICADO
+
+        with CaptureQueriesContext(connection) as consultas:
+            pedido.save(update_fields=['estado'])
+
+        escrituras = [q['sql'] for q in consultas.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(escrituras), 1)
+        self.assertIn('"hash_de_integridad"', escrituras[0])
+        pedido.refresh_from_db()
+        self.assertTrue(pedido.verificar_integridad())
+
+
+@mock.patch.dict(os.environ, {'INTEGRITY_KEY': 'llave-de-pruebas'})
+class CrearPedidoTests(TestCase):
+
+    def _crear(self, cantidad_productos):
+        datos = {
+            'operario': 'O1',
+            'bodega_id': '1',
+            'productos_solicitados': [{'producto': f'P{i}', 'cantidad': 1} for i in range(cantidad_productos)],
+        }
+        serializer = PedidoCreateSerializer(data=datos)
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as consultas:
+            pedido = serializer.save()
+        return pedido, len(consultas)
+
+    def test_numero_de_consultas_no_depende_de_los_productos(self):
+        _, consultas_uno = self._crear(1)
+        pedido, consultas_diez = self._crear(10)
+
+        self.assertEqual(consultas_uno, consultas_diez)
+        self.assertEqual(pedido.productos_solicitados.count(), 10)
+
+    def test_hash_calculado_con_los_productos_en_memoria_es_valido(self):
+        pedido, _ = self._crear(3)
+
+        pedido = Pedido.objects.prefetch_related('productos_solicitados').get(pk=pedido.pk)
+        self.assertTrue(pedido.verificar_integridad())
+
+
+class ClienteHTTPTests(SimpleTestCase):
+
+    def setUp(self):
+        self.cliente = ClienteHTTP('http://inventario/', timeouts={'producto': (1, 2)}, umbral_fallos=2, tiempo_abierto=30)
+        patcher = mock.patch.object(self.cliente._session, 'request')
+        self.request = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_aplica_el_timeout_del_endpoint(self):
+        self.request.return_value = _respuesta(200, {})
+
+        self.cliente.get('producto', '/productos/P1')
+        self.cliente.get('bodega', '/bodegas/1')
+
+        self.assertEqual(self.request.call_args_list[0], mock.call('GET', 'http://inventario/productos/P1', timeout=(1, 2)))
+        self.assertEqual(self.request.call_args_list[1].kwargs['timeout'], (2, 5))
+        self.assertEqual(self.cliente.metricas()['latencias']['producto']['llamadas'], 1)
+
+    def test_circuito_se_abre_tras_los_fallos_y_deja_pasar_una_prueba(self):
+        self.request.side_effect = requests.ConnectionError('sin conexión')
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.cliente.get('producto', '/productos/P1')
+
+        with self.assertRaises(CircuitoAbiertoError):
+            self.cliente.get('producto', '/productos/P1')
+        self.assertEqual(self.request.call_count, 2)
+
+        self.request.side_effect = None
+        self.request.return_value = _respuesta(200, {})
+        ahora = time.monotonic()
+        with mock.patch('Pedido.logic.logic_http.time.monotonic', return_value=ahora + 31):
+            self.cliente.get('producto', '/productos/P1')
+
+        self.assertEqual(self.cliente.metricas()['circuito'], {'abierto': False, 'fallos_consecutivos': 0})
+
+    def test_error_del_servidor_cuenta_como_fallo(self):
+        self.request.return_value = _respuesta(503, {})
+
+        self.cliente.get('producto', '/productos/P1')
+
+        self.assertEqual(self.cliente.metricas()['circuito']['fallos_consecutivos'], 1)
+
+
+class ValidacionParalelaTests(SimpleTestCase):
+
+    PRODUCTOS = [{'producto': 'P1', 'cantidad': 1}, {'producto': 'P2', 'cantidad': 1}, {'producto': 'P3', 'cantidad': 1}]
+
+    def test_reporta_el_error_del_primer_producto_aunque_otro_responda_antes(self):
+        def validar(producto, bodega_id, inv_headers):
+            if producto['producto'] == 'P1':
+                time.sleep(0.1)
+            return None if producto['producto'] == 'P2' else f"Error en {producto['producto']}"
+
+        with mock.patch.object(logic_pedido, '_validar_producto', side_effect=validar):
+            errores = logic_pedido._validar_productos_individualmente(self.PRODUCTOS, '1', None, paralelo=True)
+
+        self.assertEqual(errores, ['Error en P1'])
+
+    def test_productos_validos_no_retornan_errores(self):
+        with mock.patch.object(logic_pedido, '_validar_producto', return_value=None) as validar:
+            errores = logic_pedido._validar_productos_individualmente(self.PRODUCTOS, '1', None, paralelo=True)
+
+        self.assertEqual(errores, [])
+        self.assertEqual(validar.call_count, 3)
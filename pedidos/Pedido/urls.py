@@ -6,4 +6,5 @@ urlpatterns = [
     path('<int:id>/', api_views.consultar_pedido, name='consultar_pedido'),
     path('<int:id>/estado', api_views.cambiar_estado_pedido_api, name='cambiar_estado_pedido'),
     path('<int:id>/integridad', api_views.verificar_integridad, name='verificar_integridad'),
+    path('metricas/', api_views.metricas, name='metricas'),
 ]
@@ -0,0 +1,84 @@
+"""
+Cuenta las consultas SQL que cuesta crear un pedido y cambiar su estado.
+
+Usa una base de datos de prueba temporal, por lo que no modifica los datos reales.
+
+Uso (desde el directorio pedidos):
+    python benchmarks/benchmark_consultas_pedido.py --productos 1 10 40
+"""
+import argparse
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Provesi.settings")
+os.environ.setdefault("INTEGRITY_KEY", "benchmark")
+
+import django
+
+django.setup()
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, setup_test_environment
+from rest_framework.test import APIRequestFactory
+
+from Provesi.middleware.current_request import thread_local
+from Pedido.logic.logic_pedido import actualizar_estado_pedido_api
+from Pedido.models import Cliente
+from Pedido.serializers import PedidoCreateSerializer
+
+# El cambio de estado audita por HTTP; se desactiva para contar solo las consultas SQL
+import Pedido.logic.logic_pedido as logic_pedido
+logic_pedido.enviar_evento_auditoria = lambda *args, **kwargs: True
+
+
+def datos_pedido(cliente_id, cantidad_productos):
+    return {
+        "cliente": cliente_id,
+        "operario": "benchmark",
+        "bodega_id": "1",
+        "items": [],
+        "productos_solicitados": [
+            {"producto": f"PROD{i}", "cantidad": 1} for i in range(cantidad_productos)
+        ],
+    }
+
+
+def medir(cantidades):
+    factory = APIRequestFactory()
+    cliente = Cliente.objects.create(nombre="Benchmark", numero_telefono="0")
+    user_data = {"username": "benchmark", "rol": "Vendedor"}
+
+    for cantidad in cantidades:
+        thread_local.request = factory.post("/pedidos/")
+        serializer = PedidoCreateSerializer(data=datos_pedido(cliente.id, cantidad))
+        serializer.is_valid(raise_exception=True)
+        with CaptureQueriesContext(connection) as creacion:
+            pedido = serializer.save()
+
+        thread_local.request = factory.put(f"/pedidos/{pedido.id}/estado")
+        request = SimpleNamespace(user_data=user_data, data={
+            "pedido_id": pedido.id,
+            "nuevo_estado": "Empacado x despachar",
+            "datos_factura": {"costo_total": 1000, "metodo_pago": "Tarjeta", "num_cuenta": "123", "comprobante": "COMP-1"},
+        })
+        with CaptureQueriesContext(connection) as cambio_estado:
+            respuesta = actualizar_estado_pedido_api(request)
+
+        print(f"Productos: {cantidad:>4} | consultas al crear: {len(creacion):>4} | "
+              f"consultas al cambiar estado: {len(cambio_estado):>3} (HTTP {respuesta.status_code})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consultas SQL por creación y cambio de estado de pedido")
+    parser.add_argument("--productos", type=int, nargs="+", default=[1, 10, 40])
+    args = parser.parse_args()
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        medir(args.productos)
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
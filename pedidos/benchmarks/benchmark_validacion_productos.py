@@ -0,0 +1,68 @@
+"""
+Compara la latencia de la validación de productos de un pedido en modo serial,
+paralelo y por lote, para distintos tamaños de pedido.
+
+Requiere un servicio de inventario accesible (INVENTARIO_URL) y productos existentes
+en la bodega indicada. Al final imprime el histograma que también expone /metricas/.
+
+Uso (desde el directorio pedidos):
+    python benchmarks/benchmark_validacion_productos.py --bodega 1 \
+        --productos PROD1 PROD2 PROD3 --tamanos 1 5 20 --repeticiones 20 --token <jwt>
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Provesi.settings")
+
+import django
+
+django.setup()
+
+import Pedido.logic.logic_pedido as logic_pedido
+
+MODOS = ("serial", "paralelo", "lote")
+
+
+def datos_pedido(bodega, productos, tamano):
+    return {
+        "cliente": 1,
+        "operario": "benchmark",
+        "bodega_seleccionada": bodega,
+        "productos_solicitados": [
+            {"producto": productos[i % len(productos)], "cantidad": 1} for i in range(tamano)
+        ],
+    }
+
+
+def medir(bodega, productos, tamanos, repeticiones, headers):
+    for tamano in tamanos:
+        request_data = datos_pedido(bodega, productos, tamano)
+        for modo in MODOS:
+            logic_pedido.VALIDACION_PRODUCTOS_MODO = modo
+            latencias = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                _, errores = logic_pedido.validar_datos_pedido(request_data, inv_headers=headers)
+                latencias.append((time.perf_counter() - inicio) * 1000)
+            estado = "ok" if not errores else errores[0]
+            print(f"Productos: {tamano:>4} | modo: {modo:<8} | p50: {statistics.median(latencias):8.1f} ms | "
+                  f"máx: {max(latencias):8.1f} ms | {estado}")
+
+    print(json.dumps(logic_pedido.metricas_validacion.resumen(), indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latencia de la validación de productos por modo")
+    parser.add_argument("--bodega", required=True)
+    parser.add_argument("--productos", nargs="+", required=True)
+    parser.add_argument("--tamanos", type=int, nargs="+", default=[1, 5, 20, 50])
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--token", default=None)
+    args = parser.parse_args()
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    medir(args.bodega, args.productos, args.tamanos, args.repeticiones, headers)